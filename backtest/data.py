@@ -0,0 +1,95 @@
+import sqlite3
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from storage.history_writer import TickArchive
+
+# unified_ticks columns loaded per symbol; NULL becomes NaN
+COLUMNS = ("ts", "price", "spread", "bid_total", "ask_total", "gap_above", "funding", "oi", "sweep_rejection")
+
+
+class TickArrays(NamedTuple):
+    """One symbol's unified ticks as float64 column arrays, ordered by ts."""
+    ts: np.ndarray
+    price: np.ndarray
+    spread: np.ndarray
+    bid_total: np.ndarray
+    ask_total: np.ndarray
+    gap_above: np.ndarray
+    funding: np.ndarray
+    oi: np.ndarray
+    sweep_rejection: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+def _range_sql(since: Optional[float], until: Optional[float]) -> Tuple[str, tuple]:
+    sql, args = "", ()
+    if since is not None:
+        sql, args = sql + " AND ts>=?", args + (since,)
+    if until is not None:
+        sql, args = sql + " AND ts<?", args + (until,)
+    return sql, args
+
+
+def list_symbols(conn: sqlite3.Connection) -> List[str]:
+    return [r[0] for r in conn.execute("SELECT DISTINCT sym FROM unified_ticks ORDER BY sym")]
+
+
+def _archived(archive: TickArchive, sym: str, since: Optional[float], until: Optional[float]) -> Optional[np.ndarray]:
+    a = archive.read_range(sym, since, until, ("ts", "price", "mark") + COLUMNS[2:])
+    if not len(a["ts"]):
+        return None
+    price = np.where(np.isnan(a["price"]), a["mark"], a["price"])
+    return np.column_stack([a["ts"], price] + [a[c] for c in COLUMNS[2:]])
+
+
+def load_symbol(conn: sqlite3.Connection, sym: str, since: Optional[float] = None,
+                until: Optional[float] = None, archive: Optional[TickArchive] = None) -> Optional[TickArrays]:
+    """Ticks with a positive price (price, else mark) for one symbol, or None if there are none.
+
+    With an archive, ticks older than archive.archived_through() are read
+    from it and only the newer ones from SQLite.
+    """
+    parts = []
+    if archive is not None:
+        cut = archive.archived_through()
+        if cut and (since is None or since < cut):
+            a = _archived(archive, sym, since, cut if until is None else min(until, cut))
+            if a is not None:
+                parts.append(a)
+        if cut:
+            since = cut if since is None else max(since, cut)
+    if until is None or since is None or since < until:
+        rng, args = _range_sql(since, until)
+        rows = conn.execute(
+            "SELECT ts, COALESCE(price, mark), spread, bid_total, ask_total, gap_above, funding, oi, sweep_rejection "
+            f"FROM unified_ticks WHERE sym=?{rng} ORDER BY ts",
+            (sym,) + args,
+        ).fetchall()
+        if rows:
+            parts.append(np.array(rows, dtype=np.float64))
+    if not parts:
+        return None
+    a = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    a = a[a[:, 1] > 0]
+    if not len(a):
+        return None
+    return TickArrays(*(np.ascontiguousarray(a[:, i]) for i in range(len(COLUMNS))))
+
+
+def iter_symbols(db_path: str, symbols: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                 until: Optional[float] = None, archive: Optional[TickArchive] = None) -> Iterator[Tuple[str, TickArrays]]:
+    """Yield (sym, TickArrays) one symbol at a time so memory stays bounded by the largest symbol."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if symbols:
+            symbols = list(symbols)
+        else:
+            symbols = sorted(set(list_symbols(conn)) | set(archive.symbols() if archive is not None else ()))
+        for sym in symbols:
+            t = load_symbol(conn, sym, since, until, archive)
+            if t is not None:
+                yield sym, t
+    finally:
+        conn.close()
@@ -0,0 +1,236 @@
+"""Vectorized replay of the Orchestrator's decision pass over unified_ticks.
+
+Per symbol, every feature the live path derives from a unified tick
+(Microstructure.features_from_unified, Funding.impulse, OI divergence,
+recent return, BTC regime) is computed as a NumPy column. Scorer.score and
+the EntryTrigger conditions are then evaluated over the whole history at
+once. The only sequential step is walking entries. Each open position's exit
+is found with a vectorized scan of ExitManager.trailing_for_short over the
+following prices.
+
+Differences from live: BTC alignment is rebuilt from BTCUSDT unified ticks
+(1m closes) instead of polled klines, the 15-minute dedup hash is not
+applied, and rows without a positive price are dropped. unified_ticks is
+stored change-only (storage/delta_filter.py): events whose fields stayed
+within the DB_DELTA_UNIFIED tolerances are not stored, so the backtest
+evaluates entries only at stored rows (at least every DB_HEARTBEAT_SEC), and
+a move that live saw as several small steps arrives here as one step. Live
+takes short_momentum and oi_divergence from the previous event; here they
+are the change over the last STEP_SEC, with values carried forward from the
+last stored row, so gaps between stored rows do not stretch them.
+"""
+import os
+import sqlite3
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scalp_engine.scorer import Scorer
+from storage.history_writer import TickArchive
+from .data import TickArrays, iter_symbols, load_symbol
+
+Trade = Tuple[str, float, float, float, float, str, float]  # (sym, entry_ts, entry_px, exit_ts, exit_px, reason, pnl_pct)
+
+BTC_SYMBOL = "BTCUSDT"
+# unified rows carry whole-second timestamps, one per symbol per second at most,
+# so live's "since the previous event" is approximated as "over the last second"
+STEP_SEC = 1.0
+
+
+def default_params() -> dict:
+    """Live thresholds, read from the same env vars as the Orchestrator and ExitManager."""
+    return {
+        "SCORE_MIN": float(os.getenv("SCORE_MIN", "60")),
+        "MAX_PRICE": float(os.getenv("MAX_PRICE", "5.0")),
+        "ENTRY_COOLDOWN_SEC": float(os.getenv("ENTRY_COOLDOWN_SEC", "300")),
+        "TRAIL_ACTIVATE_PCT": float(os.getenv("TRAIL_ACTIVATE_PCT", "0.6")),
+        "TRAIL_GIVEBACK_PCT": float(os.getenv("TRAIL_GIVEBACK_PCT", "0.4")),
+        "HARD_STOP_LOSS_PCT": float(os.getenv("HARD_STOP_LOSS_PCT", "1.2")),
+        "weights": dict(Scorer.WEIGHTS),
+    }
+
+
+def btc_alignment(btc: Optional[TickArrays], ts: np.ndarray) -> np.ndarray:
+    """BTCRegime.alignment() at each ts, from 1m closes rebuilt out of BTCUSDT ticks."""
+    out = np.zeros(len(ts))
+    if btc is None or len(btc) == 0:
+        return out
+    minute = np.floor(btc.ts / 60.0)
+    last = np.flatnonzero(np.diff(minute, append=np.inf) != 0)  # last tick of each minute
+    close = btc.price[last]
+    close_ts = (minute[last] + 1.0) * 60.0
+    k = np.searchsorted(close_ts, ts, side="right") - 1  # newest closed kline at ts
+    kk = np.clip(k, 0, None)
+    c = close[kk]
+    c5 = close[np.clip(k - 4, 0, None)]
+    c60 = close[np.clip(k - 59, 0, None)]
+    pump = np.maximum(c / c5 - 1.0, c / c60 - 1.0)
+    valid = (k >= 4) & (ts - close_ts[kk] < 3900)
+    out[valid] = np.clip(pump[valid] / 0.03, 0.0, 1.0)
+    return out
+
+
+def _as_of(ts: np.ndarray, values: np.ndarray, lag: float) -> np.ndarray:
+    """values[i] as of ts[i] - lag: the last value stored at or before then (0 if none)."""
+    k = np.searchsorted(ts, ts - lag, side="right") - 1
+    out = np.zeros(len(values))
+    ok = k >= 0
+    out[ok] = values[k[ok]]
+    return out
+
+
+def compute_features(t: TickArrays, btc_pump: np.ndarray) -> Dict[str, np.ndarray]:
+    """Feature columns as Orchestrator.process would hold them after each tick."""
+    price = t.price
+    bt = np.nan_to_num(t.bid_total)
+    at = np.nan_to_num(t.ask_total)
+    denom = bt + at
+    ask_dom = np.clip(np.divide(at, denom, out=at.copy(), where=denom > 0), 0.0, 1.0)
+    spread = np.nan_to_num(t.spread)
+    spread_pct = np.maximum(0.0, np.divide(spread, price, out=np.zeros(len(price)), where=spread != 0))
+    gap = np.where(t.gap_above > 0, t.gap_above, 0.0)
+    funding_impulse = np.where(np.isnan(t.funding), 0.0, np.clip(-t.funding / 0.01, -1.0, 1.0))
+
+    # OI divergence vs the OI reported STEP_SEC earlier (as of that time), carried
+    # forward on ticks without OI
+    has_oi = ~np.isnan(t.oi)
+    oi = t.oi[has_oi]
+    prev = _as_of(t.ts[has_oi], oi, STEP_SEC)
+    ok = (prev > 0) & (oi > 0)
+    div = np.zeros(len(oi))
+    div[ok] = np.clip((oi[ok] - prev[ok]) / prev[ok], -1.0, 1.0)
+    last_oi = np.cumsum(has_oi) - 1
+    oi_divergence = np.zeros(len(price))
+    carried = last_oi >= 0
+    oi_divergence[carried] = np.maximum(0.0, div[last_oi[carried]])
+
+    prev_px = _as_of(t.ts, price, STEP_SEC)
+    r = np.divide(price, prev_px, out=np.ones(len(price)), where=prev_px > 0) - 1.0
+    return {
+        "ask_dom": ask_dom,
+        "spread_pct": spread_pct,
+        "gap_above": gap,
+        "funding_impulse": funding_impulse,
+        "oi_divergence": oi_divergence,
+        "sweep_rejection": np.nan_to_num(t.sweep_rejection),
+        "short_momentum": np.clip(np.maximum(0.0, -r) / 0.003, 0.0, 1.0),
+        "btc_alignment": np.clip(1.0 - btc_pump, 0.0, 1.0),
+        "liquidity_pressure": np.clip(gap / 0.002, 0.0, 1.0),
+        "orderflow_imbalance": ask_dom,
+    }
+
+
+def score(feats: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """Scorer.score over columns."""
+    n = len(next(iter(feats.values())))
+    total = np.zeros(n)
+    for k, w in weights.items():
+        col = feats.get(k)
+        if col is not None:
+            total += w * np.clip(col, 0.0, 1.0)
+    max_score = sum(weights.values())
+    return np.clip(total / max_score * 100.0, 0.0, 100.0) if max_score > 0 else total
+
+
+def entry_conditions(feats: Dict[str, np.ndarray]) -> np.ndarray:
+    """EntryTrigger.should_short over columns (at least 6 of 7 conditions)."""
+    met = ((feats["sweep_rejection"] >= 0.7).astype(np.int8)
+           + (feats["ask_dom"] > 0.6)
+           + (feats["gap_above"] > 0.005)
+           + (feats["spread_pct"] < 0.002)
+           + (feats["oi_divergence"] > 0.0)
+           + (feats["funding_impulse"] < 0)
+           + (feats["btc_alignment"] < 0.5))
+    return met >= 6
+
+
+def first_exit(px: np.ndarray, start: int, entry: float, act: float, giveback: float,
+               hard_stop: float, chunk: int = 1024) -> Optional[Tuple[int, str, float]]:
+    """First index >= start where trailing_for_short exits a short opened at `entry`.
+
+    Scans in geometrically growing chunks, carrying best_low between chunks,
+    so short holds touch few prices and long holds stay O(n).
+    """
+    best = entry
+    j, n = start, len(px)
+    while j < n:
+        seg = px[j:j + chunk]
+        low = np.minimum.accumulate(np.minimum(seg, best))
+        pnl = (entry - seg) / entry * 100.0
+        peak = (entry - low) / entry * 100.0
+        hit = (pnl <= -hard_stop) | ((pnl >= act) & (peak - pnl >= giveback) & (peak >= act))
+        if hit.any():
+            k = int(np.argmax(hit))
+            return j + k, ("hard_stop" if pnl[k] <= -hard_stop else "trailing_giveback"), float(pnl[k])
+        best = float(low[-1])
+        j += len(seg)
+        chunk *= 2
+    return None
+
+
+def simulate(sym: str, t: TickArrays, sc: np.ndarray, cond: np.ndarray, params: dict) -> List[Trade]:
+    """Walk entries in time order: one position per symbol, entry cooldown, trailing exits.
+
+    As in the live loop, the trailing check on a tick runs before the entry
+    check, so a new entry may open on the tick that closed the previous one.
+    Positions still open at the end are marked to the last price as 'open'.
+    """
+    ts, px = t.ts, t.price
+    cand = np.flatnonzero(cond & (sc >= params["SCORE_MIN"]) & (px <= params["MAX_PRICE"]))
+    act, gb, hs = params["TRAIL_ACTIVATE_PCT"], params["TRAIL_GIVEBACK_PCT"], params["HARD_STOP_LOSS_PCT"]
+    cooldown = params["ENTRY_COOLDOWN_SEC"]
+    trades: List[Trade] = []
+    pos = 0
+    while pos < len(cand):
+        i = int(cand[pos])
+        entry = float(px[i])
+        ex = first_exit(px, i + 1, entry, act, gb, hs)
+        if ex is None:
+            last = float(px[-1])
+            trades.append((sym, float(ts[i]), entry, float(ts[-1]), last, "open", (entry - last) / entry * 100.0))
+            break
+        j, reason, pnl = ex
+        trades.append((sym, float(ts[i]), entry, float(ts[j]), float(px[j]), reason, pnl))
+        nxt = max(j, int(np.searchsorted(ts, ts[i] + cooldown, side="left")))
+        pos = int(np.searchsorted(cand, nxt, side="left"))
+    return trades
+
+
+def summarize(trades: List[Trade]) -> dict:
+    pnl = np.array([tr[6] for tr in trades], dtype=np.float64)
+    n = len(pnl)
+    return {
+        "trades": n,
+        "hit_rate": float((pnl > 0).mean()) if n else 0.0,
+        "pnl_sum": float(pnl.sum()) if n else 0.0,
+        "pnl_avg": float(pnl.mean()) if n else 0.0,
+        "pnl_best": float(pnl.max()) if n else 0.0,
+        "pnl_worst": float(pnl.min()) if n else 0.0,
+        "exits": dict(Counter(tr[5] for tr in trades)),
+    }
+
+
+def run_backtest(db_path: str, param_sets: List[dict], symbols: Optional[List[str]] = None,
+                 since: Optional[float] = None, until: Optional[float] = None, archive_dir: Optional[str] = None):
+    """Backtest every parameter set over unified_ticks (plus the tick archive under archive_dir).
+
+    Each symbol is loaded and featurized once; scores are computed once per
+    distinct weight set. Returns [(params, summary, trades)] in input order.
+    """
+    archive = TickArchive(archive_dir) if archive_dir else None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        btc = load_symbol(conn, BTC_SYMBOL, since, until, archive)
+    finally:
+        conn.close()
+    all_trades: List[List[Trade]] = [[] for _ in param_sets]
+    for sym, t in iter_symbols(db_path, symbols, since, until, archive):
+        feats = compute_features(t, btc_alignment(btc, t.ts))
+        cond = entry_conditions(feats)
+        scores: Dict[tuple, np.ndarray] = {}
+        for k, p in enumerate(param_sets):
+            wkey = tuple(sorted(p["weights"].items()))
+            sc = scores.get(wkey)
+            if sc is None:
+                sc = scores[wkey] = score(feats, p["weights"])
+            all_trades[k].extend(simulate(sym, t, sc, cond, p))
+    return [(p, summarize(tr), tr) for p, tr in zip(param_sets, all_trades)]
@@ -0,0 +1,194 @@
+"""Parallel parameter sweeps over a memory-mapped feature cache.
+
+build_cache() loads unified_ticks once and writes, per symbol, one
+`<sym>.npy` matrix of CACHE_COLUMNS (ts, price, entry condition and every
+score feature), plus a manifest. Sweep workers open those files with
+np.load(mmap_mode="r"), so all processes read the same page-cache pages and no
+tick data is pickled per job. Only parameter sets go to the workers and only
+summaries come back.
+
+Jobs are grouped into batches. A worker walks every symbol once per batch
+and runs all of the batch's parameter sets on it, sharing scores between sets
+that use the same weights.
+"""
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from scalp_engine.scorer import Scorer
+from storage.history_writer import MANIFEST as ARCHIVE_MANIFEST, TickArchive
+from .data import iter_symbols, load_symbol
+from .engine import BTC_SYMBOL, btc_alignment, compute_features, entry_conditions, score, simulate, summarize
+
+FEATURES = tuple(Scorer.WEIGHTS)
+CACHE_COLUMNS = ("ts", "price", "entry_ok") + FEATURES
+MANIFEST = "manifest.json"
+
+
+class _Series(NamedTuple):
+    ts: np.ndarray
+    price: np.ndarray
+
+
+def _db_stamp(db_path: str, archive_dir: Optional[str] = None) -> list:
+    st = os.stat(db_path)
+    stamp = [st.st_size, st.st_mtime]
+    if archive_dir:
+        try:
+            stamp.append(os.stat(os.path.join(archive_dir, ARCHIVE_MANIFEST)).st_mtime)
+        except OSError:
+            pass
+    return stamp
+
+
+def _symbol_filter(symbols: Optional[Iterable[str]]) -> Optional[List[str]]:
+    return sorted(set(symbols)) if symbols else None
+
+
+def cache_is_fresh(cache_dir: str, db_path: str, since: Optional[float], until: Optional[float],
+                   archive_dir: Optional[str] = None, symbols: Optional[Iterable[str]] = None) -> bool:
+    try:
+        with open(os.path.join(cache_dir, MANIFEST)) as f:
+            m = json.load(f)
+    except (OSError, ValueError):
+        return False
+    # a cache built for a symbol subset is not fresh for a run over all symbols, and vice versa
+    return (m.get("db_stamp") == _db_stamp(db_path, archive_dir) and m.get("since") == since and m.get("until") == until
+            and m.get("columns") == list(CACHE_COLUMNS) and "symbol_filter" in m
+            and m["symbol_filter"] == _symbol_filter(symbols))
+
+
+def build_cache(db_path: str, cache_dir: str, symbols: Optional[Iterable[str]] = None,
+                since: Optional[float] = None, until: Optional[float] = None,
+                archive_dir: Optional[str] = None) -> dict:
+    """Featurize every symbol once and write `<cache_dir>/<sym>.npy` plus the manifest."""
+    os.makedirs(cache_dir, exist_ok=True)
+    archive = TickArchive(archive_dir) if archive_dir else None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        btc = load_symbol(conn, BTC_SYMBOL, since, until, archive)
+    finally:
+        conn.close()
+    rows: Dict[str, int] = {}
+    for sym, t in iter_symbols(db_path, symbols, since, until, archive):
+        feats = compute_features(t, btc_alignment(btc, t.ts))
+        cols = [t.ts, t.price, entry_conditions(feats).astype(np.float64)] + [feats[k] for k in FEATURES]
+        tmp = os.path.join(cache_dir, f".{sym}.npy")
+        np.save(tmp, np.vstack(cols))
+        os.replace(tmp, os.path.join(cache_dir, f"{sym}.npy"))
+        rows[sym] = len(t)
+    manifest = {"db": os.path.abspath(db_path), "db_stamp": _db_stamp(db_path, archive_dir), "since": since, "until": until,
+                "columns": list(CACHE_COLUMNS), "symbol_filter": _symbol_filter(symbols), "symbols": rows}
+    tmp = os.path.join(cache_dir, f".{MANIFEST}")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST))
+    return manifest
+
+
+def expand_grid(space: Dict[str, list]) -> List[Dict[str, float]]:
+    """Cartesian product of per-parameter value lists."""
+    keys = list(space)
+    return [dict(zip(keys, vals)) for vals in itertools.product(*(space[k] for k in keys))]
+
+
+def sample_random(space: Dict[str, list], n: int, seed: Optional[int] = None) -> List[Dict[str, float]]:
+    """n random points: a (lo, hi) tuple is sampled uniformly, a list by choice."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        out.append({k: (rng.uniform(*v) if isinstance(v, tuple) else rng.choice(v)) for k, v in space.items()})
+    return out
+
+
+def apply_overrides(base: dict, overrides: Dict[str, float]) -> dict:
+    """base params with overrides applied; weights are addressed as w.<feature>."""
+    p = dict(base, weights=dict(base["weights"]))
+    for k, v in overrides.items():
+        if k.startswith("w."):
+            if k[2:] not in p["weights"]:
+                raise KeyError(k)
+            p["weights"][k[2:]] = float(v)
+        elif k in p:
+            p[k] = float(v)
+        else:
+            raise KeyError(k)
+    return p
+
+
+# --- worker side -------------------------------------------------------------
+
+_cache_dir: Optional[str] = None
+_symbols: List[str] = []
+_maps: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(cache_dir: str):
+    global _cache_dir, _symbols
+    with open(os.path.join(cache_dir, MANIFEST)) as f:
+        _symbols = sorted(json.load(f)["symbols"])
+    _cache_dir = cache_dir
+
+
+def _matrix(sym: str) -> np.ndarray:
+    m = _maps.get(sym)
+    if m is None:
+        m = _maps[sym] = np.load(os.path.join(_cache_dir, f"{sym}.npy"), mmap_mode="r")
+    return m
+
+
+def _run_batch(batch: List[Tuple[int, dict]]) -> List[Tuple[int, dict]]:
+    trades: List[list] = [[] for _ in batch]
+    for sym in _symbols:
+        m = _matrix(sym)
+        series = _Series(m[0], m[1])
+        cond = m[2] != 0
+        feats = {k: m[3 + i] for i, k in enumerate(FEATURES)}
+        scores: Dict[tuple, np.ndarray] = {}
+        for k, (_, p) in enumerate(batch):
+            wkey = tuple(sorted(p["weights"].items()))
+            sc = scores.get(wkey)
+            if sc is None:
+                sc = scores[wkey] = score(feats, p["weights"])
+            trades[k].extend(simulate(sym, series, sc, cond, p))
+    return [(idx, summarize(tr)) for (idx, _), tr in zip(batch, trades)]
+
+
+def run_sweep(cache_dir: str, param_sets: List[dict], workers: Optional[int] = None,
+              batch_size: Optional[int] = None, progress=None) -> List[dict]:
+    """Run every parameter set over the cached symbols; returns summaries in input order.
+
+    workers=1 runs in-process. By default, batches are sized so that each
+    worker gets about four of them, which keeps the tail short when batch
+    costs differ.
+    """
+    workers = workers or os.cpu_count() or 1
+    indexed = list(enumerate(param_sets))
+    if batch_size is None:
+        batch_size = max(1, len(indexed) // (workers * 4))
+    batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+    results: List[Optional[dict]] = [None] * len(param_sets)
+    done = 0
+
+    def collect(out):
+        nonlocal done
+        for idx, summary in out:
+            results[idx] = summary
+        done += len(out)
+        if progress is not None:
+            progress(done, len(param_sets))
+
+    if workers == 1:
+        _init_worker(cache_dir)
+        for b in batches:
+            collect(_run_batch(b))
+        _maps.clear()
+    else:
+        with mp.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=(cache_dir,)) as pool:
+            for out in pool.imap_unordered(_run_batch, batches):
+                collect(out)
+    return results
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 import sqlite3, os, sys
 from datetime import datetime
+from storage.history_writer import TickArchive
 
 db_path = os.path.join(os.path.dirname(__file__), "data.db")
+# closed partitions live in the tick archive; SQLite keeps only the hot window
+archive = TickArchive(os.path.join(os.path.dirname(__file__), "history"))
+archived_through = archive.archived_through()
 if not os.path.exists(db_path):
     print("DB not found")
     sys.exit(1)
@@ -10,13 +14,15 @@ if not os.path.exists(db_path):
 conn = sqlite3.connect(db_path)
 cur = conn.cursor()
 
-# Count total unified ticks
-cur.execute("SELECT COUNT(*) FROM unified_ticks")
-total = cur.fetchone()[0]
+# Count total unified ticks: archived rows from the manifest plus the unarchived tail
+cur.execute("SELECT COUNT(*) FROM unified_ticks WHERE ts >= ?", (archived_through,))
+total = cur.fetchone()[0] + archive.total_rows()
 
 # No per-exchange breakdown in unified table; show recent per-symbol counts instead
-cur.execute("SELECT sym, COUNT(*) FROM unified_ticks GROUP BY sym ORDER BY COUNT(*) DESC LIMIT 10")
-sym_counts = cur.fetchall()
+counts = archive.row_counts()
+for sym, cnt in cur.execute("SELECT sym, COUNT(*) FROM unified_ticks WHERE ts >= ? GROUP BY sym", (archived_through,)):
+    counts[sym] = counts.get(sym, 0) + cnt
+sym_counts = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:10]
 
 # Latest unified ticks
 cur.execute("SELECT sym, COALESCE(price, mark) as price, ts FROM unified_ticks ORDER BY ts DESC LIMIT 30")
@@ -1,12 +1,11 @@
-from .rest_client import RESTClient
+from .rest_client import get_client
 
-async def funding_oi(symbol: str):
-    rc = RESTClient("https://fapi.binance.com")
-    try:
-        fund = await rc.get("/fapi/v1/premiumIndex", params={"symbol": symbol})
-        oi = await rc.get("/futures/data/openInterestHist", params={"symbol": symbol, "period":"5m", "limit": 1})
-        await rc.close()
-        return fund, oi
-    except Exception:
-        await rc.close()
-        raise
+BASE_URL = "https://fapi.binance.com"
+
+async def premium_index_all():
+    """Mark price and funding for every USDT-M perpetual in one request (weight 10)."""
+    return await get_client(BASE_URL).get("/fapi/v1/premiumIndex")
+
+async def open_interest_hist(symbol: str):
+    # no bulk variant; one request per symbol
+    return await get_client(BASE_URL).get("/futures/data/openInterestHist", params={"symbol": symbol, "period":"5m", "limit": 1})
@@ -1,15 +1,20 @@
-import asyncio, json, time
+import asyncio, time
 import websockets
 from loguru import logger
+from .decoders import Decoded, decoder_for
 
 class BinanceWS:
-    def __init__(self, symbols, on_ob, on_trade, on_mark):
+    def __init__(self, symbols, on_ob, on_trade, on_mark, base_url: str = "wss://fstream.binance.com"):
+        self.base_url = base_url.rstrip("/")
         self.symbols = [s.lower() for s in symbols if s.endswith("USDT")]
         self.on_ob = on_ob
         self.on_trade = on_trade
         self.on_mark = on_mark
         self._stop = False
         self._last_msg = {}
+        # optional FrameRecorder for raw frames (see data_fetcher.recorder)
+        self.recorder = None
+        self._decode = decoder_for("binance")
 
     async def run(self):
         MAX_SYM_PER_CONN = 30
@@ -23,32 +28,46 @@ class BinanceWS:
         streams = []
         for s in symbols_chunk:
             streams += [f"{s}@depth20@100ms", f"{s}@aggTrade", f"{s}@markPrice@1s"]
-        url = "wss://fstream.binance.com/stream?streams=" + "/".join(streams)
+        url = f"{self.base_url}/stream?streams=" + "/".join(streams)
         backoff = 1
         while not self._stop:
             try:
                 async with websockets.connect(url, ping_interval=15, ping_timeout=10) as ws:
                     backoff = 1
                     async for msg in ws:
-                        data = json.loads(msg)
-                        p = data.get("data", {})
-                        st = p.get("e")
-                        sym = p.get("s", "").upper()
-                        ts = p.get("E", 0) / 1000.0 if p.get("E") else time.time()
-                        if st == "depthUpdate":
-                            self._last_msg[f"ob:{sym}"] = ts
-                            await self.on_ob("binance", sym, p)
-                        elif st == "aggTrade":
-                            self._last_msg[f"tr:{sym}"] = ts
-                            await self.on_trade("binance", sym, p)
-                        elif st == "markPriceUpdate":
-                            self._last_msg[f"mk:{sym}"] = ts
-                            await self.on_mark("binance", sym, p)
+                        if self.recorder is not None:
+                            self.recorder.record("binance", msg)
+                        await self._dispatch(msg)
             except Exception as e:
                 logger.warning(f"BinanceWS reconnect in {backoff}s: {e}")
                 await asyncio.sleep(backoff)
                 backoff = min(30, backoff * 2)
 
+    async def _dispatch(self, msg):
+        data = self._decode(msg)
+        if isinstance(data, Decoded):
+            self._last_msg[f"{data.kind}:{data.sym}"] = data.ts or time.time()
+            if data.kind == "ob":
+                await self.on_ob("binance", data.sym, data.msg)
+            elif data.kind == "tr":
+                await self.on_trade("binance", data.sym, data.msg)
+            else:
+                await self.on_mark("binance", data.sym, data.msg)
+            return
+        p = data.get("data", {})
+        st = p.get("e")
+        sym = p.get("s", "").upper()
+        ts = p.get("E", 0) / 1000.0 if p.get("E") else time.time()
+        if st == "depthUpdate":
+            self._last_msg[f"ob:{sym}"] = ts
+            await self.on_ob("binance", sym, p)
+        elif st == "aggTrade":
+            self._last_msg[f"tr:{sym}"] = ts
+            await self.on_trade("binance", sym, p)
+        elif st == "markPriceUpdate":
+            self._last_msg[f"mk:{sym}"] = ts
+            await self.on_mark("binance", sym, p)
+
     def stop(self):
         self._stop = True
 
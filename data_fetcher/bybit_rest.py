@@ -1,7 +1,7 @@
-from .rest_client import RESTClient
+from .rest_client import get_client
 
-async def oi(symbol: str):
-    rc = RESTClient("https://api.bybit.com")
-    data = await rc.get("/v5/market/open-interest", params={"category":"linear","symbol":symbol,"intervalTime":"5min"})
-    await rc.close()
-    return data
+BASE_URL = "https://api.bybit.com"
+
+async def tickers_all():
+    """Funding rate and open interest for every linear contract in one request."""
+    return await get_client(BASE_URL).get("/v5/market/tickers", params={"category":"linear"})
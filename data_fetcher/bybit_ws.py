@@ -1,48 +1,80 @@
 import asyncio, json, time
 import websockets
 from loguru import logger
+from .decoders import Decoded, decoder_for
 
 class BybitWS:
-    def __init__(self, symbols, on_ob, on_trade, on_liq):
+    def __init__(self, symbols, on_ob, on_trade, on_liq, url: str = "wss://stream.bybit.com/v5/public/linear"):
+        self.url = url
         self.symbols = [s.upper() for s in symbols if s.endswith("USDT")]
         self.on_ob = on_ob
         self.on_trade = on_trade
         self.on_liq = on_liq
         self._stop = False
         self._last_msg = {}
+        # optional FrameRecorder for raw frames (see data_fetcher.recorder)
+        self.recorder = None
+        self._ws = None
+        self._decode = decoder_for("bybit")
 
     async def run(self):
-        url = "wss://stream.bybit.com/v5/public/linear"
+        url = self.url
         backoff = 1
         while not self._stop:
             try:
                 async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                    self._ws = ws
                     for s in self.symbols:
                         await ws.send(json.dumps({"op":"subscribe","args":[f"orderbook.50.{s}", f"publicTrade.{s}", f"liquidation.{s}"]}))
                     backoff = 1
                     async for msg in ws:
-                        data = json.loads(msg)
-                        if data.get("op") == "pong":
-                            continue
-                        topic = data.get("topic", "")
-                        ts = data.get("ts", 0) / 1000.0 if data.get("ts") else time.time()
-                        if "orderbook" in topic:
-                            sym = topic.split(".")[-1].upper()
-                            self._last_msg[f"ob:{sym}"] = ts
-                            await self.on_ob("bybit", sym, data)
-                        elif "publicTrade" in topic:
-                            sym = topic.split(".")[-1].upper()
-                            self._last_msg[f"tr:{sym}"] = ts
-                            await self.on_trade("bybit", sym, data)
-                        elif "liquidation" in topic:
-                            sym = topic.split(".")[-1].upper()
-                            self._last_msg[f"liq:{sym}"] = ts
-                            await self.on_liq("bybit", sym, data)
+                        if self.recorder is not None:
+                            self.recorder.record("bybit", msg)
+                        await self._dispatch(msg)
             except Exception as e:
                 logger.warning(f"BybitWS reconnect in {backoff}s: {e}")
                 await asyncio.sleep(backoff)
                 backoff = min(30, backoff * 2)
 
+    async def _dispatch(self, msg):
+        data = self._decode(msg)
+        if isinstance(data, Decoded):
+            self._last_msg[f"{data.kind}:{data.sym}"] = data.ts or time.time()
+            if data.kind == "ob":
+                await self.on_ob("bybit", data.sym, data.msg)
+            else:
+                await self.on_trade("bybit", data.sym, data.msg)
+            return
+        if data.get("op") == "pong":
+            return
+        topic = data.get("topic", "")
+        ts = data.get("ts", 0) / 1000.0 if data.get("ts") else time.time()
+        if "orderbook" in topic:
+            sym = topic.split(".")[-1].upper()
+            self._last_msg[f"ob:{sym}"] = ts
+            await self.on_ob("bybit", sym, data)
+        elif "publicTrade" in topic:
+            sym = topic.split(".")[-1].upper()
+            self._last_msg[f"tr:{sym}"] = ts
+            await self.on_trade("bybit", sym, data)
+        elif "liquidation" in topic:
+            sym = topic.split(".")[-1].upper()
+            self._last_msg[f"liq:{sym}"] = ts
+            await self.on_liq("bybit", sym, data)
+
+    def request_resync(self, sym: str):
+        """Resubscribe the orderbook topic so Bybit pushes a fresh snapshot."""
+        if self._ws is not None:
+            asyncio.create_task(self._resubscribe(sym))
+
+    async def _resubscribe(self, sym: str):
+        topic = f"orderbook.50.{sym.upper()}"
+        try:
+            await self._ws.send(json.dumps({"op": "unsubscribe", "args": [topic]}))
+            await self._ws.send(json.dumps({"op": "subscribe", "args": [topic]}))
+        except Exception as e:
+            logger.debug(f"BybitWS resubscribe {topic} failed: {e}")
+
     def stop(self):
         self._stop = True
 
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class SystemClock:
+    """Wall-clock time; the default everywhere outside replay/backtests."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, sec: float):
+        await asyncio.sleep(sec)
+
+
+class SimClock:
+    """Simulated time advanced explicitly by a replayer.
+
+    time() returns the current simulated epoch seconds; sleep() advances
+    simulated time instead of waiting, yielding once to the event loop.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+        self._t0 = float(start)
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now - self._t0
+
+    def set(self, ts: float):
+        # never run backwards: out-of-order frames keep the latest time
+        if ts > self._now:
+            self._now = float(ts)
+
+    def advance(self, sec: float):
+        self._now += sec
+
+    async def sleep(self, sec: float):
+        self.advance(max(0.0, sec))
+        await asyncio.sleep(0)
+
+
+system_clock = SystemClock()
@@ -0,0 +1,225 @@
+"""Pluggable WS frame decoding.
+
+decoder_for(ex) returns a callable raw -> payload. With msgspec installed the
+hot message types (Binance depthUpdate/aggTrade/markPriceUpdate, Bybit
+orderbook/publicTrade, MEXC push.depth/push.deal) decode straight into typed
+structs with float levels and come back as a Decoded(kind, sym, ts, msg)
+carrying a DepthMsg/TradesMsg/MarkMsg. Every other frame, or all frames when
+msgspec is absent, goes through orjson or stdlib json and yields the usual
+dict. WS_DECODER=json|orjson|msgspec|auto picks the backend.
+"""
+import json
+import os
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+Level = Tuple[float, float]
+
+
+class DepthMsg(NamedTuple):
+    kind: str  # 'snapshot' | 'delta'
+    bids: List[Level]
+    asks: List[Level]
+    seq: Optional[int]
+    prev_seq: Optional[int]
+
+
+class TradesMsg(NamedTuple):
+    trades: List[Tuple[float, float, float, int]]  # (ts, price, qty, side)
+
+
+class MarkMsg(NamedTuple):
+    price: float
+
+
+# What WS callbacks may receive: a raw dict or a typed message
+PAYLOAD_TYPES = (dict, DepthMsg, TradesMsg, MarkMsg)
+
+
+class Decoded(NamedTuple):
+    kind: str  # 'ob' | 'tr' | 'mk'
+    sym: str
+    ts: float
+    msg: Union[DepthMsg, TradesMsg, MarkMsg]
+
+
+def _backend() -> str:
+    name = os.getenv("WS_DECODER", "auto").lower()
+    if name == "auto":
+        return "msgspec" if msgspec is not None else ("orjson" if orjson is not None else "json")
+    if name == "msgspec" and msgspec is None:
+        name = "orjson"
+    if name == "orjson" and orjson is None:
+        name = "json"
+    return name
+
+
+def json_loads() -> Callable[[Any], Any]:
+    if _backend() != "json" and orjson is not None:
+        return orjson.loads
+    return json.loads
+
+
+if msgspec is not None:
+    Struct = msgspec.Struct
+
+    # --- Binance combined stream: {"stream": ..., "data": {"e": <tag>, ...}} ---
+    class _BnDepth(Struct, tag_field="e", tag="depthUpdate"):
+        s: str
+        b: List[Level]
+        a: List[Level]
+        E: int = 0
+        u: Optional[int] = None
+        pu: Optional[int] = None
+
+    class _BnAggTrade(Struct, tag_field="e", tag="aggTrade"):
+        s: str
+        p: float
+        q: float
+        m: bool = False
+        E: int = 0
+        T: int = 0
+
+    class _BnMark(Struct, tag_field="e", tag="markPriceUpdate"):
+        s: str
+        p: float
+        E: int = 0
+
+    class _BnEnvelope(Struct):
+        data: Union[_BnDepth, _BnAggTrade, _BnMark]
+        stream: str = ""
+
+    # --- Bybit v5: {"topic": ..., "type": ..., "ts": ..., "data": ...} ---
+    class _ByEnvelope(Struct):
+        topic: str = ""
+        type: str = ""
+        ts: int = 0
+        data: msgspec.Raw = msgspec.Raw(b"null")
+
+    class _ByBook(Struct):
+        s: str = ""
+        b: List[Level] = []
+        a: List[Level] = []
+        u: Optional[int] = None
+
+    class _ByTrade(Struct):
+        p: float
+        v: float
+        S: str = "Buy"
+        T: int = 0
+
+    # --- MEXC contract: {"channel": ..., "symbol": ..., "ts": ..., "data": ...} ---
+    class _MxEnvelope(Struct):
+        channel: str = ""
+        symbol: str = ""
+        ts: int = 0
+        data: msgspec.Raw = msgspec.Raw(b"null")
+
+    class _MxDepth(Struct):
+        asks: List[List[float]] = []
+        bids: List[List[float]] = []
+        version: Optional[int] = None
+
+    class _MxDeal(Struct):
+        p: float
+        v: float
+        T: int = 1
+        t: int = 0
+
+
+class _TypedDecoder:
+    """Typed fast path for one venue; returns None when a frame isn't a known hot type."""
+
+    def __init__(self, ex: str):
+        self.ex = ex
+        d = lambda t: msgspec.json.Decoder(t, strict=False)
+        if ex == "binance":
+            self._env = d(_BnEnvelope)
+        elif ex == "bybit":
+            self._env = d(_ByEnvelope)
+            self._book = d(_ByBook)
+            self._trades = d(List[_ByTrade])
+        elif ex == "mexc":
+            self._env = d(_MxEnvelope)
+            self._depth = d(_MxDepth)
+            self._deals = d(Union[List[_MxDeal], _MxDeal])
+
+    def __call__(self, raw) -> Optional[Decoded]:
+        try:
+            env = self._env.decode(raw)
+        except msgspec.DecodeError:
+            return None
+        return getattr(self, f"_{self.ex}")(env)
+
+    def _binance(self, env) -> Optional[Decoded]:
+        p = env.data
+        ts = p.E / 1000.0
+        if isinstance(p, _BnDepth):
+            return Decoded("ob", p.s.upper(), ts, DepthMsg("snapshot", p.b, p.a, p.u, p.pu))
+        if isinstance(p, _BnAggTrade):
+            t = (p.T or p.E) / 1000.0
+            return Decoded("tr", p.s.upper(), ts, TradesMsg([(t, p.p, p.q, -1 if p.m else 1)]))
+        return Decoded("mk", p.s.upper(), ts, MarkMsg(p.p))
+
+    def _bybit(self, env) -> Optional[Decoded]:
+        topic = env.topic
+        ts = env.ts / 1000.0
+        try:
+            if topic.startswith("orderbook."):
+                bk = self._book.decode(env.data)
+                kind = "snapshot" if env.type == "snapshot" or bk.u == 1 else "delta"
+                prev = bk.u - 1 if (kind == "delta" and bk.u is not None) else None
+                return Decoded("ob", topic.split(".")[-1].upper(), ts, DepthMsg(kind, bk.b, bk.a, bk.u, prev))
+            if topic.startswith("publicTrade."):
+                trades = [((t.T or env.ts) / 1000.0, t.p, t.v, -1 if "sell" in t.S.lower() else 1)
+                          for t in self._trades.decode(env.data) if t.p > 0]
+                return Decoded("tr", topic.split(".")[-1].upper(), ts, TradesMsg(trades))
+        except msgspec.DecodeError:
+            return None
+        return None
+
+    def _mexc(self, env) -> Optional[Decoded]:
+        ch = env.channel
+        ts = env.ts / 1000.0
+        sym = env.symbol.replace("_USDT", "USDT").upper()
+        try:
+            if ch.startswith("push.depth"):
+                dp = self._depth.decode(env.data)
+                bids = [(lv[0], lv[1]) for lv in dp.bids if len(lv) >= 2]
+                asks = [(lv[0], lv[1]) for lv in dp.asks if len(lv) >= 2]
+                if "full" in ch:
+                    return Decoded("ob", sym, ts, DepthMsg("snapshot", bids, asks, dp.version, None))
+                prev = dp.version - 1 if dp.version is not None else None
+                return Decoded("ob", sym, ts, DepthMsg("delta", bids, asks, dp.version, prev))
+            if ch == "push.deal":
+                deals = self._deals.decode(env.data)
+                if not isinstance(deals, list):
+                    deals = [deals]
+                trades = [((d.t or env.ts) / 1000.0, d.p, d.v, -1 if d.T == 2 else 1) for d in deals if d.p > 0]
+                return Decoded("tr", sym, ts, TradesMsg(trades))
+        except msgspec.DecodeError:
+            return None
+        return None
+
+
+def decoder_for(ex: str) -> Callable[[Any], Any]:
+    """raw frame -> Decoded (typed fast path) or dict (generic)."""
+    loads = json_loads()
+    if _backend() != "msgspec" or ex not in ("binance", "bybit", "mexc"):
+        return loads
+    typed = _TypedDecoder(ex)
+
+    def decode(raw):
+        out = typed(raw)
+        return out if out is not None else loads(raw)
+
+    return decode
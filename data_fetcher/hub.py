@@ -1,35 +1,58 @@
 import asyncio
-import time
-from collections import defaultdict, deque
-from typing import Any, Deque, Dict, Tuple
+import os
+from collections import defaultdict
+from typing import Any, Dict, Tuple
 from loguru import logger
 from .symbols import load_symbols, universe_by_exchange
-from .binance_ws import BinanceWS
-from .bybit_ws import BybitWS
-from .mexc_ws import MEXCWS
-from .lbank_ws import LBankWS
-from . import binance_rest, bybit_rest, mexc_rest, lbank_rest
+from .orderbook import BookManager, DEPTH_BPS, book_top
+from .decoders import PAYLOAD_TYPES
+from .trades import TradeRing, normalize_mark, normalize_trades
+from .shards import ShardedIngest, make_clients
+from .clock import system_clock
+from .recorder import FrameRecorder
+from features.sweeps import SweepEstimator
 
 Event = Dict[str, Any]
 
 class DataHub:
-    def __init__(self):
+    def __init__(self, clock=None):
+        # time source for metric ages and unified timestamps; a SimClock under replay
+        self.clock = clock or system_clock
         self.allowed_symbols = set(load_symbols())
-        # Raw per-exchange latest snapshots (kept internal; not emitted)
-        self.orderbooks: Dict[Tuple[str, str], Any] = {}
-        self.trades: Dict[Tuple[str, str], Deque[Any]] = defaultdict(lambda: deque(maxlen=4000))
-        self.marks: Dict[Tuple[str, str], Any] = {}
-        self.funding_rates: Dict[Tuple[str, str], Tuple[float, float]] = {}
-        self.open_interest: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = defaultdict(lambda: deque(maxlen=2880))
-        # Per-exchange derived metrics cache per symbol
-        # metrics[(ex, canon_sym)] = { 'price': float|None, 'spread': float|None, 'bid_total': float|None, 'ask_total': float|None, 'ts': float }
-        self.metrics: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Local L2 books per (ex, sym), maintained from snapshots + deltas
+        self.books = BookManager(self.clock)
+        # Trades normalized once at ingest into array-backed rings per canonical symbol,
+        # with a streaming sweep estimator updated per trade
+        self.trades: Dict[str, TradeRing] = defaultdict(TradeRing)
+        self.sweeps: Dict[str, SweepEstimator] = defaultdict(SweepEstimator)
+        self.marks: Dict[Tuple[str, str], float] = {}
+        # Per-exchange derived metrics indexed by canonical symbol, so unified
+        # aggregation only touches the handful of exchanges quoting that symbol.
+        # metrics[canon_sym][ex] = { 'price', 'spread', 'bid_total', 'ask_total', 'ts', 'ladder',
+        #                            'funding', 'funding_ts', 'oi', 'oi_ts' }
+        self.metrics: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
         self.queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=10000)
+        # Coalesced unified emission: handlers only mark symbols dirty and the
+        # flush loop emits at most one snapshot per symbol per interval.
+        self.UNIFIED_FLUSH_MS = int(os.getenv("UNIFIED_FLUSH_MS", "250"))
+        self._dirty: set[str] = set()
+        self.unified_emitted = 0
+        self.unified_suppressed = 0
+        self.queue_dropped = 0
+        # INGEST_SHARDS=N>0 moves WS ingestion into N worker processes
+        self.INGEST_SHARDS = int(os.getenv("INGEST_SHARDS", "0"))
+        self.SHARD_FLUSH_MS = int(os.getenv("SHARD_FLUSH_MS", "20"))
+        self.ingest: ShardedIngest | None = None
+        # WS_RECORD_DIR records every raw WS frame and funding/OI update for later
+        # replay (data_fetcher.replay); ingest shards record their frames separately
+        self.RECORD_DIR = os.getenv("WS_RECORD_DIR", "")
+        self.recorder: FrameRecorder | None = None
         self._tasks = []
         self._ws_clients = []
+        # Per-exchange symbol universe, set by start(); funding/OI polling reads it
+        self.universe: Dict[str, list[str]] | None = None
         # Cache symbols that 4xx on Binance premiumIndex/OpenInterest to avoid repeated spam
         self._binance_skip: set[str] = set()
-        self._binance_idx: int = 0
         # Track symbols actually observed on Binance WS before querying REST
         self._binance_observed: set[str] = set()
 
@@ -44,13 +67,14 @@ class DataHub:
     def _validate_timestamp(self, ts: float) -> bool:
         if not ts or ts <= 0:
             return False
-        now = time.time()
+        now = self.clock.time()
         return abs(now - ts) < 300
 
     async def _emit(self, event: Event):
         try:
             self.queue.put_nowait(event)
         except asyncio.QueueFull:
+            self.queue_dropped += 1
             _ = await self.queue.get()
             await self.queue.put(event)
 
@@ -60,10 +84,70 @@ class DataHub:
             return None
         return sum(xs) / len(xs)
 
+    def _ex_metrics(self, ex: str, canon_sym: str) -> Dict[str, Any]:
+        per_sym = self.metrics[canon_sym]
+        m = per_sym.get(ex)
+        if m is None:
+            m = per_sym[ex] = {}
+        return m
+
+    def _set_funding(self, ex: str, sym: str, ts: float, rate: float):
+        m = self._ex_metrics(ex, self._canon(ex, sym))
+        m["funding"] = rate
+        m["funding_ts"] = ts
+        if self.recorder is not None:
+            self.recorder.record_update(ex, "funding", sym, ts, rate)
+
+    def _set_oi(self, ex: str, sym: str, ts: float, val: float):
+        m = self._ex_metrics(ex, self._canon(ex, sym))
+        m["oi"] = val
+        m["oi_ts"] = ts
+        if self.recorder is not None:
+            self.recorder.record_update(ex, "oi", sym, ts, val)
+
+    def _mark_dirty(self, canon_sym: str):
+        if canon_sym in self._dirty:
+            self.unified_suppressed += 1
+        else:
+            self._dirty.add(canon_sym)
+
+    async def flush_dirty(self):
+        """Emit one unified snapshot for every symbol touched since the last flush."""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for canon in dirty:
+            await self._emit_unified(canon)
+
+    def stats(self) -> dict:
+        return {
+            "emitted": self.unified_emitted,
+            "suppressed": self.unified_suppressed,
+            "dirty": len(self._dirty),
+            "queue": self.queue.qsize(),
+            "queue_dropped": self.queue_dropped,
+        }
+
+    def _ladder_avg(self, ladders: list) -> Dict[str, Any]:
+        """Average per-exchange ladder features; cumulative curves element-wise."""
+        if not ladders:
+            return {}
+        out: Dict[str, Any] = {"gap_above": self._avg([l["gap_above"] for l in ladders])}
+        for bps in DEPTH_BPS:
+            out[f"ask_{bps}bps"] = self._avg([l[f"ask_{bps}bps"] for l in ladders])
+            out[f"bid_{bps}bps"] = self._avg([l[f"bid_{bps}bps"] for l in ladders])
+        for side in ("ask_cum", "bid_cum"):
+            n = min(len(l[side]) for l in ladders)
+            out[side] = [sum(l[side][i] for l in ladders) / len(ladders) for i in range(n)]
+        return out
+
     async def _emit_unified(self, canon_sym: str):
         # Collect latest metrics for all exchanges for this symbol
-        now = time.time()
-        per_ex = [v for (ex, s), v in self.metrics.items() if s == canon_sym and (now - v.get('ts', 0)) <= 180]
+        per_sym = self.metrics.get(canon_sym)
+        if not per_sym:
+            return
+        now = self.clock.time()
+        per_ex = [m for m in per_sym.values() if (now - m.get('ts', 0)) <= 180]
         if not per_ex:
             return
         price = self._avg([m.get('price') for m in per_ex])
@@ -78,24 +162,25 @@ class DataHub:
             if bt is not None and at is not None and (bt + at) > 0:
                 imbs.append((at - bt) / (at + bt))
         imbalance = self._avg(imbs)
-        # funding average
+        ladders = [m['ladder'] for m in per_ex if m.get('ladder')]
+        # funding and oi averages (latest per ex, stored alongside the book metrics)
         fr_vals = []
-        for (ex, s), (ts, rate) in list(self.funding_rates.items()):
-            if s == canon_sym and (now - ts) <= 7200:
+        oi_vals = []
+        for m in per_sym.values():
+            rate = m.get('funding')
+            if rate is not None and (now - m.get('funding_ts', 0)) <= 7200:
                 fr_vals.append(rate)
+            val = m.get('oi')
+            if val is not None and (now - m.get('oi_ts', 0)) <= 7200:
+                oi_vals.append(val)
         funding = self._avg(fr_vals)
-        # oi average (take latest per ex)
-        oi_vals = []
-        for (ex, s), dq in list(self.open_interest.items()):
-            if s == canon_sym and dq:
-                ts, val = dq[-1]
-                if (now - ts) <= 7200:
-                    oi_vals.append(val)
         oi = self._avg(oi_vals)
         # volume not consistently extracted; skip if unavailable
         volume = None
         # mark: use price if no specific mark
         mark = price
+        est = self.sweeps.get(canon_sym)
+        sweep = est.value(now) if est is not None else 0.0
         unified = {
             "symbol": canon_sym,
             "price": float(price) if price is not None else None,
@@ -104,201 +189,131 @@ class DataHub:
             "oi": float(oi) if oi is not None else None,
             "spread": float(spread) if spread is not None else None,
             "volume": float(volume) if volume is not None else None,
+            "sweep_rejection": float(sweep),
             "depth": {
                 "bid_total": float(bid_total) if bid_total is not None else None,
                 "ask_total": float(ask_total) if ask_total is not None else None,
                 "imbalance": float(imbalance) if imbalance is not None else None,
+                **self._ladder_avg(ladders),
             },
             "timestamp": int(now),
         }
+        self.unified_emitted += 1
         await self._emit({"type": "unified", "data": unified})
 
     async def _on_ob(self, ex, sym, payload):
         if not self._validate_symbol(ex, sym):
             return
-        if not isinstance(payload, dict):
+        if not isinstance(payload, PAYLOAD_TYPES):
             return
-        key = (ex, sym)
-        self.orderbooks[key] = payload
-        # derive spread and depth totals
-        bids = []
-        asks = []
-        try:
-            if payload.get("e") == "depthUpdate":
-                for it in payload.get("b", []) or []:
-                    bids.append((float(it[0]), float(it[1])))
-                for it in payload.get("a", []) or []:
-                    asks.append((float(it[0]), float(it[1])))
-            else:
-                d = payload.get("data") or payload.get("depth") or payload.get("data", {})
-                bl = d.get("b") or d.get("bid") or d.get("bids") or []
-                al = d.get("a") or d.get("ask") or d.get("asks") or []
-                for it in bl:
-                    if isinstance(it, dict):
-                        bids.append((float(it.get("price")), float(it.get("size"))))
-                    else:
-                        bids.append((float(it[0]), float(it[1])))
-                for it in al:
-                    if isinstance(it, dict):
-                        asks.append((float(it.get("price")), float(it.get("size"))))
-                    else:
-                        asks.append((float(it[0]), float(it[1])))
-        except Exception:
-            pass
-        bid_total = sum(v for _, v in bids) if bids else None
-        ask_total = sum(v for _, v in asks) if asks else None
+        book = self.books.on_depth(ex, sym, payload)
+        if book is None:
+            return
+        self._apply_book(ex, sym, *book_top(book), book.ladder_stats())
+
+    async def _on_trade(self, ex, sym, payload):
+        if not self._validate_symbol(ex, sym):
+            return
+        if not isinstance(payload, PAYLOAD_TYPES):
+            return
+        self._apply_trades(ex, sym, normalize_trades(ex, payload, self.clock.time()))
+
+    async def _on_mark(self, ex, sym, payload):
+        if not self._validate_symbol(ex, sym):
+            return
+        if not isinstance(payload, PAYLOAD_TYPES):
+            return
+        self._apply_mark(ex, sym, normalize_mark(payload))
+
+    # --- normalized updates (shared by in-process WS handlers and ingest shards) ---
+    def _apply_book(self, ex, sym, best_bid, best_ask, bid_total, ask_total, ladder):
+        # derive spread and mid from the maintained book
         spread = None
-        try:
-            if bids and asks:
-                best_bid = max(bids, key=lambda x: x[0])[0]
-                best_ask = min(asks, key=lambda x: x[0])[0]
-                if best_ask >= best_bid and best_bid > 0 and best_ask > 0:
-                    spread = best_ask - best_bid
-                    price = (best_bid + best_ask) / 2.0
-                else:
-                    price = None
-            else:
-                price = None
-        except Exception:
-            price = None
+        price = None
+        if best_bid is not None and best_ask is not None:
+            if best_ask >= best_bid and best_bid > 0 and best_ask > 0:
+                spread = best_ask - best_bid
+                price = (best_bid + best_ask) / 2.0
         canon = self._canon(ex, sym)
-        self.metrics[(ex, canon)] = {
+        self._ex_metrics(ex, canon).update({
             "price": price,
             "spread": spread,
             "bid_total": bid_total,
             "ask_total": ask_total,
-            "ts": time.time(),
-        }
-        await self._emit_unified(canon)
+            "ladder": ladder,
+            "ts": self.clock.time(),
+        })
+        self._mark_dirty(canon)
 
-    async def _on_trade(self, ex, sym, payload):
-        if not self._validate_symbol(ex, sym):
-            return
-        if not isinstance(payload, dict):
-            return
-        key = (ex, sym)
-        self.trades[key].append(payload)
+    def _apply_trades(self, ex, sym, trades):
         if ex == "binance":
             self._binance_observed.add(sym)
-        # extract price if available
-        price = None
-        try:
-            if payload.get("e") == "aggTrade":
-                price = float(payload.get("p", 0) or 0)
-            elif payload.get("topic", "").startswith("publicTrade."):
-                arr = payload.get("data", [])
-                if arr:
-                    price = float(arr[-1].get("p", 0) or 0)
-            elif payload.get("method") in ("rs.deal", "push.deal"):
-                arr = payload.get("data", [])
-                if arr:
-                    price = float(arr[-1].get("p", 0) or 0)
-            elif payload.get("subscribe") == "trade.update":
-                arr = payload.get("trades", [])
-                if arr:
-                    price = float(arr[-1].get("price", 0) or 0)
-        except Exception:
-            price = None
         canon = self._canon(ex, sym)
-        if price and price > 0:
-            prev = self.metrics.get((ex, canon), {})
-            prev.update({"price": float(price), "ts": time.time()})
-            self.metrics[(ex, canon)] = prev
-        await self._emit_unified(canon)
+        if trades:
+            ring = self.trades[canon]
+            est = self.sweeps[canon]
+            for ts, price, qty, side in trades:
+                ring.append(ts, price, qty, side)
+                est.update(ts, qty, side)
+            self._ex_metrics(ex, canon).update({"price": trades[-1][1], "ts": self.clock.time()})
+        self._mark_dirty(canon)
 
-    async def _on_mark(self, ex, sym, payload):
-        if not self._validate_symbol(ex, sym):
-            return
-        if not isinstance(payload, dict):
-            return
-        key = (ex, sym)
-        self.marks[key] = payload
+    def _apply_mark(self, ex, sym, price):
         if ex == "binance":
             self._binance_observed.add(sym)
-        # extract mark/price
-        price = None
-        try:
-            price = payload.get("p") or payload.get("markPrice") or payload.get("price") or payload.get("last") or payload.get("c")
-            if isinstance(price, str):
-                price = float(price)
-        except Exception:
-            price = None
         canon = self._canon(ex, sym)
-        if price and price > 0:
-            prev = self.metrics.get((ex, canon), {})
-            prev.update({"price": float(price), "ts": time.time()})
-            self.metrics[(ex, canon)] = prev
-        await self._emit_unified(canon)
+        if price:
+            self.marks[(ex, sym)] = price
+            self._ex_metrics(ex, canon).update({"price": price, "ts": self.clock.time()})
+        self._mark_dirty(canon)
 
-    async def _funding_oi_loop(self, uni: Dict[str, list[str]]):
+    def apply_records(self, batch):
+        """Apply a batch of normalized records from an ingest shard (see data_fetcher.shards)."""
+        for rec in batch:
+            kind, ex, sym = rec[0], rec[1], rec[2]
+            if not self._validate_symbol(ex, sym):
+                continue
+            if kind == "ob":
+                self._apply_book(ex, sym, *rec[3:])
+            elif kind == "tr":
+                self._apply_trades(ex, sym, rec[3])
+            elif kind == "mk":
+                self._apply_mark(ex, sym, rec[3])
+
+    async def _unified_flush_loop(self):
+        interval = max(0.01, self.UNIFIED_FLUSH_MS / 1000.0)
         while True:
+            await asyncio.sleep(interval)
             try:
-                ts = time.time()
-                # Only query Binance REST for symbols we have actually seen on WS
-                observed = sorted(self._binance_observed)
-                bin_syms = observed if observed else []
-                # process a limited window per cycle to avoid flooding
-                if bin_syms:
-                    start = self._binance_idx
-                    end = min(len(bin_syms), start + 50)
-                    window = bin_syms[start:end]
-                    self._binance_idx = 0 if end >= len(bin_syms) else end
-                else:
-                    window = []
-                for sym in window:
-                    if sym in self._binance_skip:
-                        continue
-                    try:
-                        fund, oi = await binance_rest.funding_oi(sym)
-                        rate = float(fund.get("lastFundingRate", 0) or 0)
-                        self.funding_rates[("binance", sym)] = (ts, rate)
-                        if isinstance(oi, list) and oi:
-                            last = oi[-1]
-                            val = float(last.get("sumOpenInterestValue") or last.get("sumOpenInterest", 0) or 0)
-                            self.open_interest[("binance", sym)].append((ts, val))
-                        await self._emit_unified(sym)
-                    except Exception as e:
-                        logger.debug(f"binance funding/oi for {sym} failed: {e}")
-                        # On repeated 4xx, skip further attempts this session
-                        self._binance_skip.add(sym)
-                for sym in uni.get("bybit", []):
-                    try:
-                        data = await bybit_rest.oi(sym)
-                        lst = data.get("result", {}).get("list", [])
-                        if lst:
-                            last = lst[-1]
-                            val = float(last.get("openInterest", 0))
-                            self.open_interest[("bybit", sym)].append((ts, val))
-                        await self._emit_unified(sym)
-                    except Exception as e:
-                        logger.debug(f"bybit oi for {sym} failed: {e}")
-                for sym in uni.get("mexc", []):
-                    try:
-                        data = await mexc_rest.funding(sym)
-                        rate = float(data.get("data", {}).get("lastFundingRate", 0)) if isinstance(data.get("data"), dict) else 0.0
-                        self.funding_rates[("mexc", sym)] = (ts, rate)
-                        await self._emit_unified(sym)
-                    except Exception as e:
-                        logger.debug(f"mexc funding for {sym} failed: {e}")
-                for sym in uni.get("lbank", []):
-                    try:
-                        data = await lbank_rest.funding(sym)
-                        rate = 0.0
-                        if isinstance(data, dict) and data.get("result", False):
-                            arr = data.get("data") or []
-                            if arr:
-                                rate = float(arr[-1].get("rate", 0))
-                        self.funding_rates[("lbank", sym)] = (ts, rate)
-                        await self._emit_unified(sym)
-                    except Exception as e:
-                        logger.debug(f"lbank funding for {sym} failed: {e}")
+                await self.flush_dirty()
             except Exception as e:
-                logger.warning(f"Funding/OI loop error: {e}")
-            await asyncio.sleep(60)
+                logger.warning(f"Unified flush error: {e}")
 
     async def _staleness_check_loop(self):
         while True:
             await asyncio.sleep(60)
+            st = self.stats()
+            # in sharded mode the books live in the workers
+            bk = self.ingest.book_stats() if self.ingest is not None else self.books.stats()
+            logger.info(
+                f"Unified emitter: emitted={st['emitted']} suppressed={st['suppressed']} "
+                f"queue={st['queue']} dropped={st['queue_dropped']} | "
+                f"books={bk['books']} synced={bk['synced']} gaps={bk['gaps']} resyncs={bk['resyncs']}"
+            )
+            if self.recorder is not None:
+                rs = self.recorder.stats()
+                logger.info(
+                    f"WS recorder: frames={rs['frames']} bytes={rs['bytes']} segments={rs['segments']} "
+                    f"backlog={rs['backlog']} dropped={rs['dropped']} errors={rs['errors']}"
+                )
+            if self.ingest is not None:
+                ig = self.ingest.stats()
+                logger.info(
+                    f"Sharded ingest: alive={ig['alive']}/{ig['shards']} batches={ig['batches']} "
+                    f"records={ig['records']} bytes={ig['bytes']} restarts={ig['restarts']}"
+                )
+                for name, stale in self.ingest.stale().items():
+                    logger.warning(f"{name} stale streams: {stale}")
             for ws in self._ws_clients:
                 if hasattr(ws, "staleness_check"):
                     stale = ws.staleness_check()
@@ -310,24 +325,20 @@ class DataHub:
         if not any(len(v) for v in uni.values()):
             logger.warning("Empty universe; using fallback")
             uni = {"binance": ["BTCUSDT"], "bybit": ["BTCUSDT"], "mexc": ["BTCUSDT"], "lbank": ["btc_usdt"]}
+        self.universe = uni
+        if self.RECORD_DIR:
+            self.recorder = FrameRecorder(self.RECORD_DIR, prefix="hub")
         tasks = []
-        if uni.get("binance"):
-            ws_b = BinanceWS(uni["binance"], self._on_ob, self._on_trade, self._on_mark)
-            self._ws_clients.append(ws_b)
-            tasks.append(asyncio.create_task(ws_b.run()))
-        if uni.get("bybit"):
-            ws_y = BybitWS(uni["bybit"], self._on_ob, self._on_trade, self._on_trade)
-            self._ws_clients.append(ws_y)
-            tasks.append(asyncio.create_task(ws_y.run()))
-        if uni.get("mexc"):
-            ws_m = MEXCWS(uni["mexc"], self._on_ob, self._on_trade, self._on_mark)
-            self._ws_clients.append(ws_m)
-            tasks.append(asyncio.create_task(ws_m.run()))
-        if uni.get("lbank"):
-            ws_l = LBankWS(uni["lbank"], self._on_ob, self._on_trade)
-            self._ws_clients.append(ws_l)
-            tasks.append(asyncio.create_task(ws_l.run()))
-        tasks.append(asyncio.create_task(self._funding_oi_loop(uni)))
+        if self.INGEST_SHARDS > 0:
+            # WS clients, decoding and books run in worker processes
+            self.ingest = ShardedIngest(self, self.INGEST_SHARDS, flush_ms=self.SHARD_FLUSH_MS,
+                                        record_dir=self.RECORD_DIR or None)
+            tasks.append(asyncio.create_task(self.ingest.run(uni)))
+        else:
+            self._ws_clients = make_clients(uni, self._on_ob, self._on_trade, self._on_mark, self.books,
+                                            recorder=self.recorder)
+            tasks.extend(asyncio.create_task(ws.run()) for ws in self._ws_clients)
+        tasks.append(asyncio.create_task(self._unified_flush_loop()))
         tasks.append(asyncio.create_task(self._staleness_check_loop()))
         self._tasks = tasks
         # Don't await tasks here - let orchestrator manage them
@@ -1,7 +1,6 @@
-from .rest_client import RESTClient
+from .rest_client import get_client
+
+BASE_URL = "https://api.lbkex.com"
 
 async def funding(symbol: str):
-    rc = RESTClient("https://api.lbkex.com")
-    data = await rc.get("/v2/funding_rate.do", params={"symbol": symbol})
-    await rc.close()
-    return data
+    return await get_client(BASE_URL).get("/v2/funding_rate.do", params={"symbol": symbol})
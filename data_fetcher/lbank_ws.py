@@ -1,23 +1,28 @@
 import asyncio, json, time
 import websockets
 from loguru import logger
+from .decoders import json_loads
 
 class LBankWS:
-    def __init__(self, symbols, on_ob, on_trade):
+    def __init__(self, symbols, on_ob, on_trade, endpoints=None):
+        # Try common LBank WS endpoints
+        self.endpoints = list(endpoints) if endpoints else [
+            "wss://www.lbkex.net/ws/V3/",
+            "wss://www.lbkex.net/ws/V3",
+            "wss://www.lbkex.net/ws/V2/",
+            "wss://www.lbank.com/ws/V3/",
+        ]
         self.symbols = [s.lower() for s in symbols]
         self.on_ob = on_ob
         self.on_trade = on_trade
         self._stop = False
         self._last_msg = {}
+        # optional FrameRecorder for raw frames (see data_fetcher.recorder)
+        self.recorder = None
+        self._decode = json_loads()
 
     async def run(self):
-        # Try common LBank WS endpoints
-        endpoints = [
-            "wss://www.lbkex.net/ws/V3/",
-            "wss://www.lbkex.net/ws/V3",
-            "wss://www.lbkex.net/ws/V2/",
-            "wss://www.lbank.com/ws/V3/",
-        ]
+        endpoints = self.endpoints
         backoff = 1
         while not self._stop:
             try:
@@ -60,25 +65,30 @@ class LBankWS:
                             pass
                     backoff = 1
                     async for msg in ws:
-                        d = json.loads(msg)
-                        sub = d.get("subscribe") or d.get("type") or ""
-                        pair = (d.get("pair") or d.get("symbol") or "").lower()
-                        ts_raw = d.get("TS")
-                        try:
-                            ts = float(ts_raw) / 1000.0 if ts_raw is not None else time.time()
-                        except Exception:
-                            ts = time.time()
-                        if sub in ("depth.depth20", "depth", "depth.update"):
-                            self._last_msg[f"ob:{pair}"] = ts
-                            await self.on_ob("lbank", pair, d)
-                        elif sub in ("trade.update", "trade"):
-                            self._last_msg[f"tr:{pair}"] = ts
-                            await self.on_trade("lbank", pair, d)
+                        if self.recorder is not None:
+                            self.recorder.record("lbank", msg)
+                        await self._dispatch(msg)
             except Exception as e:
                 logger.warning(f"LBankWS reconnect in {backoff}s: {e}")
                 await asyncio.sleep(backoff)
                 backoff = min(30, backoff * 2)
 
+    async def _dispatch(self, msg):
+        d = self._decode(msg)
+        sub = d.get("subscribe") or d.get("type") or ""
+        pair = (d.get("pair") or d.get("symbol") or "").lower()
+        ts_raw = d.get("TS")
+        try:
+            ts = float(ts_raw) / 1000.0 if ts_raw is not None else time.time()
+        except Exception:
+            ts = time.time()
+        if sub in ("depth.depth20", "depth", "depth.update"):
+            self._last_msg[f"ob:{pair}"] = ts
+            await self.on_ob("lbank", pair, d)
+        elif sub in ("trade.update", "trade"):
+            self._last_msg[f"tr:{pair}"] = ts
+            await self.on_trade("lbank", pair, d)
+
     def stop(self):
         self._stop = True
 
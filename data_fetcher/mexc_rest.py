@@ -1,7 +1,7 @@
-from .rest_client import RESTClient
+from .rest_client import get_client
 
-async def funding(symbol: str):
-    rc = RESTClient("https://contract.mexc.com")
-    data = await rc.get("/api/v1/contract/funding/prevFundingRate", params={"symbol": symbol})
-    await rc.close()
-    return data
+BASE_URL = "https://contract.mexc.com"
+
+async def tickers_all():
+    """Ticker (incl. current fundingRate) for every contract in one request."""
+    return await get_client(BASE_URL).get("/api/v1/contract/ticker")
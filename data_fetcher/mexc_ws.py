@@ -1,21 +1,26 @@
 import asyncio, json, time
 import websockets
 from loguru import logger
+from .decoders import Decoded, decoder_for
 
 class MEXCWS:
-    def __init__(self, symbols, on_ob, on_trade, on_mark):
+    def __init__(self, symbols, on_ob, on_trade, on_mark, endpoints=None):
+        self.endpoints = list(endpoints) if endpoints else [
+            "wss://contract.mexc.com/ws",
+            "wss://contract.mexc.com/edge",
+        ]
         self.symbols = [s.upper() for s in symbols if s.endswith("USDT")]
         self.on_ob = on_ob
         self.on_trade = on_trade
         self.on_mark = on_mark
         self._stop = False
         self._last_msg = {}
+        # optional FrameRecorder for raw frames (see data_fetcher.recorder)
+        self.recorder = None
+        self._decode = decoder_for("mexc")
 
     async def run(self):
-        endpoints = [
-            "wss://contract.mexc.com/ws",
-            "wss://contract.mexc.com/edge",
-        ]
+        endpoints = self.endpoints
         backoff = 1
         while not self._stop:
             try:
@@ -37,29 +42,41 @@ class MEXCWS:
                     for s in self.symbols:
                         sym_lower = s.replace("USDT", "_USDT")
                         await ws.send(json.dumps({"method":"sub.deal","param":{"symbol":sym_lower}}))
-                        await ws.send(json.dumps({"method":"sub.depth","param":{"symbol":sym_lower}}))
+                        await ws.send(json.dumps({"method":"sub.depth.full","param":{"symbol":sym_lower,"limit":20}}))
                         await ws.send(json.dumps({"method":"sub.ticker","param":{"symbol":sym_lower}}))
                     backoff = 1
                     async for msg in ws:
-                        data = json.loads(msg)
-                        method = data.get("method", "")
-                        ch = data.get("channel", "")
-                        ts = data.get("ts", 0) / 1000.0 if data.get("ts") else time.time()
-                        sym_raw = (data.get("symbol") or "").replace("_USDT", "USDT").upper()
-                        if "deal" in method or "deal" in ch:
-                            self._last_msg[f"tr:{sym_raw}"] = ts
-                            await self.on_trade("mexc", sym_raw, data)
-                        elif "depth" in method or "depth" in ch:
-                            self._last_msg[f"ob:{sym_raw}"] = ts
-                            await self.on_ob("mexc", sym_raw, data)
-                        elif "ticker" in method or "ticker" in ch:
-                            self._last_msg[f"mk:{sym_raw}"] = ts
-                            await self.on_mark("mexc", sym_raw, data)
+                        if self.recorder is not None:
+                            self.recorder.record("mexc", msg)
+                        await self._dispatch(msg)
             except Exception as e:
                 logger.warning(f"MEXCWS reconnect in {backoff}s: {e}")
                 await asyncio.sleep(backoff)
                 backoff = min(30, backoff * 2)
 
+    async def _dispatch(self, msg):
+        data = self._decode(msg)
+        if isinstance(data, Decoded):
+            self._last_msg[f"{data.kind}:{data.sym}"] = data.ts or time.time()
+            if data.kind == "ob":
+                await self.on_ob("mexc", data.sym, data.msg)
+            else:
+                await self.on_trade("mexc", data.sym, data.msg)
+            return
+        method = data.get("method", "")
+        ch = data.get("channel", "")
+        ts = data.get("ts", 0) / 1000.0 if data.get("ts") else time.time()
+        sym_raw = (data.get("symbol") or "").replace("_USDT", "USDT").upper()
+        if "deal" in method or "deal" in ch:
+            self._last_msg[f"tr:{sym_raw}"] = ts
+            await self.on_trade("mexc", sym_raw, data)
+        elif "depth" in method or "depth" in ch:
+            self._last_msg[f"ob:{sym_raw}"] = ts
+            await self.on_ob("mexc", sym_raw, data)
+        elif "ticker" in method or "ticker" in ch:
+            self._last_msg[f"mk:{sym_raw}"] = ts
+            await self.on_mark("mexc", sym_raw, data)
+
     def stop(self):
         self._stop = True
 
@@ -0,0 +1,269 @@
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from operator import truediv
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from .decoders import DepthMsg
+from .clock import system_clock
+
+Level = Tuple[float, float]
+
+# Levels retained per venue; matches the depth each WS client subscribes to
+DEPTH_LEVELS = {"binance": 20, "bybit": 50, "mexc": 20, "lbank": 20}
+# Ladder features: top-N levels, depth bands around mid (bps), cumulative-size checkpoints
+LADDER_N = 20
+DEPTH_BPS = (10, 25, 50)
+CUM_LEVELS = (1, 5, 10, 20)
+
+
+class OrderBook:
+    """L2 book for one (exchange, symbol) with sorted, array-backed levels.
+
+    Both sides are stored ascending by key (ask price, negated bid price) so
+    the best level is always index 0. Best bid/ask and side totals are O(1);
+    level updates are a bisect plus an array insert/delete.
+    """
+
+    __slots__ = ("max_levels", "_bk", "_bs", "_ak", "_as", "bid_total", "ask_total",
+                 "seq", "synced", "ts", "updates", "gaps", "last_resync")
+
+    def __init__(self, max_levels: int = 50):
+        self.max_levels = max_levels
+        self.seq: Optional[int] = None
+        self.synced = False
+        self.ts = 0.0
+        self.updates = 0
+        self.gaps = 0
+        self.last_resync = 0.0
+        self.clear()
+
+    def clear(self):
+        self._bk = array("d")
+        self._bs = array("d")
+        self._ak = array("d")
+        self._as = array("d")
+        self.bid_total = 0.0
+        self.ask_total = 0.0
+
+    def _load(self, levels: List[Level], sign: float) -> Tuple[array, array]:
+        lv = sorted((sign * p, s) for p, s in levels if s > 0 and p > 0)[: self.max_levels]
+        return array("d", (k for k, _ in lv)), array("d", (s for _, s in lv))
+
+    def apply_snapshot(self, bids: List[Level], asks: List[Level], seq: Optional[int] = None, ts: Optional[float] = None):
+        self._bk, self._bs = self._load(bids, -1.0)
+        self._ak, self._as = self._load(asks, 1.0)
+        self.bid_total = sum(self._bs)
+        self.ask_total = sum(self._as)
+        self.seq = seq
+        self.synced = True
+        self.ts = ts if ts is not None else time.time()
+        self.updates += 1
+
+    def apply_delta(self, bids: List[Level], asks: List[Level], seq: Optional[int] = None,
+                    prev_seq: Optional[int] = None, ts: Optional[float] = None) -> bool:
+        """Apply incremental levels (size 0 deletes). Returns False if the book needs a resync."""
+        if not self.synced:
+            return False
+        if prev_seq is not None and self.seq is not None and prev_seq != self.seq:
+            if seq is not None and seq <= self.seq:
+                # stale replay of an update already covered by the snapshot
+                return True
+            self.gaps += 1
+            self.synced = False
+            return False
+        for p, s in bids:
+            self.bid_total += self._set(self._bk, self._bs, -p, s)
+        for p, s in asks:
+            self.ask_total += self._set(self._ak, self._as, p, s)
+        if seq is not None:
+            self.seq = seq
+        self.ts = ts if ts is not None else time.time()
+        self.updates += 1
+        return True
+
+    def _set(self, keys: array, sizes: array, key: float, size: float) -> float:
+        """Upsert one level and return the change in side total."""
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            old = sizes[i]
+            if size > 0:
+                sizes[i] = size
+                return size - old
+            del keys[i]
+            del sizes[i]
+            return -old
+        if size <= 0 or i >= self.max_levels:
+            return 0.0
+        keys.insert(i, key)
+        sizes.insert(i, size)
+        if len(keys) > self.max_levels:
+            keys.pop()
+            return size - sizes.pop()
+        return size
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return -self._bk[0] if self._bk else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self._ak[0] if self._ak else None
+
+    def bids(self, n: Optional[int] = None) -> List[Level]:
+        n = len(self._bk) if n is None else min(n, len(self._bk))
+        return [(-self._bk[i], self._bs[i]) for i in range(n)]
+
+    def asks(self, n: Optional[int] = None) -> List[Level]:
+        n = len(self._ak) if n is None else min(n, len(self._ak))
+        return [(self._ak[i], self._as[i]) for i in range(n)]
+
+    def __len__(self) -> int:
+        return len(self._bk) + len(self._ak)
+
+    def ladder_stats(self, n: int = LADDER_N) -> Optional[Dict[str, Any]]:
+        """Gap-above, depth within DEPTH_BPS of mid and cumulative sizes over the top-n levels.
+
+        Uses prefix sums plus a bisect per band on the sorted arrays, so the
+        per-update cost is a few C-level passes over at most n levels.
+        """
+        na = min(n, len(self._ak))
+        nb = min(n, len(self._bk))
+        if not na or not nb:
+            return None
+        a_px = self._ak[:na]
+        b_px = self._bk[:nb]
+        mid = (a_px[0] - b_px[0]) / 2.0
+        if mid <= 0:
+            return None
+        a_cum = list(accumulate(self._as[:na]))
+        b_cum = list(accumulate(self._bs[:nb]))
+        out: Dict[str, Any] = {
+            "gap_above": max(0.0, max(map(truediv, a_px[1:], a_px), default=1.0) - 1.0),
+        }
+        for bps in DEPTH_BPS:
+            j = bisect_right(a_px, mid * (1.0 + bps / 1e4))
+            out[f"ask_{bps}bps"] = a_cum[j - 1] if j else 0.0
+            j = bisect_right(b_px, -mid * (1.0 - bps / 1e4))
+            out[f"bid_{bps}bps"] = b_cum[j - 1] if j else 0.0
+        out["ask_cum"] = [a_cum[k - 1] for k in CUM_LEVELS if k <= na]
+        out["bid_cum"] = [b_cum[k - 1] for k in CUM_LEVELS if k <= nb]
+        return out
+
+
+def book_top(book: OrderBook) -> Tuple[Optional[float], Optional[float], Optional[float], Optional[float]]:
+    """(best_bid, best_ask, bid_total, ask_total); totals are None for an empty side."""
+    best_bid = book.best_bid
+    best_ask = book.best_ask
+    return (best_bid, best_ask,
+            book.bid_total if best_bid is not None else None,
+            book.ask_total if best_ask is not None else None)
+
+
+def _levels(raw) -> List[Level]:
+    out: List[Level] = []
+    for it in raw or []:
+        try:
+            if isinstance(it, dict):
+                out.append((float(it.get("price")), float(it.get("size") or it.get("vol") or 0)))
+            else:
+                out.append((float(it[0]), float(it[1])))
+        except Exception:
+            continue
+    return out
+
+
+def parse_depth(ex: str, payload: Dict[str, Any]):
+    """Normalize a venue depth payload to (kind, bids, asks, seq, prev_seq) or None.
+
+    kind is 'snapshot' (replace the book) or 'delta' (apply on top of it).
+    A DepthMsg from the typed decoder is already in this form.
+    """
+    if isinstance(payload, DepthMsg):
+        return payload
+    if ex == "binance":
+        # depth20@100ms partial streams carry the full top-20 each time; pu/u still chain
+        if payload.get("e") != "depthUpdate":
+            return None
+        return "snapshot", _levels(payload.get("b")), _levels(payload.get("a")), payload.get("u"), payload.get("pu")
+    if ex == "bybit":
+        data = payload.get("data") or {}
+        u = data.get("u")
+        kind = "snapshot" if payload.get("type") == "snapshot" or u == 1 else "delta"
+        prev = u - 1 if (kind == "delta" and isinstance(u, int)) else None
+        return kind, _levels(data.get("b") or data.get("bid")), _levels(data.get("a") or data.get("ask")), u, prev
+    if ex == "mexc":
+        d = payload.get("data") or {}
+        ver = d.get("version")
+        if "full" in (payload.get("channel") or payload.get("method") or ""):
+            return "snapshot", _levels(d.get("bids")), _levels(d.get("asks")), ver, None
+        prev = ver - 1 if isinstance(ver, int) else None
+        return "delta", _levels(d.get("bids")), _levels(d.get("asks")), ver, prev
+    if ex == "lbank":
+        d = payload.get("depth") or payload.get("data") or {}
+        return "snapshot", _levels(d.get("bids")), _levels(d.get("asks")), None, None
+    return None
+
+
+class BookManager:
+    """Owns every (exchange, symbol) book, applies payloads and triggers resyncs on gaps."""
+
+    RESYNC_COOLDOWN_SEC = 5.0
+
+    def __init__(self, clock=None):
+        self.clock = clock or system_clock
+        self.books: Dict[Tuple[str, str], OrderBook] = {}
+        self._resync: Dict[str, Callable[[str], None]] = {}
+        self.resyncs = 0
+
+    def set_resync(self, ex: str, cb: Callable[[str], None]):
+        self._resync[ex] = cb
+
+    def get(self, ex: str, sym: str) -> Optional[OrderBook]:
+        return self.books.get((ex, sym))
+
+    def on_depth(self, ex: str, sym: str, payload: Dict[str, Any]) -> Optional[OrderBook]:
+        """Apply a raw depth payload; returns the book if it is in sync afterwards."""
+        parsed = parse_depth(ex, payload)
+        if parsed is None:
+            return None
+        kind, bids, asks, seq, prev_seq = parsed
+        key = (ex, sym)
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = OrderBook(DEPTH_LEVELS.get(ex, 50))
+        if kind == "snapshot":
+            if prev_seq is not None and book.seq is not None and prev_seq != book.seq:
+                book.gaps += 1
+            book.apply_snapshot(bids, asks, seq, self.clock.time())
+            return book
+        if book.apply_delta(bids, asks, seq, prev_seq, self.clock.time()):
+            return book
+        self._request_resync(ex, sym, book)
+        return None
+
+    def _request_resync(self, ex: str, sym: str, book: OrderBook):
+        now = self.clock.time()
+        if now - book.last_resync < self.RESYNC_COOLDOWN_SEC:
+            return
+        book.last_resync = now
+        book.synced = False
+        book.clear()
+        cb = self._resync.get(ex)
+        if cb is None:
+            return
+        self.resyncs += 1
+        logger.debug(f"Order book gap on {ex}:{sym} (gaps={book.gaps}); resyncing")
+        try:
+            cb(sym)
+        except Exception as e:
+            logger.debug(f"Resync request for {ex}:{sym} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "books": len(self.books),
+            "synced": sum(1 for b in self.books.values() if b.synced),
+            "gaps": sum(b.gaps for b in self.books.values()),
+            "resyncs": self.resyncs,
+        }
@@ -0,0 +1,159 @@
+import glob
+import gzip
+import heapq
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+from loguru import logger
+
+# Segment layout: MAGIC, then records of
+#   <recv_ts: float64> <source: uint8> <length: uint32> <payload bytes>
+# inside one gzip stream per segment file. Writers sync-flush the stream on
+# every batch, so a crashed or still-open segment reads back up to its last
+# flush. Source is the exchange index for raw WS frames, or REST_FLAG|index
+# for hub state updates from REST polling, whose payload is the JSON list
+# [field, sym, ts, value].
+MAGIC = b"SGWSREC1"
+_HDR = struct.Struct("<dBI")
+EXCHANGES = ("binance", "bybit", "mexc", "lbank")
+_EX_CODE = {ex: i for i, ex in enumerate(EXCHANGES)}
+REST_FLAG = 0x80
+
+Frame = Tuple[float, str, bytes]  # (recv_ts, ex, raw); ex is "<ex>/rest" for REST updates
+
+
+class FrameRecorder:
+    """Append-only recorder of raw WS frames (and REST-sourced hub updates) with receive timestamps.
+
+    record() only appends to a bounded buffer; a writer thread compresses
+    batches into gzip segment files `<prefix>-<start_ms>.seg.gz` under `root`,
+    rotating by uncompressed size or age.
+    """
+
+    def __init__(self, root: str, prefix: str = "ws", flush_ms: int = 500,
+                 segment_mb: int = 256, segment_sec: int = 3600, buffer_frames: int = 200000):
+        self.root = root
+        self.prefix = prefix
+        self.flush_ms = flush_ms
+        self.segment_bytes = segment_mb * 1024 * 1024
+        self.segment_sec = segment_sec
+        os.makedirs(root, exist_ok=True)
+        self._buf: deque = deque(maxlen=buffer_frames)
+        self._stop = threading.Event()
+        self._gz: Optional[gzip.GzipFile] = None
+        self._seg_path: Optional[str] = None
+        self._seg_bytes = 0
+        self._seg_start = 0.0
+        self._stats = {"frames": 0, "bytes": 0, "segments": 0, "dropped": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._writer_loop, name=f"ws-recorder-{prefix}", daemon=True)
+        self._thread.start()
+
+    def record(self, ex: str, raw):
+        if len(self._buf) == self._buf.maxlen:
+            self._stats["dropped"] += 1
+        self._buf.append((time.time(), _EX_CODE.get(ex, 0x7F), raw))
+
+    def record_update(self, ex: str, field: str, sym: str, ts: float, value: float):
+        """Record a REST-sourced hub update (funding/oi) so replays see the same state."""
+        if len(self._buf) == self._buf.maxlen:
+            self._stats["dropped"] += 1
+        self._buf.append((time.time(), REST_FLAG | _EX_CODE.get(ex, 0x7F), json.dumps([field, sym, ts, value])))
+
+    def _open_segment(self, ts: float):
+        self._close_segment()
+        self._seg_path = os.path.join(self.root, f"{self.prefix}-{int(ts * 1000)}.seg.gz")
+        self._gz = gzip.open(self._seg_path, "wb", compresslevel=6)
+        self._gz.write(MAGIC)
+        self._seg_bytes = 0
+        self._seg_start = ts
+        self._stats["segments"] += 1
+
+    def _close_segment(self):
+        if self._gz is not None:
+            self._gz.close()
+            self._gz = None
+
+    def _write_batch(self):
+        buf = self._buf
+        if not buf:
+            return
+        parts = []
+        first_ts = buf[0][0]
+        n = 0
+        while buf:
+            ts, code, raw = buf.popleft()
+            if isinstance(raw, str):
+                raw = raw.encode()
+            parts.append(_HDR.pack(ts, code, len(raw)))
+            parts.append(raw)
+            n += 1
+        chunk = b"".join(parts)
+        if (self._gz is None or self._seg_bytes >= self.segment_bytes
+                or first_ts - self._seg_start >= self.segment_sec):
+            self._open_segment(first_ts)
+        self._gz.write(chunk)
+        self._gz.flush(zlib.Z_SYNC_FLUSH)
+        self._seg_bytes += len(chunk)
+        self._stats["frames"] += n
+        self._stats["bytes"] += len(chunk)
+
+    def _writer_loop(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_ms / 1000.0)
+            try:
+                self._write_batch()
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"WS recorder write failed: {e}")
+        try:
+            self._write_batch()
+        finally:
+            self._close_segment()
+
+    def stats(self) -> dict:
+        return dict(self._stats, backlog=len(self._buf), segment=self._seg_path)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def read_segment(path: str) -> Iterator[Frame]:
+    """Frames of one segment in write order; a truncated tail ends the stream quietly."""
+    with gzip.open(path, "rb") as f:
+        try:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: not a WS frame segment")
+            while True:
+                hdr = f.read(_HDR.size)
+                if len(hdr) < _HDR.size:
+                    return
+                ts, code, n = _HDR.unpack(hdr)
+                raw = f.read(n)
+                if len(raw) < n:
+                    return
+                idx = code & ~REST_FLAG
+                ex = EXCHANGES[idx] if idx < len(EXCHANGES) else "?"
+                yield ts, (ex + "/rest" if code & REST_FLAG else ex), raw
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            return
+
+
+def segment_paths(root: str) -> List[List[str]]:
+    """Segment files under root grouped per recorder prefix, each group in time order."""
+    groups: dict = {}
+    for p in glob.glob(os.path.join(root, "*.seg.gz")):
+        prefix, _, start = os.path.basename(p)[:-len(".seg.gz")].rpartition("-")
+        groups.setdefault(prefix, []).append((int(start) if start.isdigit() else 0, p))
+    return [[p for _, p in sorted(g)] for _, g in sorted(groups.items())]
+
+
+def read_frames(root: str) -> Iterator[Frame]:
+    """All recorded frames under root, merged across recorders by receive time."""
+    streams = [(f for p in group for f in read_segment(p)) for group in segment_paths(root)]
+    return heapq.merge(*streams, key=lambda fr: fr[0])
@@ -1,18 +1,118 @@
 import asyncio
+import bisect
+import time
 from typing import Any, Dict, Optional, Callable
 import aiohttp
 from loguru import logger
 
+# Latency histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class RESTStatusError(RuntimeError):
+    """Non-retryable HTTP status (4xx). 429/418 mean the venue is rate limiting us."""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status in (418, 429)
+
+
+class RESTMetrics:
+    """Connection reuse, in-flight and latency counters fed by an aiohttp TraceConfig."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.conn_created = 0
+        self.conn_reused = 0
+        self.latency_hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+        tc.on_request_start.append(self._on_start)
+        tc.on_request_end.append(self._on_end)
+        tc.on_request_exception.append(self._on_exception)
+        tc.on_connection_create_end.append(self._on_create)
+        tc.on_connection_reuseconn.append(self._on_reuse)
+        return tc
+
+    async def _on_start(self, session, ctx, params):
+        ctx.t0 = time.perf_counter()
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    async def _on_end(self, session, ctx, params):
+        self.in_flight -= 1
+        ms = (time.perf_counter() - ctx.t0) * 1000.0
+        self.latency_hist[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    async def _on_exception(self, session, ctx, params):
+        self.in_flight -= 1
+        self.errors += 1
+
+    async def _on_create(self, session, ctx, params):
+        self.conn_created += 1
+
+    async def _on_reuse(self, session, ctx, params):
+        self.conn_reused += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.conn_created + self.conn_reused
+        return self.conn_reused / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "conn_created": self.conn_created,
+            "conn_reused": self.conn_reused,
+            "reuse_ratio": self.reuse_ratio,
+            "latency_ms": dict(zip(labels, self.latency_hist)),
+        }
+
+
 class RESTClient:
-    def __init__(self, base_url: str, timeout: int = 10, max_retries: int = 3):
+    """GET client over one pooled keep-alive session for a base URL.
+
+    Use get_client(base_url) to share one instance per host process-wide;
+    the session is created lazily on the running loop.
+    """
+
+    def __init__(self, base_url: str, timeout: int = 10, max_retries: int = 3,
+                 limit_per_host: int = 16, keepalive_sec: float = 30.0, dns_ttl_sec: int = 300):
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.max_retries = max_retries
+        self.limit_per_host = limit_per_host
+        self.keepalive_sec = keepalive_sec
+        self.dns_ttl_sec = dns_ttl_sec
+        self.metrics = RESTMetrics()
         self._session: Optional[aiohttp.ClientSession] = None
 
     async def _ensure(self):
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl_sec,
+                keepalive_timeout=self.keepalive_sec,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[self.metrics.trace_config()],
+            )
 
     async def get(self, path: str, params: Optional[Dict[str, Any]] = None,
                   transform: Optional[Callable[[Any], Any]] = None) -> Any:
@@ -20,10 +120,15 @@ class RESTClient:
         url = f"{self.base_url}/{path.lstrip('/')}"
         for attempt in range(1, self.max_retries + 1):
             try:
-                async with self._session.get(url, params=params, timeout=self.timeout) as resp:
+                async with self._session.get(url, params=params) as resp:
+                    if 400 <= resp.status < 500:
+                        # client errors and rate limits won't improve by retrying right away
+                        raise RESTStatusError(resp.status, url)
                     resp.raise_for_status()
-                    data = await resp.json()
+                    data = await resp.json(content_type=None)
                     return transform(data) if transform else data
+            except RESTStatusError:
+                raise
             except Exception as e:
                 wait = min(30, attempt * 0.75)
                 logger.warning(f"REST GET {url} failed (attempt {attempt}): {e}; retry in {wait:.2f}s")
@@ -33,3 +138,25 @@ class RESTClient:
     async def close(self):
         if self._session and not self._session.closed:
             await self._session.close()
+
+
+_clients: Dict[str, RESTClient] = {}
+
+
+def get_client(base_url: str, **kwargs) -> RESTClient:
+    """Process-wide RESTClient for base_url (one pooled session per host)."""
+    key = base_url.rstrip('/')
+    rc = _clients.get(key)
+    if rc is None:
+        rc = _clients[key] = RESTClient(key, **kwargs)
+    return rc
+
+
+def pool_stats() -> Dict[str, dict]:
+    return {url: rc.metrics.snapshot() for url, rc in _clients.items()}
+
+
+async def close_all():
+    for rc in list(_clients.values()):
+        await rc.close()
+    _clients.clear()
@@ -0,0 +1,263 @@
+import asyncio
+import multiprocessing as mp
+import pickle
+import threading
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from .binance_ws import BinanceWS
+from .bybit_ws import BybitWS
+from .mexc_ws import MEXCWS
+from .lbank_ws import LBankWS
+from .orderbook import BookManager, book_top
+from .recorder import FrameRecorder
+from .decoders import PAYLOAD_TYPES
+from .trades import normalize_mark, normalize_trades
+
+
+def client_for(ex: str, syms: List[str], on_ob, on_trade, on_mark, url: Optional[str] = None):
+    """One venue's WS client; `url` overrides its endpoint (tests/replay)."""
+    if ex == "binance":
+        return BinanceWS(syms, on_ob, on_trade, on_mark, **({"base_url": url} if url else {}))
+    if ex == "bybit":
+        return BybitWS(syms, on_ob, on_trade, on_trade, **({"url": url} if url else {}))
+    if ex == "mexc":
+        return MEXCWS(syms, on_ob, on_trade, on_mark, **({"endpoints": [url]} if url else {}))
+    if ex == "lbank":
+        return LBankWS(syms, on_ob, on_trade, **({"endpoints": [url]} if url else {}))
+    raise ValueError(f"unknown exchange {ex}")
+
+
+def make_clients(uni: Dict[str, List[str]], on_ob, on_trade, on_mark,
+                 books: Optional[BookManager] = None, urls: Optional[Dict[str, str]] = None,
+                 recorder: Optional[FrameRecorder] = None) -> list:
+    """WS clients for a per-exchange universe; `urls` overrides venue endpoints (tests/replay)."""
+    urls = urls or {}
+    clients = []
+    for ex in ("binance", "bybit", "mexc", "lbank"):
+        if not uni.get(ex):
+            continue
+        c = client_for(ex, uni[ex], on_ob, on_trade, on_mark, urls.get(ex))
+        if ex == "bybit" and books is not None:
+            books.set_resync("bybit", c.request_resync)
+        c.recorder = recorder
+        clients.append(c)
+    return clients
+
+
+def plan_shards(uni: Dict[str, List[str]], n: int) -> List[Dict[str, List[str]]]:
+    """Split every exchange's symbols round-robin across n shards (empty shards dropped)."""
+    shards: List[Dict[str, List[str]]] = [{ex: [] for ex in uni} for _ in range(max(1, n))]
+    for ex, syms in uni.items():
+        for i, s in enumerate(syms):
+            shards[i % len(shards)][ex].append(s)
+    return [sh for sh in shards if any(sh.values())]
+
+
+class _ShardWorker:
+    """Runs WS clients and books for one shard and ships normalized records to the parent.
+
+    Records are tuples:
+      ('ob', ex, sym, best_bid, best_ask, bid_total, ask_total, ladder)  latest per book
+      ('tr', ex, sym, [(ts, price, qty, side), ...])
+      ('mk', ex, sym, price)
+      ('st', book_stats, {client: {stream: age_sec}})  every STATS_SEC, last in its batch
+    Book records are coalesced per flush so only the latest state crosses the pipe.
+    The 'st' record carries the shard's BookManager stats and its clients' stale
+    streams; ShardedIngest keeps it and does not pass it to the hub.
+    """
+
+    STATS_SEC = 10.0
+
+    def __init__(self, uni: Dict[str, List[str]], conn, flush_ms: int, urls: Optional[Dict[str, str]],
+                 record_dir: Optional[str] = None, shard: int = 0):
+        self.uni = uni
+        self.conn = conn
+        self.flush_sec = max(0.001, flush_ms / 1000.0)
+        self.urls = urls
+        self.books = BookManager()
+        self._ob: Dict[tuple, tuple] = {}
+        self._out: List[tuple] = []
+        self.clients: list = []
+        self.recorder = FrameRecorder(record_dir, prefix=f"shard{shard}") if record_dir else None
+
+    async def _on_ob(self, ex, sym, payload):
+        if not isinstance(payload, PAYLOAD_TYPES):
+            return
+        book = self.books.on_depth(ex, sym, payload)
+        if book is None:
+            return
+        self._ob[(ex, sym)] = (*book_top(book), book.ladder_stats())
+
+    async def _on_trade(self, ex, sym, payload):
+        if not isinstance(payload, PAYLOAD_TYPES):
+            return
+        trades = normalize_trades(ex, payload)
+        if trades:
+            self._out.append(("tr", ex, sym, trades))
+
+    async def _on_mark(self, ex, sym, payload):
+        if not isinstance(payload, PAYLOAD_TYPES):
+            return
+        price = normalize_mark(payload)
+        if price:
+            self._out.append(("mk", ex, sym, price))
+
+    def _flush(self):
+        if not self._ob and not self._out:
+            return
+        batch = [("ob", ex, sym, *v) for (ex, sym), v in self._ob.items()]
+        batch.extend(self._out)
+        self._ob = {}
+        self._out = []
+        self.conn.send_bytes(pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _status(self) -> tuple:
+        stale = {c.__class__.__name__: c.staleness_check() for c in self.clients if hasattr(c, "staleness_check")}
+        return ("st", self.books.stats(), stale)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        next_stats = loop.time()
+        while True:
+            await asyncio.sleep(self.flush_sec)
+            if loop.time() >= next_stats:
+                next_stats = loop.time() + self.STATS_SEC
+                self._out.append(self._status())
+            self._flush()
+
+    async def run(self):
+        self.clients = make_clients(self.uni, self._on_ob, self._on_trade, self._on_mark, self.books, self.urls,
+                                    self.recorder)
+        try:
+            await asyncio.gather(self._flush_loop(), *(c.run() for c in self.clients))
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
+
+
+def _worker_main(uni, conn, flush_ms, urls, record_dir, shard):
+    try:
+        asyncio.run(_ShardWorker(uni, conn, flush_ms, urls, record_dir, shard).run())
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+
+
+class ShardedIngest:
+    """WS ingestion spread over worker processes, feeding DataHub.apply_records.
+
+    Each shard owns a slice of every exchange's symbols, its WS connections,
+    JSON decoding and order books. A reader thread per shard receives pickled
+    record batches over a pipe and hands them to the hub on the event loop.
+    Dead workers are restarted. The hub's own BookManager stays empty in this
+    mode; book_stats() and stale() report what the shards last sent.
+    """
+
+    def __init__(self, hub, n_shards: int, flush_ms: int = 20, urls: Optional[Dict[str, str]] = None,
+                 record_dir: Optional[str] = None):
+        self.hub = hub
+        self.n_shards = n_shards
+        self.flush_ms = flush_ms
+        self.urls = urls
+        # each worker records its own frames under record_dir with a shard<i> prefix
+        self.record_dir = record_dir
+        self._ctx = mp.get_context("spawn")
+        self._plans: List[Dict[str, List[str]]] = []
+        self._procs: List[Any] = []
+        self._stats: List[dict] = []
+        # per shard: (book_stats, {client: {stream: age_sec}}) from its latest 'st' record
+        self._status: List[Optional[tuple]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    def _spawn(self, i: int):
+        recv, send = self._ctx.Pipe(duplex=False)
+        p = self._ctx.Process(target=_worker_main, args=(self._plans[i], send, self.flush_ms, self.urls, self.record_dir, i),
+                              name=f"ingest-shard-{i}", daemon=True)
+        p.start()
+        send.close()
+        self._procs[i] = p
+        self._status[i] = None
+        threading.Thread(target=self._reader, args=(i, recv), name=f"ingest-reader-{i}", daemon=True).start()
+
+    def _reader(self, i: int, conn):
+        st = self._stats[i]
+        while True:
+            try:
+                data = conn.recv_bytes()
+            except (EOFError, OSError):
+                break
+            batch = pickle.loads(data)
+            st["batches"] += 1
+            st["records"] += len(batch)
+            st["bytes"] += len(data)
+            if batch and batch[-1][0] == "st":
+                self._status[i] = batch.pop()[1:]
+                if not batch:
+                    continue
+            try:
+                self._loop.call_soon_threadsafe(self.hub.apply_records, batch)
+            except RuntimeError:
+                break
+        conn.close()
+
+    def start(self, uni: Dict[str, List[str]]):
+        self._loop = asyncio.get_running_loop()
+        self._plans = plan_shards(uni, self.n_shards)
+        self._procs = [None] * len(self._plans)
+        self._status = [None] * len(self._plans)
+        self._stats = [{"batches": 0, "records": 0, "bytes": 0, "restarts": 0} for _ in self._plans]
+        for i in range(len(self._plans)):
+            self._spawn(i)
+        logger.info(f"Sharded ingest: {len(self._plans)} worker processes")
+
+    async def run(self, uni: Dict[str, List[str]]):
+        self.start(uni)
+        try:
+            while True:
+                await asyncio.sleep(5)
+                for i, p in enumerate(self._procs):
+                    if not p.is_alive() and not self._stopping:
+                        logger.warning(f"Ingest shard {i} exited with {p.exitcode}; restarting")
+                        self._stats[i]["restarts"] += 1
+                        self._spawn(i)
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopping = True
+        for p in self._procs:
+            if p is not None and p.is_alive():
+                p.terminate()
+        for p in self._procs:
+            if p is not None:
+                p.join(timeout=5)
+
+    def stats(self) -> dict:
+        return {
+            "shards": len(self._procs),
+            "alive": sum(1 for p in self._procs if p is not None and p.is_alive()),
+            "batches": sum(s["batches"] for s in self._stats),
+            "records": sum(s["records"] for s in self._stats),
+            "bytes": sum(s["bytes"] for s in self._stats),
+            "restarts": sum(s["restarts"] for s in self._stats),
+        }
+
+    def book_stats(self) -> dict:
+        """BookManager.stats() summed over the shards that have reported."""
+        out = {"books": 0, "synced": 0, "gaps": 0, "resyncs": 0}
+        for status in self._status:
+            if status is not None:
+                for k in out:
+                    out[k] += status[0].get(k, 0)
+        return out
+
+    def stale(self) -> Dict[str, dict]:
+        """Stale WS streams per shard and client, as of each shard's last report."""
+        out = {}
+        for i, status in enumerate(self._status):
+            if status is None:
+                continue
+            for name, streams in status[1].items():
+                if streams:
+                    out[f"shard{i}:{name}"] = streams
+        return out
@@ -0,0 +1,113 @@
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+from .decoders import MarkMsg, TradesMsg
+
+# (ts_sec, price, qty, side) with side +1 = taker buy, -1 = taker sell
+Trade = Tuple[float, float, float, int]
+
+
+def _ts(v) -> float:
+    try:
+        t = float(v)
+    except Exception:
+        return time.time()
+    return t / 1000.0 if t > 1e12 else t
+
+
+def _side(v) -> int:
+    if isinstance(v, str):
+        return -1 if "sell" in v.lower() else 1
+    # MEXC contract deals: T=1 buy, T=2 sell
+    return -1 if v == 2 else 1
+
+
+def normalize_trades(ex: str, payload: Dict[str, Any], now: float | None = None) -> List[Trade]:
+    """Parse a venue trade payload once into compact (ts, price, qty, side) tuples.
+
+    `now` stamps trades from venues that send no trade time (LBank).
+    """
+    if isinstance(payload, TradesMsg):
+        return payload.trades
+    out: List[Trade] = []
+    try:
+        if ex == "binance":
+            if payload.get("e") == "aggTrade":
+                # m=True means the buyer is the maker, i.e. a taker sell
+                out.append((_ts(payload.get("T") or payload.get("E")), float(payload.get("p", 0) or 0),
+                            float(payload.get("q", 0) or 0), -1 if payload.get("m") else 1))
+        elif ex == "bybit":
+            if not str(payload.get("topic", "")).startswith("publicTrade."):
+                return out
+            for d in payload.get("data") or []:
+                out.append((_ts(d.get("T") or payload.get("ts")), float(d.get("p", 0) or 0),
+                            float(d.get("v", 0) or 0), _side(d.get("S", "Buy"))))
+        elif ex == "mexc":
+            if (payload.get("channel") or payload.get("method")) not in ("rs.deal", "push.deal"):
+                return out
+            data = payload.get("data") or []
+            for d in (data if isinstance(data, list) else [data]):
+                out.append((_ts(d.get("t") or payload.get("ts")), float(d.get("p", 0) or 0),
+                            float(d.get("v", 0) or 0), _side(d.get("T"))))
+        elif ex == "lbank":
+            if now is None:
+                now = time.time()
+            for d in payload.get("trades") or []:
+                out.append((now, float(d.get("price", 0) or 0), float(d.get("amount", 0) or 0),
+                            _side(d.get("type") or d.get("direction") or "buy")))
+    except Exception:
+        pass
+    return [t for t in out if t[1] > 0]
+
+
+def normalize_mark(payload: Dict[str, Any]) -> float | None:
+    """Mark/last price from a venue mark payload, or None."""
+    if isinstance(payload, MarkMsg):
+        return payload.price if payload.price > 0 else None
+    try:
+        price = payload.get("p") or payload.get("markPrice") or payload.get("price") or payload.get("last") or payload.get("c")
+        price = float(price) if price is not None else None
+    except Exception:
+        return None
+    return price if price and price > 0 else None
+
+
+class TradeRing:
+    """Fixed-capacity ring of normalized trades backed by typed arrays."""
+
+    __slots__ = ("capacity", "ts", "price", "qty", "side", "_head", "_count")
+
+    def __init__(self, capacity: int = 4000):
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.price = array("d", bytes(8 * capacity))
+        self.qty = array("d", bytes(8 * capacity))
+        self.side = array("b", bytes(capacity))
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ts: float, price: float, qty: float, side: int):
+        i = self._head
+        self.ts[i] = ts
+        self.price[i] = price
+        self.qty[i] = qty
+        self.side[i] = side
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def last(self) -> Trade | None:
+        if not self._count:
+            return None
+        i = (self._head - 1) % self.capacity
+        return self.ts[i], self.price[i], self.qty[i], self.side[i]
+
+    def __iter__(self) -> Iterator[Trade]:
+        """Oldest to newest."""
+        start = (self._head - self._count) % self.capacity
+        for k in range(self._count):
+            i = (start + k) % self.capacity
+            yield self.ts[i], self.price[i], self.qty[i], self.side[i]
@@ -1,18 +1,18 @@
 import asyncio
-import time
 from collections import deque
-from data_fetcher.rest_client import RESTClient
+from data_fetcher.rest_client import get_client
+from data_fetcher.clock import system_clock
 
 class BTCRegime:
-    def __init__(self, maxlen: int = 360):
+    def __init__(self, maxlen: int = 360, clock=None):
+        self.clock = clock or system_clock
         self.klines = deque(maxlen=maxlen)  # (ts, close)
 
     async def poll(self):
         """Fetch last 60 minutes of BTCUSDT 1m klines and update buffer."""
-        rc = RESTClient("https://api.binance.com")
-        data = await rc.get("/api/v3/klines", params={"symbol": "BTCUSDT", "interval": "1m", "limit": 60})
-        await rc.close()
-        now = time.time()
+        data = await get_client("https://api.binance.com").get(
+            "/api/v3/klines", params={"symbol": "BTCUSDT", "interval": "1m", "limit": 60})
+        now = self.clock.time()
         self.klines.clear()
         for k in data:
             # [ openTime, open, high, low, close, volume, closeTime, ... ]
@@ -23,7 +23,7 @@ class BTCRegime:
     def alignment(self) -> float:
         if len(self.klines) < 5:
             return 0.0
-        now = time.time()
+        now = self.clock.time()
         recent = [(t, c) for t, c in self.klines if abs(t - now) < 3900]
         if len(recent) < 5:
             return 0.0
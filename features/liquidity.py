@@ -1,4 +1,5 @@
 from typing import List, Tuple
+from data_fetcher.orderbook import OrderBook
 
 def _asks_from_payload(payload) -> List[Tuple[float, float]]:
     if not payload:
@@ -48,11 +49,16 @@ def _asks_from_payload(payload) -> List[Tuple[float, float]]:
 
 class Liquidity:
     def void_above(self, ob_payload) -> float:
-        from .microstructure import _parse_prices_sizes_from_payload
-        _, asks = _parse_prices_sizes_from_payload(ob_payload)
-        if len(asks) < 2:
+        """Max relative gap between consecutive asks; accepts an OrderBook or a raw payload."""
+        if isinstance(ob_payload, OrderBook):
+            # book asks are already sorted best-first
+            asks_sorted = ob_payload.asks(20)
+        else:
+            from .microstructure import _parse_prices_sizes_from_payload
+            _, asks = _parse_prices_sizes_from_payload(ob_payload)
+            asks_sorted = sorted(asks, key=lambda x: x[0])
+        if len(asks_sorted) < 2:
             return 0.0
-        asks_sorted = sorted(asks, key=lambda x: x[0])
         gaps = []
         for i in range(1, min(20, len(asks_sorted))):
             p0, _ = asks_sorted[i-1]
@@ -61,6 +67,9 @@ class Liquidity:
                 gaps.append((p1 - p0) / p0)
         return max(gaps) if gaps else 0.0
 
-    def void_above_from_unified(self) -> float:
-        """Unified metrics lack price ladder; return 0.0 as conservative default."""
-        return 0.0
+    def void_above_from_unified(self, depth: dict | None = None) -> float:
+        """Gap above from the unified depth block (maintained book ladders); 0.0 if absent."""
+        if not isinstance(depth, dict):
+            return 0.0
+        gap = depth.get("gap_above")
+        return float(gap) if isinstance(gap, (int, float)) and gap > 0 else 0.0
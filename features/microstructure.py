@@ -1,11 +1,15 @@
 from typing import Dict, List, Tuple
 import time
+from data_fetcher.orderbook import OrderBook
 
 def _parse_prices_sizes_from_payload(payload) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
     """
     Attempt to extract top-of-book price levels from various exchange payloads.
+    A maintained OrderBook is read directly (best level first).
     Returns (bids, asks) as lists of (price, size).
     """
+    if isinstance(payload, OrderBook):
+        return payload.bids(), payload.asks()
     bids: List[Tuple[float, float]] = []
     asks: List[Tuple[float, float]] = []
     if not payload:
@@ -100,11 +104,12 @@ class Microstructure:
         gap_above = max(gaps) if gaps else 0.0
         return {"ask_dom": ask_dom, "spread": spread, "gap_above": gap_above, "spread_pct": spread}
 
-    def features_from_unified(self, price: float | None, spread: float | None, bid_total: float | None, ask_total: float | None) -> Dict[str, float]:
+    def features_from_unified(self, price: float | None, spread: float | None, bid_total: float | None, ask_total: float | None,
+                              gap_above: float = 0.0) -> Dict[str, float]:
         """Compute microstructure-like features from unified averaged metrics.
         - ask_dom: ask_total / (bid_total + ask_total)
         - spread_pct: spread / price
-        - gap_above: not available without levels; approximate 0.0
+        - gap_above: max relative ask gap from the hub's book ladders (0.0 if unavailable)
         """
         denom = 0.0
         try:
@@ -118,4 +123,4 @@ class Microstructure:
                 sp_pct = float(spread) / float(price)
         except Exception:
             sp_pct = 0.0
-        return {"ask_dom": max(0.0, min(1.0, ask_dom)), "spread_pct": max(0.0, sp_pct), "gap_above": 0.0}
+        return {"ask_dom": max(0.0, min(1.0, ask_dom)), "spread_pct": max(0.0, sp_pct), "gap_above": max(0.0, float(gap_above or 0.0))}
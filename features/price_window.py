@@ -0,0 +1,100 @@
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterable, Tuple
+
+
+class PriceWindow:
+    """Fixed-capacity (ts, price) series with rolling highs/lows per horizon.
+
+    Samples live in preallocated ring arrays addressed by a running sequence
+    number. Each horizon keeps two monotonic deques of sequence numbers, so
+    the rolling max and min are read from the front in O(1) and maintained in
+    amortized O(1) per append. Only samples still in the ring count, matching
+    a deque(maxlen=capacity) scan.
+    """
+
+    __slots__ = ("capacity", "horizons", "_ts", "_px", "_n", "_hi", "_lo")
+
+    def __init__(self, capacity: int = 120, horizons: Iterable[float] = (60,)):
+        self.capacity = capacity
+        self.horizons = tuple(sorted(set(horizons)))
+        self._ts = array("d", bytes(8 * capacity))
+        self._px = array("d", bytes(8 * capacity))
+        self._n = 0
+        self._hi: Dict[float, Deque[int]] = {h: deque() for h in self.horizons}
+        self._lo: Dict[float, Deque[int]] = {h: deque() for h in self.horizons}
+
+    def __len__(self) -> int:
+        return min(self._n, self.capacity)
+
+    def append(self, ts: float, price: float):
+        seq = self._n
+        i = seq % self.capacity
+        self._ts[i] = ts
+        self._px[i] = price
+        self._n = seq + 1
+        px = self._px
+        cap = self.capacity
+        oldest = self._n - cap
+        for h in self.horizons:
+            cutoff = ts - h
+            hi = self._hi[h]
+            while hi and px[hi[-1] % cap] <= price:
+                hi.pop()
+            hi.append(seq)
+            self._expire(hi, oldest, cutoff)
+            lo = self._lo[h]
+            while lo and px[lo[-1] % cap] >= price:
+                lo.pop()
+            lo.append(seq)
+            self._expire(lo, oldest, cutoff)
+
+    def _expire(self, dq: Deque[int], oldest: int, cutoff: float):
+        ts = self._ts
+        cap = self.capacity
+        while dq and (dq[0] < oldest or ts[dq[0] % cap] < cutoff):
+            dq.popleft()
+
+    def last(self, k: int = 1) -> Tuple[float, float]:
+        """k-th most recent (ts, price); k=1 is the latest sample."""
+        if k < 1 or k > len(self):
+            raise IndexError("PriceWindow index out of range")
+        i = (self._n - k) % self.capacity
+        return self._ts[i], self._px[i]
+
+    def high(self, horizon: float = 60) -> float | None:
+        dq = self._hi[horizon]
+        return self._px[dq[0] % self.capacity] if dq else None
+
+    def low(self, horizon: float = 60) -> float | None:
+        dq = self._lo[horizon]
+        return self._px[dq[0] % self.capacity] if dq else None
+
+    def recent_return(self) -> float:
+        if len(self) < 2:
+            return 0.0
+        p0 = self.last(2)[1]
+        p1 = self.last(1)[1]
+        if p0 <= 0:
+            return 0.0
+        return (p1 - p0) / p0
+
+    def near_resistance(self, horizon: float = 60) -> float:
+        """Distance from the last price up to the horizon high, as a fraction of price."""
+        if len(self) < 5:
+            return 1.0
+        last_p = self.last()[1]
+        mx = self.high(horizon)
+        if mx is None or last_p <= 0:
+            return 1.0
+        return max(0.0, (mx - last_p) / last_p)
+
+    def near_support(self, horizon: float = 60) -> float:
+        """Distance from the last price down to the horizon low, as a fraction of price."""
+        if len(self) < 5:
+            return 1.0
+        last_p = self.last()[1]
+        mn = self.low(horizon)
+        if mn is None or last_p <= 0:
+            return 1.0
+        return max(0.0, (last_p - mn) / last_p)
@@ -1,11 +1,16 @@
+import math
 import time
 from typing import List, Dict, Any
+from data_fetcher.clock import system_clock
 
 class Sweeps:
+    def __init__(self, clock=None):
+        self.clock = clock or system_clock
+
     def detect(self, trades: List[Dict[str, Any]], lookback_sec: int = 20) -> float:
         if not trades:
             return 0.0
-        now = time.time()
+        now = self.clock.time()
         buy_vol = 0.0
         sell_vol = 0.0
         cnt = 0
@@ -47,3 +52,45 @@ class Sweeps:
         dom = max(buy_vol, sell_vol) / total
         # stronger sweep if dominance high and trade count reasonable
         return max(0.0, min(2.0, dom * (cnt / 20.0)))
+
+
+class SweepEstimator:
+    """Streaming sweep/aggressor-imbalance estimate with exponential time decay.
+
+    Buy volume, sell volume and trade count decay with time constant
+    `lookback_sec`, so each trade is an O(1) update and the value matches
+    Sweeps.detect's dominance * (count / 20) over a ~lookback window.
+    """
+
+    __slots__ = ("tau", "buy", "sell", "count", "ts")
+
+    def __init__(self, lookback_sec: float = 20.0):
+        self.tau = lookback_sec
+        self.buy = 0.0
+        self.sell = 0.0
+        self.count = 0.0
+        self.ts = 0.0
+
+    def update(self, ts: float, qty: float, side: int):
+        if ts > self.ts:
+            f = math.exp(-(ts - self.ts) / self.tau) if self.ts else 0.0
+            self.buy *= f
+            self.sell *= f
+            self.count *= f
+            self.ts = ts
+        if side < 0:
+            self.sell += qty
+        else:
+            self.buy += qty
+        self.count += 1.0
+
+    def value(self, now: float | None = None) -> float:
+        if now is None:
+            now = time.time()
+        f = math.exp(-(now - self.ts) / self.tau) if now > self.ts else 1.0
+        cnt = self.count * f
+        total = (self.buy + self.sell) * f
+        if total <= 0 or cnt < 3:
+            return 0.0
+        dom = max(self.buy, self.sell) / (self.buy + self.sell)
+        return max(0.0, min(2.0, dom * (cnt / 20.0)))
@@ -1,19 +1,110 @@
 from collections import deque
-from typing import Deque, Tuple
+from typing import Deque, Dict, Iterable, Tuple
 import math
-import time
+from data_fetcher.clock import system_clock
+
+DEFAULT_WINDOWS = (30, 60, 300)
+
+
+class _RollingReturns:
+    """Sliding-window mean/variance of simple returns (Welford add/remove).
+
+    Each return is keyed by the timestamp of its earlier price, so expiry
+    matches filtering prices by `t >= now - window` and pairing neighbours.
+    Welford removal accumulates rounding error, so the moments are recomputed
+    from the retained items every `cap` removals (amortized O(1)).
+    """
+
+    __slots__ = ("window", "cap", "items", "n", "mean", "m2", "pops")
+
+    def __init__(self, window: float, cap: int):
+        self.window = window
+        self.cap = cap
+        self.items: Deque[Tuple[float, float]] = deque()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.pops = 0
+
+    def add(self, t_prev: float, r: float):
+        self.items.append((t_prev, r))
+        self.n += 1
+        d = r - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (r - self.mean)
+        if self.n > self.cap:
+            self._pop()
+
+    def _pop(self):
+        _, r = self.items.popleft()
+        self.n -= 1
+        if self.n == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        self.pops += 1
+        if self.pops >= self.cap:
+            self._recompute()
+            return
+        d = r - self.mean
+        self.mean -= d / self.n
+        self.m2 -= d * (r - self.mean)
+
+    def _recompute(self):
+        self.pops = 0
+        mean = sum(r for _, r in self.items) / self.n
+        self.mean = mean
+        self.m2 = sum((r - mean) ** 2 for _, r in self.items)
+
+    def expire(self, now: float):
+        cutoff = now - self.window
+        items = self.items
+        while items and items[0][0] < cutoff:
+            self._pop()
+
+    def std(self) -> float:
+        if self.n <= 0:
+            return 0.0
+        return math.sqrt(max(0.0, self.m2 / self.n))
+
 
 class Volatility:
-    def __init__(self, maxlen: int = 600):
+    """Per-symbol return volatility over a few fixed windows, O(1) per ingest.
+
+    burst(window) for a configured window reads the running moments; any other
+    window falls back to scanning the retained prices.
+    """
+
+    def __init__(self, maxlen: int = 600, windows: Iterable[int] = DEFAULT_WINDOWS, clock=None):
+        self.clock = clock or system_clock
         self.prices: Deque[Tuple[float, float]] = deque(maxlen=maxlen)  # (ts, price)
+        # at most maxlen-1 returns pair up prices still held in `prices`
+        self._stats: Dict[int, _RollingReturns] = {int(w): _RollingReturns(w, maxlen - 1) for w in windows}
 
     def ingest_mark(self, ts: float, price: float):
-        if price > 0 and abs(ts - time.time()) < 300:
+        if price > 0 and abs(ts - self.clock.time()) < 300:
+            if self.prices:
+                t_prev, p_prev = self.prices[-1]
+                r = (price - p_prev) / p_prev
+                for st in self._stats.values():
+                    st.add(t_prev, r)
+                    st.expire(ts)
             self.prices.append((ts, price))
 
     def burst(self, window_sec: int = 60) -> float:
         if len(self.prices) < 5:
             return 0.0
+        st = self._stats.get(window_sec)
+        if st is None:
+            return self._scan_burst(window_sec)
+        st.expire(self.prices[-1][0])
+        # n returns span n+1 windowed prices
+        if st.n + 1 < 5:
+            return 0.0
+        # Normalize relative to a 0.2% baseline
+        return max(0.0, min(1.0, st.std() / 0.002))
+
+    def _scan_burst(self, window_sec: int) -> float:
         now = self.prices[-1][0]
         wins = [p for t, p in self.prices if t >= now - window_sec]
         if len(wins) < 5:
@@ -27,5 +118,4 @@ class Volatility:
         mu = sum(rets) / len(rets)
         var = sum((r - mu) ** 2 for r in rets) / len(rets)
         vol = math.sqrt(var)
-        # Normalize relative to a 0.2% baseline
         return max(0.0, min(1.0, vol / 0.002))
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from typing import Hashable, Iterable
+from data_fetcher.clock import system_clock
+
+
+class CooldownIndex:
+    """Last-seen timestamps per key with time-bucketed TTL eviction.
+
+    Keys are tuples such as (sym, dedup_hash) or (sym, signal_type). Lookups
+    are a single dict access; every key is also filed under the bucket of its
+    last touch so expired keys are dropped a whole bucket at a time, keeping
+    memory bounded by the number of keys touched within `ttl_sec`.
+    """
+
+    def __init__(self, ttl_sec: float = 900, bucket_sec: float = 60, clock=None):
+        self.clock = clock or system_clock
+        self.ttl_sec = ttl_sec
+        self.bucket_sec = bucket_sec
+        self._last: dict[Hashable, float] = {}
+        self._buckets: "OrderedDict[int, set]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def touch(self, key: Hashable, ts: float | None = None):
+        if ts is None:
+            ts = self.clock.time()
+        self._last[key] = ts
+        b = int(ts // self.bucket_sec)
+        bucket = self._buckets.get(b)
+        if bucket is None:
+            bucket = self._buckets[b] = set()
+        bucket.add(key)
+        self._evict(ts)
+
+    def last(self, key: Hashable) -> float | None:
+        return self._last.get(key)
+
+    def seen(self, key: Hashable, window_sec: float, now: float | None = None) -> bool:
+        ts = self._last.get(key)
+        if ts is None:
+            return False
+        if now is None:
+            now = self.clock.time()
+        return (now - ts) < window_sec
+
+    def load(self, rows: Iterable[tuple]):
+        """Warm from (ts, key) pairs, oldest first."""
+        for ts, key in rows:
+            self.touch(key, ts)
+
+    def _evict(self, now: float):
+        horizon = int((now - self.ttl_sec) // self.bucket_sec)
+        while self._buckets:
+            b = next(iter(self._buckets))
+            if b >= horizon:
+                break
+            for key in self._buckets.pop(b):
+                ts = self._last.get(key)
+                if ts is not None and int(ts // self.bucket_sec) <= b:
+                    del self._last[key]
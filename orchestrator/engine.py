@@ -1,55 +1,110 @@
 import os
 import asyncio
-import time
 import json
 import hashlib
-from collections import defaultdict, deque
+from collections import defaultdict
 from loguru import logger
 from data_fetcher.hub import DataHub
 from data_fetcher.symbols import load_symbols
+from data_fetcher import rest_client
+from data_fetcher.clock import system_clock
 from features.microstructure import Microstructure
 from features.btc_regime import BTCRegime
 from features.liquidity import Liquidity
 from features.sweeps import Sweeps
 from features.volatility import Volatility
+from features.price_window import PriceWindow
 from features.funding import Funding
 from features.oi import OpenInterest
 from scalp_engine.symbol_selector import SymbolSelector
 from scalp_engine.scorer import Scorer
 from scalp_engine.entry_trigger import EntryTrigger
 from scalp_engine.exit_manager import ExitManager
+from scalp_engine.position_book import PositionBook
 from storage.sqlite_cache import SQLiteCache
+from storage.async_cache import AsyncSQLiteCache
+from storage.history_writer import HistoryWriter
+from storage.delta_filter import DeltaFilter, FEATURE_TOLERANCES, UNIFIED_TOLERANCES, parse_tolerances
 from telegram_bot.notifier import TelegramNotifier
+from .loop_monitor import LoopLagMonitor
+from .cooldowns import CooldownIndex
+from .scheduler import FundingOIPoller
 
 class Orchestrator:
-    def __init__(self):
-        self.hub = DataHub()
+    def __init__(self, db_path: str = "/app/state/data.db", clock=None):
+        # every decision timestamp comes from self.clock; replay passes a SimClock
+        self.clock = clock or system_clock
+        self.hub = DataHub(clock=self.clock)
         self.selector = SymbolSelector()
         self.ms = Microstructure()
         self.liq = Liquidity()
-        self.sweeps = Sweeps()
-        self.vol_idx: dict[str, Volatility] = defaultdict(lambda: Volatility())
+        self.sweeps = Sweeps(self.clock)
+        self.vol_idx: dict[str, Volatility] = defaultdict(lambda: Volatility(clock=self.clock))
         self.funding = Funding()
         self.oi = OpenInterest()
-        self.btc = BTCRegime()
+        self.btc = BTCRegime(clock=self.clock)
         self.scorer = Scorer()
         self.entry = EntryTrigger()
         self.exit = ExitManager()
-        self.db = SQLiteCache("/app/state/data.db")
+        self.db = SQLiteCache(
+            db_path,
+            write_behind=os.getenv("DB_WRITE_BEHIND", "1") == "1",
+            flush_ms=int(os.getenv("DB_FLUSH_MS", "200")),
+            flush_rows=int(os.getenv("DB_FLUSH_ROWS", "500")),
+            clock=self.clock,
+            retention_days=float(os.getenv("DB_RETENTION_DAYS", "7")),
+            maintenance_sec=float(os.getenv("DB_MAINT_SEC", "600")),
+            checkpoint_sec=float(os.getenv("DB_CHECKPOINT_SEC", "30")),
+        )
+        # all storage access from the event loop goes through the async facade
+        self.adb = AsyncSQLiteCache(self.db, max_pending=int(os.getenv("DB_MAX_PENDING", "2000")))
+        # closed unified_ticks partitions roll into a columnar archive; SQLite keeps the hot window
+        self.history = None
+        if os.getenv("HISTORY_ARCHIVE", "1") == "1":
+            self.history = HistoryWriter(
+                db_path,
+                os.getenv("HISTORY_DIR", os.path.join(os.path.dirname(db_path), "history")),
+                partition=os.getenv("HISTORY_PARTITION", "hour"),
+                hot_sec=float(os.getenv("HOT_HOURS", "24")) * 3600,
+                clock=self.clock,
+            )
+        # change-only persistence: unified rows and feature/rank rows are written when a
+        # tracked field moves past its tolerance or DB_HEARTBEAT_SEC after the last write
+        self.unified_filter = self.feature_filter = None
+        if os.getenv("DB_DELTA_FILTER", "1") == "1":
+            heartbeat = float(os.getenv("DB_HEARTBEAT_SEC", "15"))
+            self.unified_filter = DeltaFilter(parse_tolerances(os.getenv("DB_DELTA_UNIFIED", UNIFIED_TOLERANCES)), heartbeat)
+            self.feature_filter = DeltaFilter(parse_tolerances(os.getenv("DB_DELTA_FEATURES", FEATURE_TOLERANCES)), heartbeat)
+        self.loop_lag = LoopLagMonitor()
+        # open positions held in memory, written through to the positions table
+        self.positions = PositionBook(self.adb, flush_sec=float(os.getenv("BEST_LOW_FLUSH_SEC", "2.0")), clock=self.clock)
         
+        # anti-spam / cooldowns
+        self.ENTRY_COOLDOWN_SEC = int(os.getenv("ENTRY_COOLDOWN_SEC", "300"))  # prevent multiple signals for same sym in short time
+        self.DEDUP_WINDOW_SEC = 900
+        # single in-memory index for entry cooldowns, dedup hashes and Telegram send cooldowns
+        self.cooldowns = CooldownIndex(ttl_sec=max(self.DEDUP_WINDOW_SEC, self.ENTRY_COOLDOWN_SEC, TelegramNotifier.COOLDOWN_SEC),
+                                       clock=self.clock)
+
         token = os.getenv("TELEGRAM_TOKEN", "")
         chat_id_str = os.getenv("TELEGRAM_CHAT_ID", "0")
         chat_id = int(chat_id_str) if chat_id_str.isdigit() else 0
-        self.tg = TelegramNotifier(token, chat_id)
+        self.tg = TelegramNotifier(token, chat_id, cooldowns=self.cooldowns, clock=self.clock)
         
         # rolling state per symbol (normalize to single sym key)
         self.last_price: dict[str, float] = {}
-        self.price_window: dict[str, deque] = defaultdict(lambda: deque(maxlen=120))
+        # 60s high/low drive near_resistance/near_support; extra horizons via PRICE_HORIZONS (seconds)
+        extra = [float(h) for h in os.getenv("PRICE_HORIZONS", "").split(",") if h.strip()]
+        self.PRICE_HORIZONS = tuple(sorted({60.0, *extra}))
+        self.price_window: dict[str, PriceWindow] = defaultdict(lambda: PriceWindow(120, self.PRICE_HORIZONS))
         self.last_oi_val: dict[str, float] = {}
         self.features_cache: dict[str, dict] = {}
-        self.in_position: set[str] = set()
-        # trailing state managed via DB (best_low) and in-memory activation flags
-        self._trail_active: set[str] = set()
+        # funding/OI REST polling, prioritized by staleness and current score
+        self.poller = FundingOIPoller(
+            self.hub,
+            score_fn=lambda sym: self.features_cache.get(sym, {}).get("score", 0.0),
+            hot_fn=self._hotness,
+        )
         # latest per-exchange prices per symbol: {sym: {ex: (ts, price)}}
         self._ex_latest: dict[str, dict[str, tuple[float, float]]] = defaultdict(dict)
         
@@ -60,20 +115,24 @@ class Orchestrator:
         self.SCORE_MIN = int(os.getenv("SCORE_MIN", "60"))
         self.MAX_PRICE = float(os.getenv("MAX_PRICE", "5.0"))
 
-        # anti-spam / cooldowns
-        self.ENTRY_COOLDOWN_SEC = int(os.getenv("ENTRY_COOLDOWN_SEC", "300"))  # prevent multiple signals for same sym in short time
-        self._last_entry_ts: dict[str, float] = {}
-
         # trailing configuration (percent values)
         self.TRAIL_ACTIVATE_PCT = float(os.getenv("TRAIL_ACTIVATE_PCT", "0.6"))  # activate after >=0.6% unrealized
         self.TRAIL_GIVEBACK_PCT = float(os.getenv("TRAIL_GIVEBACK_PCT", "0.4")) # exit if giveback from peak >=0.4%
         self.HARD_STOP_LOSS_PCT = float(os.getenv("HARD_STOP_LOSS_PCT", "1.2"))  # cut if loss >=1.2%
 
+    def _hotness(self, sym: str) -> float:
+        """0..1 poll priority: open positions are hottest, then score vs threshold and volatility burst."""
+        if sym in self.positions:
+            return 1.0
+        f = self.features_cache.get(sym) or {}
+        return max(min(1.0, float(f.get("score", 0.0) or 0.0) / max(1, self.SCORE_MIN)),
+                   float(f.get("volatility_burst", 0.0) or 0.0))
+
     def _update_ex_price(self, ex: str, sym: str, ts: float, price: float):
         self._ex_latest[sym][ex] = (ts, float(price))
 
     def _cross_ex_avg(self, sym: str, max_age_sec: int = 120) -> float | None:
-        now = time.time()
+        now = self.clock.time()
         entries = self._ex_latest.get(sym, {})
         vals = [p for (t, p) in entries.values() if (now - t) <= max_age_sec and p > 0]
         if not vals:
@@ -88,29 +147,70 @@ class Orchestrator:
                 logger.debug(f"BTC regime poll failed: {e}")
             await asyncio.sleep(30)
 
+    async def _warm_cooldowns(self):
+        rows = await self.adb.recent_signals(self.clock.time() - self.cooldowns.ttl_sec)
+        for ts, sym, dh, sig_type in rows:
+            # only entries gate new signals; exits are recorded for history
+            if (sig_type or "entry") == "entry":
+                self.cooldowns.touch((sym, "entry"), ts)
+            if dh:
+                self.cooldowns.touch((sym, dh), ts)
+        logger.info(f"Cooldown index warmed from {len(rows)} recent signals")
+
+    async def _stats_loop(self):
+        while True:
+            await asyncio.sleep(60)
+            lag = self.loop_lag.snapshot()
+            io = self.adb.stats()
+            logger.info(
+                f"Event loop lag: p50={lag['p50_ms']:.1f}ms p99={lag['p99_ms']:.1f}ms max={lag['max_ms']:.1f}ms | "
+                f"DB io: pending={io['pending']} calls={io['calls']} backpressure={io['backpressure']}"
+            )
+            st = self.db.writer_stats()
+            if st["write_behind"]:
+                logger.info(
+                    f"DB writer: backlog={st['backlog']} last_batch={st['last_batch']} max_batch={st['max_batch']} "
+                    f"last_flush={st['last_flush_ms']:.1f}ms max_flush={st['max_flush_ms']:.1f}ms "
+                    f"rows={st['flushed_rows']} dropped={st['dropped']} retries={st['retries']} errors={st['errors']}"
+                )
+            ms = self.db.maintenance_stats()
+            logger.info(
+                f"DB maintenance: wal={ms['wal_mb']:.1f}MB checkpoints={ms['checkpoints']} "
+                f"last_ckpt={ms['last_checkpoint_ms']:.1f}ms max_ckpt={ms['max_checkpoint_ms']:.1f}ms "
+                f"dropped_partitions={ms['dropped_partitions']} vacuumed_pages={ms['vacuumed_pages']} errors={ms['errors']}"
+            )
+            for name, flt in (("unified", self.unified_filter), ("features", self.feature_filter)):
+                if flt is not None:
+                    fs = flt.stats()
+                    logger.info(
+                        f"Delta filter {name}: seen={fs['seen']} written={fs['written']} "
+                        f"(changed={fs['changed']} heartbeats={fs['heartbeats']}) ratio={fs['ratio']:.1f}x"
+                    )
+            for ex, ps in self.poller.stats().items():
+                logger.info(
+                    f"Funding/OI {ex}: cycle={ps['cycle_sec']:.1f}s symbols={ps['symbols']} requests={ps['requests']} polled={ps['polled']} "
+                    f"errors={ps['errors']} rate_limited={ps['rate_limited']} rate={ps['rate']:.1f}/s | "
+                    f"age p50={ps['age_p50']:.0f}s p90={ps['age_p90']:.0f}s max={ps['age_max']:.0f}s"
+                )
+                if "queue" in ps:
+                    qs = ps["queue"]
+                    logger.info(
+                        f"OI queue {ex}: symbols={qs['size']} hot={qs['hot']} "
+                        f"demand={qs['demand_per_min']:.0f}/min scale={qs['scale']:.2f}"
+                    )
+            for url, rs in rest_client.pool_stats().items():
+                logger.info(
+                    f"REST {url}: requests={rs['requests']} errors={rs['errors']} in_flight={rs['in_flight']} "
+                    f"reuse={rs['reuse_ratio']:.2f} conns={rs['conn_created']} latency={rs['latency_ms']}"
+                )
+
     def _compute_near_resistance(self, sym: str) -> float:
         win = self.price_window.get(sym)
-        if not win or len(win) < 5:
-            return 1.0
-        last_ts, last_p = win[-1]
-        cutoff = last_ts - 60
-        highs = [p for ts, p in win if ts >= cutoff]
-        if not highs:
-            return 1.0
-        mx = max(highs)
-        if last_p <= 0:
-            return 1.0
-        return max(0.0, (mx - last_p) / last_p)
+        return win.near_resistance(60) if win is not None else 1.0
 
     def _recent_return(self, sym: str) -> float:
         win = self.price_window.get(sym)
-        if not win or len(win) < 2:
-            return 0.0
-        p0 = win[-2][1]
-        p1 = win[-1][1]
-        if p0 <= 0:
-            return 0.0
-        return (p1 - p0) / p0
+        return win.recent_return() if win is not None else 0.0
 
     def _dedup_hash(self, sym: str, price: float, score: float, feats: dict) -> str:
         keys = [
@@ -124,26 +224,20 @@ class Orchestrator:
         s = json.dumps(snap, sort_keys=True)
         return hashlib.sha1(s.encode()).hexdigest()
 
-    def _check_trailing(self, sym: str, price: float):
-        pos = self.db.get_open_position(sym)
+    async def _check_trailing(self, sym: str, price: float):
+        pos = self.positions.get(sym)
         if not pos:
-            self._trail_active.discard(sym)
             return
-        entry = float(pos["entry_price"])
-        best_low = float(pos.get("best_low") or entry)
+        entry = pos["entry_price"]
+        best_low = pos["best_low"] or entry
         should_exit, reason, pnl_pct, updated_best_low, trail_active = self.exit.trailing_for_short(entry, price, best_low)
         if updated_best_low != best_low:
-            self.db.update_best_low(sym, updated_best_low)
-        if trail_active:
-            self._trail_active.add(sym)
-        else:
-            self._trail_active.discard(sym)
+            self.positions.update_best_low(sym, updated_best_low)
+        pos["trail_active"] = trail_active
         if should_exit:
-            self.db.close_position(sym, price, reason)
-            if sym in self.in_position:
-                self.in_position.discard(sym)
-            self._trail_active.discard(sym)
-            self.db.store_signal(sym, pnl_pct, price, f"exit_{reason}", time.time(), None, "exit")
+            now_ts = self.clock.time()
+            self.positions.close(sym, price, reason, now_ts)
+            await self.adb.store_signal(sym, pnl_pct, price, f"exit_{reason}", now_ts, None, "exit")
             # Notify Telegram about exit (non-blocking)
             try:
                 asyncio.create_task(self.tg.send_exit(sym, reason, price, pnl_pct))
@@ -151,127 +245,144 @@ class Orchestrator:
                 pass
             logger.info(f"EXIT ({reason.upper()}): {sym} @ ${price:.6f} pnl={pnl_pct:.2f}%")
 
-    async def _consume(self):
-        while True:
-            ev = await self.hub.queue.get()
-            et = ev.get("type")
-            if et != "unified":
-                continue
-            data = ev.get("data") or {}
-            sym = data.get("symbol") or data.get("sym")
-            if not sym or sym not in self._allowed:
-                continue
+    async def process(self, ev: dict):
+        """Handle one hub event: persist, update state, score and emit entries/exits."""
+        et = ev.get("type")
+        if et != "unified":
+            return
+        data = ev.get("data") or {}
+        sym = data.get("symbol") or data.get("sym")
+        if not sym or sym not in self._allowed:
+            return
+        try:
+            ts = float(data.get("timestamp") or self.clock.time())
+            price = data.get("price") or data.get("mark")
+            price = float(price) if price is not None else None
+            spread = data.get("spread")
+            depth = data.get("depth") or {}
+            bid_total = depth.get("bid_total")
+            ask_total = depth.get("ask_total")
+            funding_rate = data.get("funding")
+            oi_val = data.get("oi")
+
+            # Persist unified row (only on change or heartbeat)
             try:
-                ts = float(data.get("timestamp") or time.time())
-                price = data.get("price") or data.get("mark")
-                price = float(price) if price is not None else None
-                spread = data.get("spread")
-                depth = data.get("depth") or {}
-                bid_total = depth.get("bid_total")
-                ask_total = depth.get("ask_total")
-                funding_rate = data.get("funding")
-                oi_val = data.get("oi")
-
-                # Persist unified row
-                try:
-                    self.db.store_unified(data)
-                except Exception:
-                    pass
+                flt = self.unified_filter
+                if flt is None or flt.should_write(sym, data, ts):
+                    if await self.adb.store_unified(data) and flt is not None:
+                        flt.written(sym)
+            except Exception:
+                pass
+
+            # Update price state and trailing
+            if price and price > 0:
+                self.last_price[sym] = float(price)
+                self.price_window[sym].append(ts, float(price))
+                self.vol_idx[sym].ingest_mark(ts, float(price))
+                await self._check_trailing(sym, float(price))
+
+            # Build features from unified metrics
+            gap_above = self.liq.void_above_from_unified(depth)
+            feats_ms = self.ms.features_from_unified(price, spread, bid_total, ask_total, gap_above)
+            base = self.features_cache.get(sym, {})
+            base.update(feats_ms)
+
+            # Funding impulse
+            base["funding_impulse"] = self.funding.impulse(funding_rate)
+
+            # OI divergence
+            if oi_val is not None:
+                prev_oi = self.last_oi_val.get(sym)
+                div = self.oi.divergence(float(oi_val), prev_oi) if prev_oi is not None else 0.0
+                self.last_oi_val[sym] = float(oi_val)
+                base["oi_divergence"] = max(0.0, div)
+                base["oi_rising"] = div > 0
 
-                # Update price state and trailing
-                if price and price > 0:
-                    self.last_price[sym] = float(price)
-                    self.price_window[sym].append((ts, float(price)))
-                    self.vol_idx[sym].ingest_mark(ts, float(price))
-                    self._check_trailing(sym, float(price))
-
-                # Build features from unified metrics
-                feats_ms = self.ms.features_from_unified(price, spread, bid_total, ask_total)
-                feats_ms["gap_above"] = self.liq.void_above_from_unified()
-                base = self.features_cache.get(sym, {})
-                base.update(feats_ms)
-
-                # Funding impulse
-                base["funding_impulse"] = self.funding.impulse(funding_rate)
-
-                # OI divergence
-                if oi_val is not None:
-                    prev_oi = self.last_oi_val.get(sym)
-                    div = self.oi.divergence(float(oi_val), prev_oi) if prev_oi is not None else 0.0
-                    self.last_oi_val[sym] = float(oi_val)
-                    base["oi_divergence"] = max(0.0, div)
-                    base["oi_rising"] = div > 0
-
-                # Decision pass
-                last_p = self.last_price.get(sym)
-                if last_p is None or last_p <= 0:
-                    self.features_cache[sym] = base
-                    continue
-
-                eligible = self.selector.eligible({sym: last_p}, max_price=self.MAX_PRICE)
-                if sym not in eligible:
-                    self.features_cache[sym] = base
-                    continue
-
-                # No per-ex trades available in unified path; set sweep metric conservative
-                base["sweep_rejection"] = 0.0
-
-                burst = self.vol_idx[sym].burst(60)
-                base["volatility_burst"] = burst
-
-                r = self._recent_return(sym)
-                short_mom = max(0.0, -r) / 0.003
-                short_mom = max(0.0, min(1.0, short_mom))
-                base["short_momentum"] = short_mom
-
-                btc_pump = self.btc.alignment()
-                base["btc_alignment"] = max(0.0, min(1.0, 1.0 - btc_pump))
-                base["btc_not_pumping"] = btc_pump < 0.4
-
-                base["price_falling"] = r < 0
-                base["liquidity_gap_above"] = base.get("gap_above", 0.0)
-                base["spread_not_collapsing"] = base.get("spread_pct", 0.0) > 0.00005
-                base["near_resistance"] = self._compute_near_resistance(sym)
-
-                # Normalized features for scorer
-                base["liquidity_pressure"] = max(0.0, min(1.0, base.get("gap_above", 0.0) / 0.002))
-                base["orderflow_imbalance"] = max(0.0, min(1.0, base.get("ask_dom", 0.5)))
-
-                score = self.scorer.score(base)
-                base["score"] = score
+            # Decision pass
+            last_p = self.last_price.get(sym)
+            if last_p is None or last_p <= 0:
                 self.features_cache[sym] = base
+                return
+
+            eligible = self.selector.eligible({sym: last_p}, max_price=self.MAX_PRICE)
+            if sym not in eligible:
+                self.features_cache[sym] = base
+                return
+
+            # Streaming aggressor-imbalance estimate from the hub's normalized trades
+            base["sweep_rejection"] = float(data.get("sweep_rejection") or 0.0)
+
+            burst = self.vol_idx[sym].burst(60)
+            base["volatility_burst"] = burst
+
+            r = self._recent_return(sym)
+            short_mom = max(0.0, -r) / 0.003
+            short_mom = max(0.0, min(1.0, short_mom))
+            base["short_momentum"] = short_mom
 
-                # Store features and rank
-                now_ts = time.time()
-                self.db.store_features(sym, json.dumps(base), now_ts)
+            btc_pump = self.btc.alignment()
+            base["btc_alignment"] = max(0.0, min(1.0, 1.0 - btc_pump))
+            base["btc_not_pumping"] = btc_pump < 0.4
+
+            base["price_falling"] = r < 0
+            base["liquidity_gap_above"] = base.get("gap_above", 0.0)
+            base["spread_not_collapsing"] = base.get("spread_pct", 0.0) > 0.00005
+            win = self.price_window[sym]
+            base["near_resistance"] = self._compute_near_resistance(sym)
+            base["near_support"] = win.near_support(60)
+            for h in self.PRICE_HORIZONS:
+                if h != 60:
+                    base[f"near_resistance_{h:g}s"] = win.near_resistance(h)
+                    base[f"near_support_{h:g}s"] = win.near_support(h)
+
+            # Normalized features for scorer
+            base["liquidity_pressure"] = max(0.0, min(1.0, base.get("gap_above", 0.0) / 0.002))
+            base["orderflow_imbalance"] = max(0.0, min(1.0, base.get("ask_dom", 0.5)))
+
+            score = self.scorer.score(base)
+            base["score"] = score
+            self.features_cache[sym] = base
+
+            # Store features and rank (only on change or heartbeat)
+            now_ts = self.clock.time()
+            flt = self.feature_filter
+            if flt is None or flt.should_write(sym, base, now_ts):
+                if await self.adb.store_features(sym, base, now_ts) and flt is not None:
+                    flt.written(sym)
                 try:
-                    self.db.store_rank(sym, float(score), now_ts)
+                    await self.adb.store_rank(sym, float(score), now_ts)
                 except Exception:
                     pass
 
-                # Entry check
-                microstructure_dict = {k: v for k, v in base.items() if k in ["ask_dom", "bid_dom", "spread_pct"]}
-                if self.entry.should_short(base, microstructure_dict, sym):
-                    if sym not in self.in_position and score >= self.SCORE_MIN:
-                        now_ts = time.time()
-                        last_ts = self._last_entry_ts.get(sym, 0)
-                        if (now_ts - last_ts) < self.ENTRY_COOLDOWN_SEC or self.db.seen_recent_symbol_signal(sym, self.ENTRY_COOLDOWN_SEC, 'entry'):
-                            logger.info(f"COOLDOWN: skip entry for {sym} (cooldown {self.ENTRY_COOLDOWN_SEC}s)")
-                            continue
-                        dh = self._dedup_hash(sym, last_p, score, base)
-                        if not self.db.seen_recent_signal(sym, dh, window_sec=900):
-                            self.in_position.add(sym)
-                            self.db.open_position(sym, float(last_p))
-                            self.db.store_signal(sym, float(score), float(last_p), "entry", time.time(), dh, "entry")
-                            self._last_entry_ts[sym] = now_ts
-                            asyncio.create_task(self.tg.send_signal(sym, score, last_p, base))
-                            logger.info(f"SHORT SIGNAL: {sym} @ ${last_p:.6f} score={score:.1f}")
-                        else:
-                            logger.info(f"DEDUP: skipped duplicate signal for {sym}")
-            except Exception as e:
-                logger.debug(f"Orchestrator consume error on unified {sym}: {e}")
+            # Entry check
+            microstructure_dict = {k: v for k, v in base.items() if k in ["ask_dom", "bid_dom", "spread_pct"]}
+            if self.entry.should_short(base, microstructure_dict, sym):
+                if sym not in self.positions and score >= self.SCORE_MIN:
+                    now_ts = self.clock.time()
+                    if self.cooldowns.seen((sym, "entry"), self.ENTRY_COOLDOWN_SEC, now_ts):
+                        logger.info(f"COOLDOWN: skip entry for {sym} (cooldown {self.ENTRY_COOLDOWN_SEC}s)")
+                        return
+                    dh = self._dedup_hash(sym, last_p, score, base)
+                    if not self.cooldowns.seen((sym, dh), self.DEDUP_WINDOW_SEC, now_ts):
+                        self.positions.open(sym, float(last_p), now_ts)
+                        self.cooldowns.touch((sym, "entry"), now_ts)
+                        self.cooldowns.touch((sym, dh), now_ts)
+                        await self.adb.store_signal(sym, float(score), float(last_p), "entry", now_ts, dh, "entry")
+                        asyncio.create_task(self.tg.send_signal(sym, score, last_p, base))
+                        logger.info(f"SHORT SIGNAL: {sym} @ ${last_p:.6f} score={score:.1f}")
+                    else:
+                        logger.info(f"DEDUP: skipped duplicate signal for {sym}")
+        except Exception as e:
+            logger.debug(f"Orchestrator consume error on unified {sym}: {e}")
+
+    async def _consume(self):
+        while True:
+            ev = await self.hub.queue.get()
+            await self.process(ev)
 
     async def run(self):
+        await self.positions.warm()
+        await self._warm_cooldowns()
         # Start hub (non-blocking now - just creates tasks)
         await self.hub.start()
         
@@ -279,5 +390,22 @@ class Orchestrator:
         all_tasks = self.hub._tasks + [
             asyncio.create_task(self._btc_loop()),
             asyncio.create_task(self._consume()),
+            asyncio.create_task(self._stats_loop()),
+            asyncio.create_task(self.loop_lag.run()),
+            asyncio.create_task(self.positions.run()),
+            asyncio.create_task(self.poller.run()),
         ]
-        await asyncio.gather(*all_tasks)
+        if self.history is not None:
+            all_tasks.append(asyncio.create_task(self.history.run()))
+        try:
+            await asyncio.gather(*all_tasks)
+        finally:
+            try:
+                await asyncio.wait_for(self.positions.drain(), timeout=5)
+            except Exception as e:
+                logger.warning(f"PositionBook drain on shutdown failed: {e}")
+            await rest_client.close_all()
+            if self.hub.recorder is not None:
+                self.hub.recorder.close()
+            # Drain queued storage calls and flush buffered rows before exiting
+            self.adb.close()
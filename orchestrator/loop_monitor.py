@@ -0,0 +1,33 @@
+import asyncio
+from collections import deque
+from typing import Deque
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag as the oversleep of a short periodic timer."""
+
+    def __init__(self, interval: float = 0.1, window: int = 3000):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)  # lag in ms
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - t0 - self.interval
+            self.samples.append(max(0.0, lag) * 1000.0)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        xs = sorted(self.samples)
+        idx = min(len(xs) - 1, int(round(q / 100.0 * (len(xs) - 1))))
+        return xs[idx]
+
+    def snapshot(self) -> dict:
+        return {
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": max(self.samples) if self.samples else 0.0,
+        }
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket with adaptive backoff.
+
+    `rate` tokens per second refill up to `capacity`; acquire(weight) waits
+    until enough tokens are available. On a rate-limit response backoff()
+    halves the effective rate and pauses the bucket (doubling on repeats);
+    each success nudges the rate back towards its configured value.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None,
+                 min_pause_sec: float = 5.0, max_pause_sec: float = 120.0):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.min_pause_sec = min_pause_sec
+        self.max_pause_sec = max_pause_sec
+        self._pause = min_pause_sec
+        self._paused_until = 0.0
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+        self.backoffs = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self, weight: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self.waits += 1
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                self.waits += 1
+                await asyncio.sleep((weight - self.tokens) / self.rate)
+
+    def backoff(self):
+        now = time.monotonic()
+        if now < self._paused_until:
+            # already backing off; concurrent failures from the same burst count once
+            return
+        self.backoffs += 1
+        self.rate = max(self.base_rate / 16.0, self.rate / 2.0)
+        self.tokens = 0.0
+        self._last = now
+        self._paused_until = now + self._pause
+        self._pause = min(self.max_pause_sec, self._pause * 2.0)
+
+    def success(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 50.0)
+        elif self._pause > self.min_pause_sec:
+            self._pause = self.min_pause_sec
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "base_rate": self.base_rate,
+            "tokens": self.tokens,
+            "waits": self.waits,
+            "backoffs": self.backoffs,
+            "paused": time.monotonic() < self._paused_until,
+        }
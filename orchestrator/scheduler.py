@@ -0,0 +1,371 @@
+import asyncio
+import heapq
+import time
+from typing import Callable, Dict, List, Optional
+from loguru import logger
+from data_fetcher import binance_rest, bybit_rest, mexc_rest, lbank_rest
+from data_fetcher.rest_client import RESTStatusError
+from .rate_limiter import TokenBucket
+
+# Per-venue REST budgets. `rate` is requests/sec refilled into the bucket, `weight` the
+# cost of one per-symbol request and `bulk_weight` the cost of the whole-market call.
+# Binance /futures/data is capped at 1000 req/5min per IP; Bybit allows 600 req/5s;
+# MEXC 20 req/2s.
+VENUES: Dict[str, dict] = {
+    "binance": {"rate": 3.0, "weight": 1, "bulk_weight": 3, "concurrency": 8},
+    "bybit": {"rate": 20.0, "weight": 1, "bulk_weight": 1, "concurrency": 16},
+    "mexc": {"rate": 8.0, "weight": 1, "bulk_weight": 1, "concurrency": 8},
+    "lbank": {"rate": 5.0, "weight": 1, "concurrency": 4},
+}
+# Metrics each venue provides, and the subset that still needs a per-symbol request
+FIELDS = {
+    "binance": ("funding_ts", "oi_ts"),
+    "bybit": ("funding_ts", "oi_ts"),
+    "mexc": ("funding_ts",),
+    "lbank": ("funding_ts",),
+}
+PER_SYMBOL_FIELDS = {
+    "binance": ("oi_ts",),
+    "lbank": ("funding_ts",),
+}
+
+
+class OIPriorityQueue:
+    """Heap of (next_due, symbol) with per-symbol intervals scaled to a fixed budget.
+
+    A symbol's base interval shrinks from `max_interval` towards `min_interval`
+    as its hotness (0..1) rises. When the summed request rate of all base
+    intervals exceeds `budget_per_min`, every interval is stretched by the same
+    factor, so the request rate stays at the budget and relative priorities
+    are kept.
+    """
+
+    def __init__(self, budget_per_min: float, min_interval: float = 12.0, max_interval: float = 300.0):
+        self.budget_per_min = budget_per_min
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.scale = 1.0
+        self._heap: List[tuple] = []
+        self._due: Dict[str, float] = {}
+        self._hot: Dict[str, float] = {}
+        self._last: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def base_interval(self, hot: float) -> float:
+        hot = max(0.0, min(1.0, hot))
+        return self.min_interval + (self.max_interval - self.min_interval) * (1.0 - hot) ** 2
+
+    def interval(self, sym: str) -> float:
+        return self.base_interval(self._hot.get(sym, 0.0)) * self.scale
+
+    def sync(self, symbols: List[str], hot: Dict[str, float], now: float):
+        """Track exactly `symbols` with refreshed hotness; new symbols are due now."""
+        wanted = set(symbols)
+        for sym in list(self._due):
+            if sym not in wanted:
+                # heap entry is dropped lazily when popped
+                del self._due[sym]
+                self._hot.pop(sym, None)
+                self._last.pop(sym, None)
+        for sym in wanted:
+            h = float(hot.get(sym, 0.0))
+            old = self._hot.get(sym)
+            self._hot[sym] = h
+            if sym not in self._due:
+                self._push(sym, now)
+            elif old is not None and h > old and sym in self._last:
+                # heated up: pull the next poll forward to match the shorter interval
+                due = self._last[sym] + self.interval(sym)
+                if due < self._due[sym]:
+                    self._push(sym, max(now, due))
+        demand = sum(60.0 / self.base_interval(h) for h in self._hot.values())
+        self.scale = max(1.0, demand / self.budget_per_min) if self.budget_per_min > 0 else 1.0
+
+    def _push(self, sym: str, due: float):
+        self._due[sym] = due
+        heapq.heappush(self._heap, (due, sym))
+
+    def next_due(self) -> float | None:
+        while self._heap:
+            due, sym = self._heap[0]
+            if self._due.get(sym) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> str | None:
+        due = self.next_due()
+        if due is None or due > now:
+            return None
+        _, sym = heapq.heappop(self._heap)
+        self._last[sym] = now
+        # reschedule immediately so a slow request can't cause a double poll
+        self._push(sym, now + self.interval(sym))
+        return sym
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._due),
+            "scale": self.scale,
+            "demand_per_min": sum(60.0 / self.interval(s) for s in self._due),
+            "hot": sum(1 for h in self._hot.values() if h >= 0.5),
+        }
+
+
+def _pct(vals: List[float], q: float) -> float:
+    if not vals:
+        return 0.0
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+class FundingOIPoller:
+    """Concurrent funding/OI poller feeding DataHub, one loop per exchange.
+
+    Each cycle first pulls the whole market from the venue's bulk endpoint
+    (if any) and fans it out to the universe. Data without a bulk endpoint is
+    then fetched per symbol, ordered by staleness weighted by current score,
+    under the venue's token bucket and concurrency cap. Binance OI history is
+    instead driven continuously by an OIPriorityQueue, so hot symbols and open
+    positions refresh every ~12s while dormant ones fall back to minutes.
+    Rate-limit responses (429/418) back the bucket off; other 4xx on Binance
+    drop the symbol for the session.
+    """
+
+    def __init__(self, hub, score_fn: Optional[Callable[[str], float]] = None,
+                 hot_fn: Optional[Callable[[str], float]] = None,
+                 interval_sec: float = 60.0, venues: Optional[Dict[str, dict]] = None,
+                 oi_min_interval: float = 12.0, oi_max_interval: float = 300.0):
+        self.hub = hub
+        self.score_fn = score_fn or (lambda sym: 0.0)
+        self.hot_fn = hot_fn or (lambda sym: 0.0)
+        self.interval_sec = interval_sec
+        self.venues = venues or VENUES
+        self.buckets = {
+            ex: TokenBucket(cfg["rate"], capacity=max(cfg["rate"], cfg.get("bulk_weight", 1)))
+            for ex, cfg in self.venues.items()
+        }
+        self._sems = {ex: asyncio.Semaphore(cfg["concurrency"]) for ex, cfg in self.venues.items()}
+        self._stats: Dict[str, dict] = {
+            ex: {"cycles": 0, "cycle_sec": 0.0, "requests": 0, "polled": 0, "errors": 0, "rate_limited": 0}
+            for ex in self.venues
+        }
+        self._bulk = {
+            "binance": self._bulk_binance,
+            "bybit": self._bulk_bybit,
+            "mexc": self._bulk_mexc,
+        }
+        self._fetch = {
+            "binance": self._poll_binance,
+            "lbank": self._poll_lbank,
+        }
+        # per-symbol Binance OI runs off a due-time heap instead of the 60s cycle;
+        # its budget is the bucket rate minus the bulk call, with 10% headroom
+        self._queues: Dict[str, OIPriorityQueue] = {}
+        if "binance" in self.venues:
+            cfg = self.venues["binance"]
+            budget = (cfg["rate"] * 60.0 - cfg.get("bulk_weight", 0) * 60.0 / interval_sec) * 0.9 / cfg["weight"]
+            self._queues["binance"] = OIPriorityQueue(budget, oi_min_interval, oi_max_interval)
+        self._inflight: set = set()
+
+    # --- symbol selection ---
+    def _symbols(self, ex: str) -> List[str]:
+        return list(self.hub.universe.get(ex, []))
+
+    def _per_symbol(self, ex: str) -> List[str]:
+        if ex == "binance":
+            # Only query Binance per-symbol REST for symbols we have actually seen on WS
+            return sorted(self.hub._binance_observed - self.hub._binance_skip)
+        return self._symbols(ex)
+
+    def _last_ts(self, ex: str, sym: str, fields=None) -> float:
+        m = self.hub.metrics.get(self.hub._canon(ex, sym), {}).get(ex)
+        if not m:
+            return 0.0
+        return min(m.get(f, 0.0) for f in (fields or FIELDS[ex]))
+
+    def _prioritize(self, ex: str, syms: List[str]) -> List[str]:
+        now = time.time()
+        fields = PER_SYMBOL_FIELDS.get(ex)
+
+        def prio(sym: str) -> float:
+            ts = self._last_ts(ex, sym, fields)
+            age = now - ts if ts else float("inf")
+            try:
+                score = float(self.score_fn(self.hub._canon(ex, sym)) or 0.0)
+            except Exception:
+                score = 0.0
+            return age * (1.0 + max(0.0, score) / 50.0)
+
+        return sorted(syms, key=prio, reverse=True)
+
+    # --- bulk fetch + fan-out; each returns the symbols updated ---
+    async def _bulk_binance(self, wanted: set, ts: float) -> List[str]:
+        rows = await binance_rest.premium_index_all()
+        out = []
+        for r in rows if isinstance(rows, list) else []:
+            sym = r.get("symbol")
+            if sym in wanted:
+                self.hub._set_funding("binance", sym, ts, float(r.get("lastFundingRate", 0) or 0))
+                out.append(sym)
+        return out
+
+    async def _bulk_bybit(self, wanted: set, ts: float) -> List[str]:
+        data = await bybit_rest.tickers_all()
+        out = []
+        for r in data.get("result", {}).get("list", []):
+            sym = r.get("symbol")
+            if sym in wanted:
+                self.hub._set_funding("bybit", sym, ts, float(r.get("fundingRate") or 0))
+                self.hub._set_oi("bybit", sym, ts, float(r.get("openInterest") or 0))
+                out.append(sym)
+        return out
+
+    async def _bulk_mexc(self, wanted: set, ts: float) -> List[str]:
+        data = await mexc_rest.tickers_all()
+        rows = data.get("data") if isinstance(data, dict) else None
+        out = []
+        for r in rows if isinstance(rows, list) else []:
+            # contract tickers use BTC_USDT; the universe uses canonical BTCUSDT
+            sym = (r.get("symbol") or "").upper().replace("_USDT", "USDT")
+            if sym in wanted:
+                self.hub._set_funding("mexc", sym, ts, float(r.get("fundingRate") or 0))
+                out.append(sym)
+        return out
+
+    # --- per-symbol fetch + parse (no bulk endpoint) ---
+    async def _poll_binance(self, sym: str, ts: float):
+        oi = await binance_rest.open_interest_hist(sym)
+        if isinstance(oi, list) and oi:
+            last = oi[-1]
+            val = float(last.get("sumOpenInterestValue") or last.get("sumOpenInterest", 0) or 0)
+            self.hub._set_oi("binance", sym, ts, val)
+
+    async def _poll_lbank(self, sym: str, ts: float):
+        data = await lbank_rest.funding(sym)
+        rate = 0.0
+        if isinstance(data, dict) and data.get("result", False):
+            arr = data.get("data") or []
+            if arr:
+                rate = float(arr[-1].get("rate", 0))
+        self.hub._set_funding("lbank", sym, ts, rate)
+
+    def _on_status_error(self, ex: str, e: RESTStatusError) -> bool:
+        """Count a 4xx; returns True if it was a rate limit (bucket backed off)."""
+        st = self._stats[ex]
+        st["errors"] += 1
+        if not e.rate_limited:
+            return False
+        st["rate_limited"] += 1
+        bucket = self.buckets[ex]
+        bucket.backoff()
+        logger.warning(f"{ex} REST rate limited ({e.status}); backing off to {bucket.rate:.1f} req/s")
+        return True
+
+    async def _poll_bulk(self, ex: str):
+        bucket = self.buckets[ex]
+        st = self._stats[ex]
+        await bucket.acquire(self.venues[ex].get("bulk_weight", 1))
+        st["requests"] += 1
+        try:
+            updated = await self._bulk[ex](set(self._symbols(ex)), time.time())
+            bucket.success()
+        except RESTStatusError as e:
+            self._on_status_error(ex, e)
+            return
+        except Exception as e:
+            st["errors"] += 1
+            logger.debug(f"{ex} bulk funding/oi failed: {e}")
+            return
+        st["polled"] += len(updated)
+        for sym in updated:
+            self.hub._mark_dirty(self.hub._canon(ex, sym))
+
+    async def _poll_one(self, ex: str, sym: str, acquire: bool = True):
+        bucket = self.buckets[ex]
+        st = self._stats[ex]
+        async with self._sems[ex]:
+            if acquire:
+                await bucket.acquire(self.venues[ex]["weight"])
+            st["requests"] += 1
+            try:
+                await self._fetch[ex](sym, time.time())
+                bucket.success()
+                st["polled"] += 1
+                self.hub._mark_dirty(self.hub._canon(ex, sym))
+            except RESTStatusError as e:
+                if not self._on_status_error(ex, e) and ex == "binance":
+                    # symbol not listed on futures; skip further attempts this session
+                    self.hub._binance_skip.add(sym)
+            except Exception as e:
+                st["errors"] += 1
+                logger.debug(f"{ex} funding/oi for {sym} failed: {e}")
+
+    async def _run_venue(self, ex: str):
+        st = self._stats[ex]
+        while True:
+            t0 = time.monotonic()
+            try:
+                if ex in self._bulk:
+                    await self._poll_bulk(ex)
+                if ex in self._fetch and ex not in self._queues:
+                    syms = self._prioritize(ex, self._per_symbol(ex))
+                    await asyncio.gather(*(self._poll_one(ex, s) for s in syms))
+            except Exception as e:
+                logger.warning(f"{ex} funding/OI cycle error: {e}")
+            elapsed = time.monotonic() - t0
+            st["cycles"] += 1
+            st["cycle_sec"] = elapsed
+            await asyncio.sleep(max(1.0, self.interval_sec - elapsed))
+
+    def _hot(self, ex: str, sym: str) -> float:
+        try:
+            return max(0.0, min(1.0, float(self.hot_fn(self.hub._canon(ex, sym)) or 0.0)))
+        except Exception:
+            return 0.0
+
+    async def _run_queue(self, ex: str, resync_sec: float = 5.0):
+        q = self._queues[ex]
+        weight = self.venues[ex]["weight"]
+        last_sync = 0.0
+        while True:
+            now = time.time()
+            if now - last_sync >= resync_sec:
+                syms = self._per_symbol(ex)
+                q.sync(syms, {s: self._hot(ex, s) for s in syms}, now)
+                last_sync = now
+            due = q.next_due()
+            if due is None or due > now:
+                await asyncio.sleep(min(1.0, max(0.05, (due or now + 1.0) - now)))
+                continue
+            # pace on the bucket before popping so the most overdue symbol goes next
+            await self.buckets[ex].acquire(weight)
+            sym = q.pop_due(time.time())
+            if sym is None:
+                continue
+            task = asyncio.create_task(self._poll_one(ex, sym, acquire=False))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def run(self):
+        while self.hub.universe is None:
+            await asyncio.sleep(1)
+        await asyncio.gather(
+            *(self._run_venue(ex) for ex in self.venues),
+            *(self._run_queue(ex) for ex in self._queues),
+        )
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-exchange cycle stats plus age distribution (seconds) of the latest values."""
+        now = time.time()
+        out = {}
+        for ex, st in self._stats.items():
+            syms = self._symbols(ex) if self.hub.universe is not None else []
+            ages = [now - ts for ts in (self._last_ts(ex, s) for s in syms) if ts]
+            out[ex] = dict(st, symbols=len(syms), fresh=len(ages), age_p50=_pct(ages, 0.5), age_p90=_pct(ages, 0.9),
+                           age_max=max(ages) if ages else 0.0, rate=self.buckets[ex].rate)
+            if ex in self._queues:
+                out[ex]["queue"] = self._queues[ex].stats()
+        return out
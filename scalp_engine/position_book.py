@@ -0,0 +1,101 @@
+import asyncio
+from loguru import logger
+from storage.async_cache import AsyncSQLiteCache
+from data_fetcher.clock import system_clock
+
+
+class PositionBook:
+    """In-memory open positions keyed by symbol, written through to the DB.
+
+    positions[sym] = {'entry_ts', 'entry_price', 'best_low', 'trail_active'}
+    Opens and closes are queued to the storage thread immediately, so they
+    reach the DB in call order; best_low updates are coalesced and flushed
+    every `flush_sec`.
+    """
+
+    def __init__(self, store: AsyncSQLiteCache, flush_sec: float = 2.0, clock=None):
+        self.store = store
+        self.clock = clock or system_clock
+        self.flush_sec = flush_sec
+        self.positions: dict[str, dict] = {}
+        self._dirty_low: set[str] = set()
+        self._pending: set[asyncio.Future] = set()
+
+    def __contains__(self, sym: str) -> bool:
+        return sym in self.positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def get(self, sym: str) -> dict | None:
+        return self.positions.get(sym)
+
+    async def warm(self):
+        """Load OPEN rows from the positions table."""
+        rows = await self.store.load_open_positions()
+        for r in rows:
+            self.positions[r["sym"]] = {
+                "entry_ts": r["entry_ts"],
+                "entry_price": float(r["entry_price"]),
+                "best_low": float(r["best_low"]) if r.get("best_low") is not None else float(r["entry_price"]),
+                "trail_active": False,
+            }
+        if rows:
+            logger.info(f"PositionBook: loaded {len(self.positions)} open positions")
+
+    def open(self, sym: str, entry_price: float, entry_ts: float | None = None):
+        if entry_ts is None:
+            entry_ts = self.clock.time()
+        self.positions[sym] = {
+            "entry_ts": entry_ts,
+            "entry_price": float(entry_price),
+            "best_low": float(entry_price),
+            "trail_active": False,
+        }
+        self._persist(self.store.open_position(sym, float(entry_price), entry_ts))
+
+    def update_best_low(self, sym: str, best_low: float):
+        pos = self.positions.get(sym)
+        if pos is None:
+            return
+        pos["best_low"] = float(best_low)
+        self._dirty_low.add(sym)
+
+    def close(self, sym: str, exit_price: float, reason: str, exit_ts: float | None = None) -> dict | None:
+        pos = self.positions.pop(sym, None)
+        self._dirty_low.discard(sym)
+        if pos is None:
+            return None
+        self._persist(self.store.close_position(sym, exit_price, reason, exit_ts))
+        return pos
+
+    async def flush(self):
+        if not self._dirty_low:
+            return
+        dirty, self._dirty_low = self._dirty_low, set()
+        futs = [self.store.update_best_low(sym, self.positions[sym]["best_low"]) for sym in dirty if sym in self.positions]
+        if futs:
+            await asyncio.gather(*futs)
+
+    async def drain(self):
+        """Flush coalesced best_low values and wait for in-flight writes."""
+        await self.flush()
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_sec)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"PositionBook flush failed: {e}")
+
+    def _persist(self, fut: asyncio.Future):
+        self._pending.add(fut)
+        fut.add_done_callback(self._done)
+
+    def _done(self, fut: asyncio.Future):
+        self._pending.discard(fut)
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.warning(f"PositionBook write-through failed: {fut.exception()}")
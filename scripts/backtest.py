@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Backtest the short-entry pipeline over unified_ticks (see backtest/engine.py).
+
+Each --set is one parameter set, applied on top of the live defaults (env):
+  python scripts/backtest.py --db state/data.db --days 7 \\
+      --set SCORE_MIN=55 --set SCORE_MIN=65,TRAIL_GIVEBACK_PCT=0.3 --set w.oi_divergence=30
+Weights are addressed as w.<feature>. Prints PnL, hit rate and exit-reason
+breakdown per set; --trades writes every simulated trade to CSV.
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest.engine import default_params, run_backtest
+
+
+def parse_set(spec: str) -> dict:
+    p = default_params()
+    for kv in filter(None, spec.split(",")):
+        k, v = kv.split("=", 1)
+        k = k.strip()
+        if k.startswith("w."):
+            p["weights"][k[2:]] = float(v)
+        elif k in p:
+            p[k] = float(v)
+        else:
+            raise SystemExit(f"unknown parameter {k!r}")
+    return p
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized backtest over unified_ticks")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), "..", "state", "data.db"))
+    parser.add_argument("--archive", default=os.path.join(os.path.dirname(__file__), "..", "state", "history"),
+                        help="tick archive dir (storage/history_writer.py); ignored if missing")
+    parser.add_argument("--days", type=float, default=None, help="only the last N days")
+    parser.add_argument("--symbols", default="", help="comma-separated subset")
+    parser.add_argument("--set", action="append", default=[], help="K=V[,K=V...] parameter set (repeatable)")
+    parser.add_argument("--trades", help="write all trades to this CSV")
+    args = parser.parse_args()
+
+    sets = [parse_set(s) for s in args.set] or [default_params()]
+    since = time.time() - args.days * 86400 if args.days else None
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or None
+    t0 = time.perf_counter()
+    archive = args.archive if os.path.isdir(args.archive) else None
+    results = run_backtest(args.db, sets, symbols=symbols, since=since, archive_dir=archive)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{'set':>3} {'trades':>7} {'hit%':>6} {'pnl_sum%':>10} {'pnl_avg%':>9} {'worst%':>8}  exits  | params")
+    for i, (p, s, _) in enumerate(results):
+        exits = " ".join(f"{k}={v}" for k, v in sorted(s["exits"].items()))
+        spec = args.set[i] if i < len(args.set) else "defaults"
+        print(f"{i:>3} {s['trades']:>7} {s['hit_rate'] * 100:>6.1f} {s['pnl_sum']:>10.2f} {s['pnl_avg']:>9.3f} "
+              f"{s['pnl_worst']:>8.2f}  {exits}  | {spec}")
+    print(f"elapsed {elapsed:.1f}s")
+
+    if args.trades:
+        with open(args.trades, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["set", "sym", "entry_ts", "entry_price", "exit_ts", "exit_price", "reason", "pnl_pct"])
+            for i, (_, _, trades) in enumerate(results):
+                w.writerows((i, *tr) for tr in trades)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Decode-throughput benchmark for WS frames.
+Runs the same frames through each available decoder backend (stdlib json,
+orjson, msgspec typed structs) and normalizes them to float levels / trade
+tuples the way the hub consumes them, reporting frames/sec per venue.
+Frames come from --frames (one raw JSON frame per line, e.g. captured from a
+live socket) or are synthesized in each venue's wire format.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_fetcher import decoders
+from data_fetcher.decoders import Decoded, decoder_for
+from data_fetcher.orderbook import parse_depth
+from data_fetcher.trades import normalize_trades
+
+
+def _levels(rnd, px, n, sign, as_str=True):
+    out = []
+    for k in range(n):
+        p = px * (1 + sign * 0.0002 * (k + 1))
+        q = rnd.uniform(10, 1000)
+        out.append([f"{p:.6f}", f"{q:.2f}"] if as_str else [round(p, 6), round(q, 2), rnd.randint(1, 9)])
+    return out
+
+
+def synth_frames(n: int):
+    rnd = random.Random(3)
+    frames = {"binance": [], "bybit": [], "mexc": []}
+    for i in range(n):
+        px = 1.0 + rnd.random()
+        E = 1_700_000_000_000 + i
+        frames["binance"].append(json.dumps({"stream": "abcusdt@depth20@100ms", "data": {
+            "e": "depthUpdate", "E": E, "s": "ABCUSDT", "u": i + 1, "pu": i,
+            "b": _levels(rnd, px, 20, -1), "a": _levels(rnd, px, 20, 1)}}))
+        frames["binance"].append(json.dumps({"stream": "abcusdt@aggTrade", "data": {
+            "e": "aggTrade", "E": E, "T": E, "s": "ABCUSDT", "p": f"{px:.6f}", "q": "12.5", "m": i % 2 == 0}}))
+        frames["bybit"].append(json.dumps({"topic": "orderbook.50.ABCUSDT", "type": "delta", "ts": E, "data": {
+            "s": "ABCUSDT", "b": _levels(rnd, px, 50, -1), "a": _levels(rnd, px, 50, 1), "u": i + 2, "seq": i}}))
+        frames["bybit"].append(json.dumps({"topic": "publicTrade.ABCUSDT", "type": "snapshot", "ts": E, "data": [
+            {"T": E, "s": "ABCUSDT", "S": "Sell", "v": "3", "p": f"{px:.6f}"} for _ in range(3)]}))
+        frames["mexc"].append(json.dumps({"channel": "push.depth.full", "symbol": "ABC_USDT", "ts": E, "data": {
+            "bids": _levels(rnd, px, 20, -1, False), "asks": _levels(rnd, px, 20, 1, False), "version": i}}))
+        frames["mexc"].append(json.dumps({"channel": "push.deal", "symbol": "ABC_USDT", "ts": E, "data": {
+            "p": round(px, 6), "v": 4, "T": 2, "t": E}}))
+    return frames
+
+
+def load_frames(path: str):
+    frames = {"binance": [], "bybit": [], "mexc": []}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            d = json.loads(line)
+            if "stream" in d:
+                frames["binance"].append(line)
+            elif "topic" in d:
+                frames["bybit"].append(line)
+            elif "channel" in d:
+                frames["mexc"].append(line)
+    return frames
+
+
+def _is_trade(ex, d: dict) -> bool:
+    if ex == "binance":
+        return d.get("e") == "aggTrade"
+    return "publicTrade" in d.get("topic", "") or "deal" in d.get("channel", "")
+
+
+def _consume(ex, out):
+    """Normalize a decoded frame the way the hub would: float levels or trade tuples."""
+    if isinstance(out, Decoded):
+        msg = out.msg
+        if out.kind == "tr":
+            return normalize_trades(ex, msg)
+        return parse_depth(ex, msg)
+    if ex == "binance":
+        out = out.get("data", {})
+    if _is_trade(ex, out):
+        return normalize_trades(ex, out)
+    return parse_depth(ex, out)
+
+
+def _comparable(res):
+    """Trades -> (price, qty, side); depth -> (kind, bids, asks, seq, prev_seq) with tuple levels."""
+    if isinstance(res, list):
+        return [(p, q, s) for _, p, q, s in res]
+    kind, bids, asks, seq, prev = res
+    return kind, [tuple(lv) for lv in bids], [tuple(lv) for lv in asks], seq, prev
+
+
+def bench(backend: str, frames, repeat: int):
+    os.environ["WS_DECODER"] = backend
+    res, outs = {}, {}
+    for ex, fs in frames.items():
+        if not fs:
+            continue
+        dec = decoder_for(ex)
+        raw = [f.encode() for f in fs]
+        outs[ex] = [_comparable(_consume(ex, dec(r))) for r in raw]
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for r in raw:
+                _consume(ex, dec(r))
+        res[ex] = len(raw) * repeat / (time.perf_counter() - t0)
+    return res, outs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WS frame decode benchmark")
+    parser.add_argument("--frames", help="file with one raw WS frame per line")
+    parser.add_argument("--n", type=int, default=2000, help="synthetic frames per type")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    frames = load_frames(args.frames) if args.frames else synth_frames(args.n)
+    backends = ["json"]
+    if decoders.orjson is not None:
+        backends.append("orjson")
+    if decoders.msgspec is not None:
+        backends.append("msgspec")
+    venues = [ex for ex, fs in frames.items() if fs]
+    print(f"{'backend':>8} " + " ".join(f"{ex + ' f/s':>14}" for ex in venues))
+    base = ref = None
+    for b in backends:
+        res, outs = bench(b, frames, args.repeat)
+        base = base or res
+        ref = ref or outs
+        same = "ok" if outs == ref else "MISMATCH"
+        print(f"{b:>8} " + " ".join(f"{res[ex]:>10,.0f} {res[ex] / base[ex]:>2.1f}x" for ex in venues) + f"  {same}")
+
+
+if __name__ == "__main__":
+    main()
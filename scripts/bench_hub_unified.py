@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for DataHub unified aggregation.
+Compares the legacy flat-dict scan (metrics[(ex, sym)]) against the per-symbol
+index (metrics[sym][ex]) at several universe sizes and prints events/sec.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_fetcher.hub import DataHub
+
+EXCHANGES = ["binance", "bybit", "mexc", "lbank"]
+
+
+def _avg(vals):
+    xs = [float(v) for v in vals if v is not None]
+    if not xs:
+        return None
+    return sum(xs) / len(xs)
+
+
+def legacy_unified(metrics, funding_rates, open_interest, canon_sym):
+    """Flat-dict aggregation as DataHub._emit_unified did before the symbol index."""
+    now = time.time()
+    per_ex = [v for (ex, s), v in metrics.items() if s == canon_sym and (now - v.get('ts', 0)) <= 180]
+    if not per_ex:
+        return None
+    price = _avg([m.get('price') for m in per_ex])
+    spread = _avg([m.get('spread') for m in per_ex])
+    bid_total = _avg([m.get('bid_total') for m in per_ex])
+    ask_total = _avg([m.get('ask_total') for m in per_ex])
+    fr_vals = [rate for (ex, s), (ts, rate) in list(funding_rates.items()) if s == canon_sym and (now - ts) <= 7200]
+    oi_vals = [val for (ex, s), (ts, val) in list(open_interest.items()) if s == canon_sym and (now - ts) <= 7200]
+    return price, spread, bid_total, ask_total, _avg(fr_vals), _avg(oi_vals)
+
+
+def _populate(n_syms: int):
+    now = time.time()
+    syms = [f"SYM{i}USDT" for i in range(n_syms)]
+    flat, funding, oi = {}, {}, {}
+    hub = DataHub()
+    hub.allowed_symbols = set(syms)
+    for s in syms:
+        for ex in EXCHANGES:
+            m = {"price": 1.0 + random.random(), "spread": 0.001, "bid_total": 100.0, "ask_total": 120.0, "ts": now}
+            flat[(ex, s)] = m
+            funding[(ex, s)] = (now, 0.0001)
+            oi[(ex, s)] = (now, 1e6)
+            hub._ex_metrics(ex, s).update(m)
+            hub._set_funding(ex, s, now, 0.0001)
+            hub._set_oi(ex, s, now, 1e6)
+    return syms, flat, funding, oi, hub
+
+
+async def _bench(n_syms: int, n_events: int):
+    syms, flat, funding, oi, hub = _populate(n_syms)
+    picks = [random.choice(syms) for _ in range(n_events)]
+
+    t0 = time.perf_counter()
+    for s in picks:
+        legacy_unified(flat, funding, oi, s)
+    legacy = n_events / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for s in picks:
+        await hub._emit_unified(s)
+        hub.queue.get_nowait()
+    indexed = n_events / (time.perf_counter() - t0)
+    return legacy, indexed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="DataHub unified aggregation benchmark")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[300, 1000])
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+    print(f"{'symbols':>8} {'legacy ev/s':>14} {'indexed ev/s':>14} {'speedup':>8}")
+    for n in args.symbols:
+        legacy, indexed = await _bench(n, args.events)
+        print(f"{n:>8} {legacy:>14,.0f} {indexed:>14,.0f} {indexed / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
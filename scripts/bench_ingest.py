@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for WS ingestion: in-process vs sharded worker processes.
+A local replay server (its own process) speaks the Binance combined-stream
+protocol and pushes pre-built depth20 and aggTrade frames as fast as the
+client reads them. The server counts delivered frames, so messages/sec is what
+the ingest side actually decoded and applied.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import multiprocessing as mp
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frames(sym: str, n: int = 50):
+    rnd = random.Random(sym)
+    px = 1.0 + rnd.random()
+    out = []
+    for i in range(n):
+        px *= 1.0 + rnd.gauss(0, 0.0005)
+        bids = [[f"{px * (1 - 0.0002 * (k + 1)):.6f}", f"{rnd.uniform(10, 1000):.2f}"] for k in range(20)]
+        asks = [[f"{px * (1 + 0.0002 * (k + 1)):.6f}", f"{rnd.uniform(10, 1000):.2f}"] for k in range(20)]
+        E = int(time.time() * 1000)
+        out.append(json.dumps({"stream": f"{sym.lower()}@depth20@100ms", "data": {
+            "e": "depthUpdate", "E": E, "s": sym, "u": i + 1, "pu": i, "b": bids, "a": asks}}))
+        out.append(json.dumps({"stream": f"{sym.lower()}@aggTrade", "data": {
+            "e": "aggTrade", "E": E, "T": E, "s": sym, "p": f"{px:.6f}", "q": f"{rnd.uniform(1, 50):.2f}",
+            "m": rnd.random() < 0.5}}))
+    return out
+
+
+def _serve(port: int, sent, ready):
+    from websockets.asyncio.server import serve
+
+    async def handler(ws):
+        qs = parse_qs(urlparse(ws.request.path).query)
+        syms = sorted({s.split("@")[0].upper() for s in qs.get("streams", [""])[0].split("/") if s})
+        frames = [f for s in syms for f in _frames(s)]
+        random.Random(len(syms)).shuffle(frames)
+        try:
+            while True:
+                for f in frames:
+                    await ws.send(f)
+                    with sent.get_lock():
+                        sent.value += 1
+        except Exception:
+            pass
+
+    async def main():
+        async with serve(handler, "127.0.0.1", port, max_queue=None, compression=None):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+async def _drain(hub):
+    while True:
+        await hub.queue.get()
+
+
+async def _run_mode(shards: int, syms, port: int, seconds: float, sent) -> float:
+    from data_fetcher.hub import DataHub
+    from data_fetcher.shards import ShardedIngest, make_clients
+    hub = DataHub()
+    hub.allowed_symbols = set(syms)
+    uni = {"binance": list(syms)}
+    urls = {"binance": f"ws://127.0.0.1:{port}"}
+    tasks = [asyncio.create_task(hub._unified_flush_loop()), asyncio.create_task(_drain(hub))]
+    ingest = None
+    if shards > 0:
+        ingest = ShardedIngest(hub, shards, urls=urls)
+        tasks.append(asyncio.create_task(ingest.run(uni)))
+    else:
+        for c in make_clients(uni, hub._on_ob, hub._on_trade, hub._on_mark, hub.books, urls):
+            tasks.append(asyncio.create_task(c.run()))
+    await asyncio.sleep(3.0)  # connect + warm up
+    start = sent.value
+    await asyncio.sleep(seconds)
+    rate = (sent.value - start) / seconds
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if ingest is not None:
+        ingest.stop()
+    await asyncio.sleep(1.0)
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded ingestion throughput benchmark")
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=18765)
+    args = parser.parse_args()
+    ctx = mp.get_context("spawn")
+    sent = ctx.Value("q", 0)
+    ready = ctx.Event()
+    srv = ctx.Process(target=_serve, args=(args.port, sent, ready), daemon=True)
+    srv.start()
+    ready.wait(10)
+    syms = [f"SYM{i}USDT" for i in range(args.symbols)]
+    try:
+        print(f"symbols={args.symbols} cpus={os.cpu_count()}")
+        print(f"{'shards':>7} {'msgs/s':>12}")
+        base = None
+        for n in args.shards:
+            rate = asyncio.run(_run_mode(n, syms, args.port, args.seconds, sent))
+            base = base or rate
+            print(f"{n:>7} {rate:>12,.0f}   ({rate / base:.1f}x)")
+    finally:
+        srv.terminate()
+
+
+if __name__ == "__main__":
+    main()
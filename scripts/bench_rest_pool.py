@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the pooled REST client against a local aiohttp stand-in server.
+Compares a new RESTClient per call (the old per-symbol pattern) with the
+shared keep-alive client from get_client(), then prints requests/sec and the
+pooled client's reuse ratio, peak in-flight count and latency histogram.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_fetcher import rest_client
+from data_fetcher.rest_client import RESTClient, get_client
+
+
+async def _premium_index(request: web.Request):
+    sym = request.query.get("symbol", "BTCUSDT")
+    if sym == "BANNED":
+        return web.json_response({"code": -1003, "msg": "Too many requests"}, status=429)
+    return web.json_response({"symbol": sym, "lastFundingRate": "0.0001", "time": int(time.time() * 1000)})
+
+
+async def _start_server(port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/fapi/v1/premiumIndex", _premium_index)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def _per_call(base: str, syms, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(sym):
+        async with sem:
+            rc = RESTClient(base)
+            try:
+                await rc.get("/fapi/v1/premiumIndex", params={"symbol": sym})
+            finally:
+                await rc.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(s) for s in syms))
+    return len(syms) / (time.perf_counter() - t0)
+
+
+async def _pooled(base: str, syms, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+    rc = get_client(base, limit_per_host=concurrency)
+
+    async def one(sym):
+        async with sem:
+            await rc.get("/fapi/v1/premiumIndex", params={"symbol": sym})
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(s) for s in syms))
+    return len(syms) / (time.perf_counter() - t0)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Pooled REST client benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+    runner = await _start_server(args.port)
+    base = f"http://127.0.0.1:{args.port}"
+    syms = [f"SYM{i}USDT" for i in range(args.requests)]
+    try:
+        legacy = await _per_call(base, syms, args.concurrency)
+        pooled = await _pooled(base, syms, args.concurrency)
+        try:
+            await get_client(base).get("/fapi/v1/premiumIndex", params={"symbol": "BANNED"})
+        except rest_client.RESTStatusError as e:
+            print(f"status error surfaced without retry: {e} (rate_limited={e.rate_limited})")
+        st = rest_client.pool_stats()[base]
+        print(f"{'per-call req/s':>15} {'pooled req/s':>13} {'speedup':>8}")
+        print(f"{legacy:>15,.0f} {pooled:>13,.0f} {pooled / legacy:>7.1f}x")
+        print(f"reuse_ratio={st['reuse_ratio']:.3f} conns={st['conn_created']} max_in_flight={st['max_in_flight']}")
+        print(f"latency: {st['latency_ms']}")
+    finally:
+        await rest_client.close_all()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for features.volatility.
+Replays the same mark stream through the legacy per-call rescan and the
+incremental Volatility estimator, calling burst(60) after every tick as the
+orchestrator does, and reports ticks/sec plus the max absolute difference.
+"""
+import os
+import sys
+import time
+import math
+import random
+import argparse
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features.volatility import Volatility
+
+
+class LegacyVolatility:
+    """Volatility as it was before the incremental estimator."""
+
+    def __init__(self, maxlen: int = 600):
+        self.prices = deque(maxlen=maxlen)
+
+    def ingest_mark(self, ts: float, price: float):
+        if price > 0 and abs(ts - time.time()) < 300:
+            self.prices.append((ts, price))
+
+    def burst(self, window_sec: int = 60) -> float:
+        if len(self.prices) < 5:
+            return 0.0
+        now = self.prices[-1][0]
+        wins = [p for t, p in self.prices if t >= now - window_sec]
+        if len(wins) < 5:
+            return 0.0
+        rets = []
+        for i in range(1, len(wins)):
+            if wins[i-1] > 0:
+                rets.append((wins[i] - wins[i-1]) / wins[i-1])
+        if not rets:
+            return 0.0
+        mu = sum(rets) / len(rets)
+        var = sum((r - mu) ** 2 for r in rets) / len(rets)
+        return max(0.0, min(1.0, math.sqrt(var) / 0.002))
+
+
+def _stream(n_syms: int, n_ticks: int, rate_hz: float):
+    """Random-walk marks for n_syms symbols, ~rate_hz per symbol, ending now."""
+    rnd = random.Random(7)
+    px = [1.0 + rnd.random() for _ in range(n_syms)]
+    t0 = time.time() - n_ticks / (rate_hz * n_syms)
+    out = []
+    for k in range(n_ticks):
+        i = rnd.randrange(n_syms)
+        px[i] *= 1.0 + rnd.gauss(0.0, 0.001)
+        out.append((i, t0 + k / (rate_hz * n_syms), px[i]))
+    return out
+
+
+def _run(cls, n_syms: int, n_ticks: int, rate_hz: float, window: int):
+    # regenerate per run so timestamps stay inside ingest_mark's freshness check
+    stream = _stream(n_syms, n_ticks, rate_hz)
+    vols = [cls() for _ in range(n_syms)]
+    out = []
+    t0 = time.perf_counter()
+    for i, ts, p in stream:
+        v = vols[i]
+        v.ingest_mark(ts, p)
+        out.append(v.burst(window))
+    return len(stream) / (time.perf_counter() - t0), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volatility.burst benchmark")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=600000)
+    parser.add_argument("--rate", type=float, default=4.0, help="marks per second per symbol")
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+    span = args.ticks / (args.rate * args.symbols)
+    if span > 240:
+        parser.error(f"stream spans {span:.0f}s; keep ticks/(rate*symbols) under 240s so marks pass the 300s freshness check")
+    legacy_tps, legacy = _run(LegacyVolatility, args.symbols, args.ticks, args.rate, args.window)
+    inc_tps, inc = _run(Volatility, args.symbols, args.ticks, args.rate, args.window)
+    diff = max(abs(a - b) for a, b in zip(legacy, inc))
+    print(f"symbols={args.symbols} ticks={args.ticks} window={args.window}s")
+    print(f"{'legacy ticks/s':>16} {'incremental ticks/s':>20} {'speedup':>8} {'max |diff|':>12}")
+    print(f"{legacy_tps:>16,.0f} {inc_tps:>20,.0f} {inc_tps / legacy_tps:>7.1f}x {diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,6 @@ import os
 import sys
 import asyncio
 import time
-import json
 import sqlite3
 from pathlib import Path
 
@@ -218,13 +217,15 @@ class E2ETest:
         try:
             feats = {'score': 75, 'ask_dom': 0.6}
             ts = time.time()
-            self.db.store_features(self.test_sym, json.dumps(feats), ts)
+            self.db.store_features(self.test_sym, feats, ts)
             
             conn = sqlite3.connect(self.test_db)
             row = conn.execute("SELECT * FROM features WHERE sym=?", (self.test_sym,)).fetchone()
             conn.close()
             
-            return self.log("07_DB_FEATURES", row is not None, f"Stored features")
+            latest = self.db.latest_features(self.test_sym)
+            ok = row is not None and latest is not None and abs(latest.get('score', 0) - 75) < 1e-3
+            return self.log("07_DB_FEATURES", ok, f"Stored features")
         except Exception as e:
             return self.log("07_DB_FEATURES", False, f"Error: {e}")
     
@@ -409,14 +410,14 @@ class E2ETest:
                 return self.log("15_COOLDOWN", False, "First send blocked incorrectly")
             
             # Mark as sent
-            self.tg._last_signal_ts[sym] = time.time()
+            self.tg.cooldowns.touch((sym, "tg_signal"), time.time())
             
             # Should not send immediately
             if self.tg._should_send(sym):
                 return self.log("15_COOLDOWN", False, "Cooldown not enforced")
             
             # Fast-forward time
-            self.tg._last_signal_ts[sym] = time.time() - 301
+            self.tg.cooldowns.touch((sym, "tg_signal"), time.time() - 301)
             
             # Should send again
             if not self.tg._should_send(sym):
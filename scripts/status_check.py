@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 import os
+import sys
 import sqlite3
-import json
 import time
 from datetime import datetime
 from collections import defaultdict
 import argparse
 from zoneinfo import ZoneInfo
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import feature_codec
+
 parser = argparse.ArgumentParser(description="SGNLV2 system status (recent window)")
 parser.add_argument("--lookback-sec", type=int, default=int(os.getenv("LOOKBACK_SEC", "600")), help="Lookback window in seconds (default: 600)")
 parser.add_argument("--limit", type=int, default=int(os.getenv("FEATURE_LIMIT", "5000")), help="Max feature rows to scan (default: 5000)")
@@ -19,14 +22,15 @@ cursor = conn.cursor()
 
 # Get data freshness (unified)
 try:
-    cursor.execute("SELECT MAX(ts) FROM unified_ticks")
-    latest_tick = cursor.fetchone()[0]
+    # ORDER BY/LIMIT merges the per-partition ts indexes; MAX() would scan every day partition
+    cursor.execute("SELECT ts FROM unified_ticks ORDER BY ts DESC LIMIT 1")
+    latest_tick = (cursor.fetchone() or (None,))[0]
 except Exception:
     latest_tick = None
 tick_age = datetime.now().timestamp() - latest_tick if latest_tick else 9999
 
-cursor.execute("SELECT MAX(ts) FROM features")  
-latest_feat = cursor.fetchone()[0]
+cursor.execute("SELECT ts FROM features ORDER BY ts DESC LIMIT 1")
+latest_feat = (cursor.fetchone() or (None,))[0]
 feat_age = datetime.now().timestamp() - latest_feat if latest_feat else 9999
 
 # Get counts (unified)
@@ -46,14 +50,16 @@ pos_count = cursor.fetchone()[0]
 now_ts = time.time()
 window_start = now_ts - args.lookback_sec
 cursor.execute(
-    "SELECT sym, ts, data FROM features WHERE ts > ? ORDER BY ts DESC LIMIT ?",
+    "SELECT sym, ts, score, CASE WHEN score IS NULL THEN data END FROM features WHERE ts > ? ORDER BY ts DESC LIMIT ?",
     (window_start, args.limit),
 )
 scores = []
-for sym, ts, data_raw in cursor.fetchall():
+for sym, ts, score_val, data_raw in cursor.fetchall():
     try:
-        data = json.loads(data_raw)
-        score_val = float(data.get("score", 0))
+        # rows not yet migrated from JSON have no score column value
+        if score_val is None:
+            score_val = feature_codec.decode(data_raw).get("score", 0)
+        score_val = float(score_val)
     except Exception:
         score_val = 0.0
     scores.append((sym, score_val))
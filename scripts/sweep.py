@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep for the backtester (see backtest/sweep.py), spread over all cores.
+
+Each --param takes a value list or a lo:hi[:step] range:
+  python scripts/sweep.py --db state/data.db --days 7 \\
+      --param SCORE_MIN=50:70:5 --param ENTRY_COOLDOWN_SEC=120,300,600 \\
+      --param TRAIL_GIVEBACK_PCT=0.2:0.6:0.1 --param w.oi_divergence=10,20,30
+In grid mode (the default) every combination runs. With --random N, N points are
+sampled: ranges uniformly between lo and hi, lists by choice. The feature cache
+(--cache) is rebuilt only when the DB or time range changes. Results go to a CSV
+(--out) sorted by --sort, and the top rows are printed.
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backtest.engine import default_params
+from backtest.sweep import apply_overrides, build_cache, cache_is_fresh, expand_grid, run_sweep, sample_random
+
+METRICS = ("trades", "hit_rate", "pnl_sum", "pnl_avg", "pnl_best", "pnl_worst")
+
+
+def parse_param(spec: str, random_mode: bool):
+    k, v = spec.split("=", 1)
+    k = k.strip()
+    if ":" in v:
+        parts = [float(x) for x in v.split(":")]
+        lo, hi = parts[0], parts[1]
+        if random_mode and len(parts) == 2:
+            return k, (lo, hi)
+        step = parts[2] if len(parts) > 2 else (hi - lo) / 4 or 1.0
+        n = int(round((hi - lo) / step)) + 1
+        return k, [round(lo + i * step, 10) for i in range(n)]
+    return k, [float(x) for x in v.split(",") if x.strip()]
+
+
+def main():
+    root = os.path.join(os.path.dirname(__file__), "..")
+    parser = argparse.ArgumentParser(description="Parallel backtest parameter sweep")
+    parser.add_argument("--db", default=os.path.join(root, "state", "data.db"))
+    parser.add_argument("--archive", default=os.path.join(root, "state", "history"),
+                        help="tick archive dir (storage/history_writer.py); ignored if missing")
+    parser.add_argument("--cache", default=os.path.join(root, "state", "sweep_cache"))
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the feature cache")
+    parser.add_argument("--days", type=float, default=None, help="only the last N days")
+    parser.add_argument("--symbols", default="", help="comma-separated subset")
+    parser.add_argument("--param", action="append", default=[], help="K=v1,v2,... or K=lo:hi[:step] (repeatable)")
+    parser.add_argument("--random", type=int, default=0, help="sample N random points instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default="sweep.csv")
+    parser.add_argument("--sort", default="pnl_sum", choices=METRICS)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    space = dict(parse_param(p, args.random > 0) for p in args.param)
+    points = sample_random(space, args.random, args.seed) if args.random else expand_grid(space)
+    base = default_params()
+    try:
+        param_sets = [apply_overrides(base, pt) for pt in points]
+    except KeyError as e:
+        raise SystemExit(f"unknown parameter {e.args[0]!r}")
+
+    since = None
+    if args.days:
+        # snap to the hour so repeated runs over "the last N days" reuse the cache
+        since = float(int(time.time() - args.days * 86400) // 3600 * 3600)
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or None
+    t0 = time.perf_counter()
+    archive = args.archive if os.path.isdir(args.archive) else None
+    if args.rebuild or not cache_is_fresh(args.cache, args.db, since, None, archive, symbols):
+        m = build_cache(args.db, args.cache, symbols=symbols, since=since, archive_dir=archive)
+        print(f"cache: {len(m['symbols'])} symbols, {sum(m['symbols'].values())} rows "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+    t1 = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} sets  {time.perf_counter() - t1:.1f}s", end="", file=sys.stderr, flush=True)
+
+    summaries = run_sweep(args.cache, param_sets, workers=args.workers or None, progress=progress)
+    elapsed = time.perf_counter() - t1
+    print(file=sys.stderr)
+
+    keys = list(space)
+    rows = []
+    for pt, s in zip(points, summaries):
+        exits = " ".join(f"{k}={v}" for k, v in sorted(s["exits"].items()))
+        rows.append([pt[k] for k in keys] + [s[m] for m in METRICS] + [exits])
+    col = len(keys) + METRICS.index(args.sort)
+    rows.sort(key=lambda r: r[col], reverse=True)
+    header = keys + list(METRICS) + ["exits"]
+    with open(args.out, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(rows)
+
+    print(" ".join(f"{h:>12}" for h in header[:-1]))
+    for r in rows[:args.top]:
+        print(" ".join(f"{v:>12.4g}" if isinstance(v, float) else f"{v:>12}" for v in r[:-1]))
+    print(f"{len(rows)} sets in {elapsed:.1f}s ({len(rows) / elapsed:.1f} sets/s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
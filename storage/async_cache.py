@@ -0,0 +1,159 @@
+import asyncio
+import queue
+import threading
+from collections import deque
+from typing import Any, Callable
+from loguru import logger
+from .sqlite_cache import SQLiteCache
+
+
+def _resolve(fut: asyncio.Future, result: Any, exc: BaseException | None):
+    if fut.cancelled():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(result)
+
+
+class AsyncSQLiteCache:
+    """Awaitable facade over SQLiteCache.
+
+    Every call is queued (bounded) to one dedicated I/O thread that owns the
+    SQLite connection, so the event loop never waits on disk. When the queue
+    is full, calls wait in an overflow deque that a single feeder task moves
+    into the queue in order; while anything waits there, later calls queue
+    behind it, so submission order holds under backpressure too.
+    """
+
+    def __init__(self, db: SQLiteCache, max_pending: int = 2000):
+        self.db = db
+        self._q: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._stats = {"calls": 0, "errors": 0, "backpressure": 0}
+        self._waiting: deque = deque()
+        self._feeder: asyncio.Task | None = None
+        self._thread = threading.Thread(target=self._worker, name="sqlite-io", daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            fut, loop, fn, args, kwargs = item
+            result, exc = None, None
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._stats["errors"] += 1
+                exc = e
+            self._stats["calls"] += 1
+            try:
+                loop.call_soon_threadsafe(_resolve, fut, result, exc)
+            except RuntimeError:
+                # loop already closed during shutdown
+                pass
+
+    def submit(self, fn: Callable, *args, **kwargs) -> asyncio.Future:
+        """Enqueue a call right away and return an awaitable for its result.
+
+        Calls run on the I/O thread in submission order. If the queue is full
+        the returned future waits (without blocking the loop) for a free slot.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        item = (fut, loop, fn, args, kwargs)
+        if not self._waiting:
+            try:
+                self._q.put_nowait(item)
+                return fut
+            except queue.Full:
+                pass
+        # never overtake a call that is already waiting for a slot
+        self._stats["backpressure"] += 1
+        self._waiting.append(item)
+        if self._feeder is None or self._feeder.done():
+            self._feeder = loop.create_task(self._feed())
+        return fut
+
+    async def _feed(self):
+        while self._waiting:
+            try:
+                self._q.put_nowait(self._waiting[0])
+            except queue.Full:
+                await asyncio.sleep(0.005)
+                continue
+            self._waiting.popleft()
+
+    def _done(self, result: Any = None) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        fut.set_result(result)
+        return fut
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=self._q.qsize() + len(self._waiting))
+
+    # --- reads ---
+    def get_open_position(self, sym: str) -> asyncio.Future:
+        return self.submit(self.db.get_open_position, sym)
+
+    def seen_recent_signal(self, sym: str, dedup_hash: str, window_sec: int = 900) -> asyncio.Future:
+        return self.submit(self.db.seen_recent_signal, sym, dedup_hash, window_sec)
+
+    def seen_recent_symbol_signal(self, sym: str, window_sec: int = 300, signal_type: str = 'entry') -> asyncio.Future:
+        return self.submit(self.db.seen_recent_symbol_signal, sym, window_sec, signal_type)
+
+    def recent_signals(self, since_ts: float) -> asyncio.Future:
+        return self.submit(self.db.recent_signals, since_ts)
+
+    def load_open_positions(self) -> asyncio.Future:
+        return self.submit(self.db.load_open_positions)
+
+    def latest_unified(self, sym: str) -> asyncio.Future:
+        return self.submit(self.db.latest_unified, sym)
+
+    # --- writes ---
+    def store_signal(self, *args, **kwargs) -> asyncio.Future:
+        return self.submit(self.db.store_signal, *args, **kwargs)
+
+    def open_position(self, *args, **kwargs) -> asyncio.Future:
+        return self.submit(self.db.open_position, *args, **kwargs)
+
+    def close_position(self, *args, **kwargs) -> asyncio.Future:
+        return self.submit(self.db.close_position, *args, **kwargs)
+
+    def update_best_low(self, sym: str, best_low: float) -> asyncio.Future:
+        return self.submit(self.db.update_best_low, sym, best_low)
+
+    # High-volume inserts only touch the in-memory ring buffer in write-behind
+    # mode, so they skip the I/O thread hop.
+    def store_unified(self, unified: dict) -> asyncio.Future:
+        if self.db.write_behind:
+            return self._done(self.db.store_unified(unified))
+        return self.submit(self.db.store_unified, unified)
+
+    def store_features(self, sym: str, features: dict, ts: float = None) -> asyncio.Future:
+        if self.db.write_behind:
+            return self._done(self.db.store_features(sym, features, ts))
+        # the caller keeps mutating its feature dict; queue a snapshot
+        return self.submit(self.db.store_features, sym, dict(features), ts)
+
+    def store_rank(self, sym: str, score: float, ts: float | None = None) -> asyncio.Future:
+        if self.db.write_behind:
+            return self._done(self.db.store_rank(sym, score, ts))
+        return self.submit(self.db.store_rank, sym, score, ts)
+
+    def close(self):
+        """Drain queued calls, stop the I/O thread and close the underlying cache."""
+        if self._feeder is not None:
+            self._feeder.cancel()
+        while self._waiting:
+            self._q.put(self._waiting.popleft())
+        self._q.put(None)
+        self._thread.join(timeout=30)
+        if self._thread.is_alive():
+            # closing the connection under a running call would fail it midway;
+            # leave the cache to the thread, which still drains to the sentinel
+            logger.warning("sqlite-io thread did not stop within 30s; leaving the cache open")
+            return
+        self.db.close()
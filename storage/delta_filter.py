@@ -0,0 +1,118 @@
+import math
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Tolerances are field -> (kind, amount):
+#   bps  relative change in basis points   (price=bps:2 -> write on a 0.02% move)
+#   pct  relative change in percent        (depth.bid_total=pct:5)
+#   abs  absolute change                   (score=abs:1; booleans count as 0/1)
+# Dotted fields look into nested dicts, e.g. depth.bid_total in a unified event.
+# Fields without a tolerance are not compared.
+UNIFIED_TOLERANCES = "price=bps:2,mark=bps:2,funding=abs:0.000001,oi=pct:0.1,spread=pct:10,volume=pct:5," \
+                     "depth.bid_total=pct:5,depth.ask_total=pct:5,depth.imbalance=abs:0.02," \
+                     "depth.gap_above=pct:10,sweep_rejection=abs:0.05"
+FEATURE_TOLERANCES = "score=abs:1,ask_dom=abs:0.02,spread_pct=pct:10,oi_divergence=abs:0.05," \
+                     "volatility_burst=abs:0.05,liquidity_pressure=abs:0.05,oi_rising=abs:0.5,price_falling=abs:0.5"
+_SCALE = {"bps": 1e-4, "pct": 1e-2, "abs": None}
+
+
+def parse_tolerances(spec: str) -> Dict[str, Tuple[str, float]]:
+    """Parse 'field=kind:amount,...' into {field: (kind, amount)}."""
+    out = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        field, rule = item.split("=", 1)
+        kind, amount = rule.split(":", 1)
+        kind = kind.strip().lower()
+        if kind not in _SCALE:
+            raise ValueError(f"unknown tolerance kind {kind!r} for {field.strip()!r} (bps, pct or abs)")
+        out[field.strip()] = (kind, float(amount))
+    return out
+
+
+def _num(v) -> Optional[float]:
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(v) else v
+
+
+class DeltaFilter:
+    """Per-symbol change filter in front of the high-volume inserts.
+
+    should_write() compares a row with the last row *written* for the symbol
+    (not the last one seen, so slow drifts still get written once they add up
+    to a tolerance) and passes it when any tracked field moved by at least its
+    tolerance, appeared or disappeared, or when heartbeat_sec have passed since
+    the last write. The heartbeat bounds the gap between stored rows, so
+    readers that look for "the latest row" or bucket by time still find one.
+    The caller reports a stored row with written(); a row the store rejected
+    is not remembered, so the next one is compared with the last real write.
+    """
+
+    def __init__(self, tolerances: Mapping[str, Tuple[str, float]], heartbeat_sec: float = 15.0):
+        self.heartbeat_sec = heartbeat_sec
+        self._fields: List[Tuple[Tuple[str, ...], Optional[float], float]] = [
+            (tuple(name.split(".")), _SCALE[kind], amount) for name, (kind, amount) in tolerances.items()
+        ]
+        self._last: Dict[str, Tuple[float, List[Optional[float]]]] = {}
+        # sym -> (ts, values, reason) of the row should_write() last passed
+        self._pending: Dict[str, Tuple[float, List[Optional[float]], str]] = {}
+        self._stats = {"seen": 0, "written": 0, "changed": 0, "heartbeats": 0}
+
+    def _values(self, row: Mapping) -> List[Optional[float]]:
+        out = []
+        for path, _, _ in self._fields:
+            v = row.get(path[0])
+            for key in path[1:]:
+                v = v.get(key) if isinstance(v, Mapping) else None
+            # plain floats (the common case) skip the coercion
+            out.append(v if type(v) is float and v == v else _num(v))
+        return out
+
+    def _moved(self, prev: List[Optional[float]], cur: List[Optional[float]]) -> bool:
+        for (_, scale, amount), a, b in zip(self._fields, prev, cur):
+            if a is None or b is None:
+                if a is not b:
+                    return True
+                continue
+            if scale is None:
+                if abs(b - a) >= amount:
+                    return True
+            elif a == 0.0:
+                if b != 0.0:
+                    return True
+            elif abs(b - a) >= abs(a) * amount * scale:
+                return True
+        return False
+
+    def should_write(self, sym: str, row: Mapping, ts: float) -> bool:
+        """True if row for sym should be persisted; call written(sym) once the store accepted it."""
+        self._stats["seen"] += 1
+        cur = self._values(row)
+        last = self._last.get(sym)
+        if last is None or self._moved(last[1], cur):
+            reason = "changed"
+        elif ts - last[0] >= self.heartbeat_sec:
+            reason = "heartbeats"
+        else:
+            return False
+        self._pending[sym] = (ts, cur, reason)
+        return True
+
+    def written(self, sym: str):
+        """Record the row that should_write() last passed for sym as the last write."""
+        pending = self._pending.pop(sym, None)
+        if pending is None:
+            return
+        ts, cur, reason = pending
+        self._last[sym] = (ts, cur)
+        st = self._stats
+        st["written"] += 1
+        st[reason] += 1
+
+    def stats(self) -> dict:
+        """Rows seen/written, why they were written, and the compression ratio seen/written."""
+        st = self._stats
+        return dict(st, ratio=st["seen"] / st["written"] if st["written"] else 0.0)
@@ -0,0 +1,90 @@
+import json
+import math
+import struct
+from typing import Dict, Union
+
+# Packed feature rows for the features table (little endian):
+#   <version: uint8> <n_extra: uint8>
+#   float32 per key of SCHEMAS[version], in order (NaN = key absent)
+#   n_extra x <name_len: uint8> <name: utf-8> <value: float32>
+# Keys outside the schema (e.g. the near_*_{h}s horizons from PRICE_HORIZONS)
+# go to the extra section. Booleans are stored as 0/1 and decoded back to bool.
+# Add a new version instead of changing an existing key list, so old rows
+# keep decoding.
+SCHEMAS = {
+    1: (
+        "score", "ask_dom", "spread_pct", "gap_above", "funding_impulse", "oi_divergence", "oi_rising",
+        "sweep_rejection", "volatility_burst", "short_momentum", "btc_alignment", "btc_not_pumping",
+        "price_falling", "liquidity_gap_above", "spread_not_collapsing", "near_resistance", "near_support",
+        "liquidity_pressure", "orderflow_imbalance",
+    ),
+}
+VERSION = 1
+BOOL_KEYS = frozenset({"oi_rising", "btc_not_pumping", "price_falling", "spread_not_collapsing"})
+
+_HDR = struct.Struct("<BB")
+_F32 = struct.Struct("<f")
+_BODY = {v: struct.Struct(f"<{len(keys)}f") for v, keys in SCHEMAS.items()}
+_KEYSET = frozenset(SCHEMAS[VERSION])
+_NAN = float("nan")
+_NAMES: Dict[str, bytes] = {}  # extra key -> length-prefixed utf-8 name
+
+
+def _num(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def encode(feats: Dict[str, object]) -> bytes:
+    """Pack a feature dict with the current schema."""
+    get = feats.get
+    keys = SCHEMAS[VERSION]
+    try:
+        # floats, ints and bools pack as-is; anything else takes the coercing path
+        body = _BODY[VERSION].pack(*[get(k, _NAN) for k in keys])
+    except struct.error:
+        body = _BODY[VERSION].pack(*[_num(get(k, _NAN)) for k in keys])
+    if len(feats) <= len(keys) and feats.keys() <= _KEYSET:
+        return _HDR.pack(VERSION, 0) + body
+    extras = [k for k in feats if k not in _KEYSET][:255]
+    parts = [_HDR.pack(VERSION, len(extras)), body]
+    for k in extras:
+        prefix = _NAMES.get(k)
+        if prefix is None:
+            name = k.encode()[:255]
+            prefix = _NAMES[k] = bytes((len(name),)) + name
+        v = feats[k]
+        parts.append(prefix + _F32.pack(v if type(v) is float else _num(v)))
+    return b"".join(parts)
+
+
+def decode(data: Union[bytes, str, None]) -> Dict[str, object]:
+    """Unpack a features row; JSON text rows from before the binary format are parsed as JSON."""
+    if data is None:
+        return {}
+    if isinstance(data, str):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return {}
+    version, n_extra = _HDR.unpack_from(data, 0)
+    body = _BODY[version]
+    out: Dict[str, object] = {}
+    for k, v in zip(SCHEMAS[version], body.unpack_from(data, _HDR.size)):
+        if not math.isnan(v):
+            out[k] = bool(v) if k in BOOL_KEYS else v
+    pos = _HDR.size + body.size
+    for _ in range(n_extra):
+        n = data[pos]
+        name = data[pos + 1:pos + 1 + n].decode()
+        (out[name],) = _F32.unpack_from(data, pos + 1 + n)
+        pos += 1 + n + _F32.size
+    return out
+
+
+def score_of(feats: Dict[str, object]):
+    """The hot `score` column value for a feature dict (None if absent or not numeric)."""
+    v = _num(feats.get("score"))
+    return None if math.isnan(v) else v
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from data_fetcher.clock import system_clock
+from . import partitions
+
+# Archive layout under root:
+#   manifest.json                  columns, partition size, and per partition the
+#                                  rows / first ts / last ts of every symbol
+#   <partition>/<SYM>.npy          float64 matrix of shape (len(COLUMNS), rows),
+#                                  one row per column, ticks ordered by ts
+# Partitions are archived in time order, so every tick older than
+# archived_through() lives in the archive. NULL values are stored as NaN.
+COLUMNS = ("ts", "price", "mark", "funding", "oi", "spread", "volume",
+           "bid_total", "ask_total", "imbalance", "gap_above", "sweep_rejection")
+PARTITION_SEC = {"hour": 3600, "day": 86400}
+MANIFEST = "manifest.json"
+
+
+def partition_key(start: float, partition_sec: int) -> str:
+    fmt = "%Y%m%d" if partition_sec >= 86400 else "%Y%m%dT%H"
+    return time.strftime(fmt, time.gmtime(start))
+
+
+class TickArchive:
+    """Read side of the archive: manifest lookups and zero-copy range reads.
+
+    Symbol files are opened with np.load(mmap_mode="r") and cached; a range
+    read slices the mapped columns by ts with searchsorted, so only the pages
+    that are touched get read from disk. The manifest is reloaded when the
+    writer replaces it.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._manifest: dict = {"columns": list(COLUMNS), "partitions": {}}
+        self._mtime = None
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def manifest(self) -> dict:
+        path = os.path.join(self.root, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return self._manifest
+        if mtime != self._mtime:
+            with open(path) as f:
+                self._manifest = json.load(f)
+            self._mtime = mtime
+            self._maps.clear()
+        return self._manifest
+
+    def partitions(self) -> List[Tuple[str, dict]]:
+        """(key, meta) for every archived partition, oldest first."""
+        return sorted(self.manifest()["partitions"].items(), key=lambda kv: kv[1]["start"])
+
+    def archived_through(self) -> float:
+        """End of the newest archived partition (0 if empty); older ticks are all archived."""
+        parts = self.manifest()["partitions"]
+        return max((p["end"] for p in parts.values()), default=0.0)
+
+    def row_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for _, meta in self.partitions():
+            for sym, (rows, _, _) in meta["symbols"].items():
+                counts[sym] = counts.get(sym, 0) + rows
+        return counts
+
+    def total_rows(self) -> int:
+        return sum(meta["rows"] for meta in self.manifest()["partitions"].values())
+
+    def symbols(self) -> List[str]:
+        return sorted(self.row_counts())
+
+    def _open(self, key: str, sym: str) -> np.ndarray:
+        path = os.path.join(self.root, key, f"{sym}.npy")
+        m = self._maps.get(path)
+        if m is None:
+            m = self._maps[path] = np.load(path, mmap_mode="r")
+        return m
+
+    def iter_range(self, sym: str, since: Optional[float] = None, until: Optional[float] = None,
+                   columns: Iterable[str] = COLUMNS) -> Iterator[Dict[str, np.ndarray]]:
+        """Per partition, {column: read-only view} of sym's ticks with since <= ts < until."""
+        idx = [self.manifest()["columns"].index(c) for c in columns]
+        names = list(columns)
+        for key, meta in self.partitions():
+            info = meta["symbols"].get(sym)
+            if info is None or (since is not None and info[2] < since) or (until is not None and info[1] >= until):
+                continue
+            m = self._open(key, sym)
+            ts = m[0]
+            lo = 0 if since is None else int(np.searchsorted(ts, since, side="left"))
+            hi = len(ts) if until is None else int(np.searchsorted(ts, until, side="left"))
+            if hi > lo:
+                yield {c: m[i, lo:hi] for c, i in zip(names, idx)}
+
+    def read_range(self, sym: str, since: Optional[float] = None, until: Optional[float] = None,
+                   columns: Iterable[str] = COLUMNS) -> Dict[str, np.ndarray]:
+        """Like iter_range, joined across partitions (views when only one partition matches)."""
+        columns = list(columns)
+        parts = list(self.iter_range(sym, since, until, columns))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return {c: np.empty(0) for c in columns}
+        return {c: np.concatenate([p[c] for p in parts]) for c in columns}
+
+
+class HistoryWriter:
+    """Moves closed unified_ticks partitions out of SQLite into the columnar archive.
+
+    roll() exports every partition that ended more than grace_sec ago
+    (store_unified rejects timestamps older than 300 s, so those partitions can
+    no longer change) and records it in the manifest. prune() then drops the
+    SQLite day partitions of unified_ticks that are both fully archived and
+    older than the hot window.
+    """
+
+    def __init__(self, db_path: str, root: str, partition: str = "hour", hot_sec: float = 86400,
+                 interval_sec: float = 300, grace_sec: float = 600, clock=None):
+        self.db_path = db_path
+        self.root = root
+        self.partition_sec = PARTITION_SEC[partition]
+        self.hot_sec = hot_sec
+        self.interval_sec = interval_sec
+        self.grace_sec = grace_sec
+        self.clock = clock or system_clock
+        self.archive = TickArchive(root)
+        self._stats = {"partitions": 0, "rows": 0, "pruned": 0, "last_roll_ms": 0.0, "errors": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write_manifest(self, manifest: dict):
+        tmp = os.path.join(self.root, f".{MANIFEST}")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.root, MANIFEST))
+
+    def _archive_partition(self, conn: sqlite3.Connection, start: float) -> Tuple[str, dict]:
+        end = start + self.partition_sec
+        key = partition_key(start, self.partition_sec)
+        pdir = os.path.join(self.root, key)
+        os.makedirs(pdir, exist_ok=True)
+        syms = [r[0] for r in conn.execute(
+            "SELECT DISTINCT sym FROM unified_ticks WHERE ts>=? AND ts<?", (start, end))]
+        cols = ", ".join(COLUMNS)
+        meta = {"start": start, "end": end, "rows": 0, "symbols": {}}
+        for sym in syms:
+            rows = conn.execute(
+                f"SELECT {cols} FROM unified_ticks WHERE sym=? AND ts>=? AND ts<? ORDER BY ts",
+                (sym, start, end),
+            ).fetchall()
+            if not rows:
+                continue
+            m = np.array(rows, dtype=np.float64).T  # NULL -> NaN
+            tmp = os.path.join(pdir, f".{sym}.npy")
+            np.save(tmp, np.ascontiguousarray(m))
+            os.replace(tmp, os.path.join(pdir, f"{sym}.npy"))
+            meta["symbols"][sym] = [len(rows), float(m[0, 0]), float(m[0, -1])]
+            meta["rows"] += len(rows)
+        return key, meta
+
+    def roll(self) -> int:
+        """Archive every closed partition that is not archived yet; returns how many were written."""
+        manifest = self.archive.manifest()
+        manifest = {"columns": list(COLUMNS), "partition_sec": self.partition_sec,
+                    "partitions": dict(manifest.get("partitions", {}))}
+        psec = self.partition_sec
+        closed_before = (self.clock.time() - self.grace_sec) // psec * psec
+        t0 = time.perf_counter()
+        n = 0
+        conn = self._connect()
+        try:
+            start = self.archive.archived_through()
+            if not start:
+                # ORDER BY/LIMIT merges the per-partition ts indexes; MIN() would scan the view
+                first = conn.execute("SELECT ts FROM unified_ticks ORDER BY ts LIMIT 1").fetchone()
+                if first is None:
+                    return 0
+                start = first[0] // psec * psec
+            while start < closed_before:
+                key, meta = self._archive_partition(conn, start)
+                manifest["partitions"][key] = meta
+                # publish each partition as soon as it is complete
+                self._write_manifest(manifest)
+                self._stats["partitions"] += 1
+                self._stats["rows"] += meta["rows"]
+                n += 1
+                start += psec
+        finally:
+            conn.close()
+        if n:
+            self._stats["last_roll_ms"] = (time.perf_counter() - t0) * 1000.0
+        return n
+
+    def prune(self) -> int:
+        """Drop SQLite day partitions that are archived and older than the hot window; returns how many."""
+        cutoff = min(self.clock.time() - self.hot_sec, self.archive.archived_through())
+        if cutoff <= 0:
+            return 0
+        conn = self._connect()
+        try:
+            n = len(partitions.drop_before(conn, "unified_ticks", cutoff))
+        finally:
+            conn.close()
+        self._stats["pruned"] += n
+        return n
+
+    def maintain(self):
+        n = self.roll()
+        pruned = self.prune()
+        if n or pruned:
+            st = self._stats
+            logger.info(
+                f"Tick archive: rolled {n} partition(s) in {st['last_roll_ms']:.0f}ms, dropped {pruned} SQLite partition(s) | "
+                f"archived through {partition_key(self.archive.archived_through() - 1, self.partition_sec)} "
+                f"partitions={st['partitions']} rows={st['rows']}"
+            )
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.maintain)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"Tick archive maintenance failed: {e}")
+            await asyncio.sleep(self.interval_sec)
+
+    def stats(self) -> dict:
+        return dict(self._stats, archived_through=self.archive.archived_through())
@@ -0,0 +1,122 @@
+"""Data migrations for the SQLite store.
+
+Schema changes (new partitions, added columns) are applied by
+storage/partitions.py when the store opens; migrations here rewrite existing
+rows. They run in resumable batches from SQLiteCache's maintenance thread,
+or to completion from the command line:
+
+  python -m storage.migrations /app/state/data.db
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+from loguru import logger
+from . import feature_codec, partitions
+
+
+def _ensure_log(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations(name TEXT PRIMARY KEY, ts REAL NOT NULL)")
+
+
+def _done(conn: sqlite3.Connection) -> set:
+    _ensure_log(conn)
+    return {r[0] for r in conn.execute("SELECT name FROM schema_migrations")}
+
+
+class FeatureBlobMigration:
+    """Rewrites JSON rows of the features tables as feature_codec blobs and fills the score column.
+
+    Only tables created before the binary format (data declared TEXT) are
+    visited. Progress is kept per table by rowid, so step() can be called
+    repeatedly with a row budget. A finished table is recorded in
+    schema_migrations and skipped afterwards. Readers decode both formats,
+    so the migration can run while the engine writes.
+    """
+
+    NAME = "feature_blobs"
+
+    def __init__(self, batch_rows: int = 5000):
+        self.batch_rows = batch_rows
+        self._pos: Dict[str, int] = {}
+        self.converted = 0
+
+    def pending_tables(self, conn: sqlite3.Connection) -> List[str]:
+        done = _done(conn)
+        out = []
+        for name, _ in partitions.partitions(conn, "features"):
+            if f"{self.NAME}:{name}" in done:
+                continue
+            types = {r[1]: r[2].upper() for r in conn.execute(f"PRAGMA table_info({name})")}
+            if types.get("data") == "TEXT":
+                out.append(name)
+        return out
+
+    def _convert(self, rows) -> list:
+        upd = []
+        for rowid, data in rows:
+            if not isinstance(data, str):
+                continue
+            try:
+                feats = json.loads(data)
+            except ValueError:
+                feats = {}
+            upd.append((feature_codec.score_of(feats), feature_codec.encode(feats), rowid))
+        return upd
+
+    def step(self, conn: sqlite3.Connection, max_rows: Optional[int] = None,
+             stop: Optional[threading.Event] = None, pause_sec: float = 0.0) -> bool:
+        """Convert up to max_rows rows (all if None); returns True once every table is done."""
+        budget = max_rows
+        for name in self.pending_tables(conn):
+            last = self._pos.get(name, 0)
+            while budget is None or budget > 0:
+                n = self.batch_rows if budget is None else min(self.batch_rows, budget)
+                rows = conn.execute(f"SELECT rowid, data FROM {name} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                    (last, n)).fetchall()
+                if not rows:
+                    with conn:
+                        conn.execute("INSERT OR REPLACE INTO schema_migrations VALUES (?, ?)",
+                                     (f"{self.NAME}:{name}", time.time()))
+                    self._pos.pop(name, None)
+                    break
+                last = self._pos[name] = rows[-1][0]
+                upd = self._convert(rows)
+                if upd:
+                    with conn:
+                        conn.executemany(f"UPDATE {name} SET score=?, data=? WHERE rowid=?", upd)
+                    self.converted += len(upd)
+                if budget is not None:
+                    budget -= len(rows)
+                # one short transaction per batch; let the writer in between
+                if stop is not None and stop.wait(pause_sec):
+                    return False
+            else:
+                return False
+        return True
+
+
+def main(argv: List[str]):
+    if len(argv) != 2:
+        print(__doc__)
+        return 2
+    conn = sqlite3.connect(argv[1], timeout=30.0)
+    try:
+        # make sure the features view and partitions have the current columns
+        for base in partitions.SCHEMAS:
+            partitions.ensure(conn, base, time.time())
+        mig = FeatureBlobMigration()
+        t0 = time.perf_counter()
+        tables = mig.pending_tables(conn)
+        mig.step(conn)
+        logger.info(f"Feature blobs: converted {mig.converted} JSON rows in {len(tables)} table(s) "
+                    f"in {time.perf_counter() - t0:.1f}s")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,176 @@
+import calendar
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+# High-volume tables are stored as one table per UTC day, <base>_pYYYYMMDD,
+# and <base> itself is a UNION ALL view over them, so readers keep querying
+# <base> (per-partition indexes still serve sym/ts lookups and ORDER BY ts
+# LIMIT n through the view). Writers insert into partition_name(base, ts).
+# Retention drops whole partitions instead of DELETE-ing rows. A table from
+# before partitioning is renamed to <base>_legacy, stays in the view, and is
+# dropped once its newest row is past retention.
+DAY_SEC = 86400
+
+# base -> (column definitions, indexed column groups, table constraints)
+SCHEMAS = {
+    "ticks": (
+        (("ts", "REAL NOT NULL"), ("ex", "TEXT NOT NULL"), ("sym", "TEXT NOT NULL"), ("price", "REAL NOT NULL")),
+        (("ts",), ("sym", "ts")),
+        "",
+    ),
+    "features": (
+        # data is a storage/feature_codec.py blob; score is kept as a plain column for queries
+        (("ts", "REAL NOT NULL"), ("sym", "TEXT NOT NULL"), ("score", "REAL"), ("data", "BLOB NOT NULL")),
+        (("ts",), ("sym", "ts")),
+        "",
+    ),
+    "unified_ticks": (
+        (("ts", "REAL NOT NULL"), ("sym", "TEXT NOT NULL"), ("price", "REAL"), ("mark", "REAL"),
+         ("funding", "REAL"), ("oi", "REAL"), ("spread", "REAL"), ("volume", "REAL"),
+         ("bid_total", "REAL"), ("ask_total", "REAL"), ("imbalance", "REAL"),
+         ("gap_above", "REAL"), ("sweep_rejection", "REAL")),
+        (("ts",),),
+        ", UNIQUE(sym, ts)",
+    ),
+}
+
+
+def partition_name(base: str, ts: float) -> str:
+    return f"{base}_p{time.strftime('%Y%m%d', time.gmtime(ts))}"
+
+
+def columns(base: str) -> List[str]:
+    return [c for c, _ in SCHEMAS[base][0]]
+
+
+def _object_type(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name=?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def partitions(conn: sqlite3.Connection, base: str) -> List[Tuple[str, Optional[float]]]:
+    """(table, day start) of every partition of base, oldest first; the legacy table has start None."""
+    out = []
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ? ESCAPE '\\'",
+                                (base.replace("_", r"\_") + r"\_p%",)):
+        suffix = name[len(base) + 2:]
+        if len(suffix) == 8 and suffix.isdigit():
+            out.append((name, float(calendar.timegm(time.strptime(suffix, "%Y%m%d")))))
+    out.sort(key=lambda p: p[1])
+    if _object_type(conn, f"{base}_legacy") == "table":
+        out.insert(0, (f"{base}_legacy", None))
+    return out
+
+
+@contextmanager
+def _schema_tx(conn: sqlite3.Connection):
+    # sqlite3 runs DDL in autocommit mode; wrap view rebuilds in one explicit
+    # transaction so other connections never see <base> missing
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _create_table(conn: sqlite3.Connection, base: str, name: str):
+    cols, indexes, constraints = SCHEMAS[base]
+    body = ", ".join(f"{c} {t}" for c, t in cols)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {name}({body}{constraints})")
+    for group in indexes:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{'_'.join(group)} ON {name}({', '.join(group)})")
+
+
+def _add_missing_columns(conn: sqlite3.Connection, base: str, name: str):
+    have = {r[1] for r in conn.execute(f"PRAGMA table_info({name})")}
+    for c, t in SCHEMAS[base][0]:
+        if c not in have:
+            conn.execute(f"ALTER TABLE {name} ADD COLUMN {c} {t.replace('NOT NULL', '').strip()}")
+
+
+def _rebuild_view(conn: sqlite3.Connection, base: str):
+    cols = ", ".join(columns(base))
+    parts = [name for name, _ in partitions(conn, base)]
+    # partitions created under an older schema get the new columns (NULL for old rows)
+    for name in parts:
+        _add_missing_columns(conn, base, name)
+    conn.execute(f"DROP VIEW IF EXISTS {base}")
+    if parts:
+        conn.execute(f"CREATE VIEW {base} AS " + " UNION ALL ".join(f"SELECT {cols} FROM {p}" for p in parts))
+    else:
+        # no partition yet: an empty view with the right columns keeps readers working
+        conn.execute(f"CREATE VIEW {base} AS SELECT " + ", ".join(f"NULL AS {c}" for c in columns(base)) + " WHERE 0")
+
+
+def _migrate_legacy(conn: sqlite3.Connection, base: str):
+    legacy = f"{base}_legacy"
+    conn.execute(f"ALTER TABLE {base} RENAME TO {legacy}")
+    # retention looks up the newest legacy row, so make that an index seek
+    for idx in conn.execute(f"PRAGMA index_list({legacy})").fetchall():
+        first = conn.execute(f"PRAGMA index_info({idx[1]})").fetchone()
+        if first and first[2] == "ts":
+            return
+    conn.execute(f"CREATE INDEX idx_{legacy}_ts ON {legacy}(ts)")
+
+
+def _view_current(conn: sqlite3.Connection, base: str) -> bool:
+    """True if base is a view selecting exactly the current schema's columns."""
+    if _object_type(conn, base) != "view":
+        return False
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({base})")] == columns(base)
+
+
+def ensure(conn: sqlite3.Connection, base: str, ts: float) -> str:
+    """Create the partition holding ts (and the view over all partitions) if missing; returns its name.
+
+    Also migrates a pre-partitioning table and brings older partitions up to
+    the current column set.
+    """
+    name = partition_name(base, ts)
+    if _object_type(conn, name) == "table" and _view_current(conn, base):
+        return name
+    with _schema_tx(conn):
+        if _object_type(conn, base) == "table":
+            _migrate_legacy(conn, base)
+        _create_table(conn, base, name)
+        _rebuild_view(conn, base)
+    return name
+
+
+def ensure_view(conn: sqlite3.Connection, base: str):
+    """Like ensure() without creating a partition; the view is empty until the first one exists."""
+    if _object_type(conn, base) != "table" and _view_current(conn, base):
+        return
+    with _schema_tx(conn):
+        if _object_type(conn, base) == "table":
+            _migrate_legacy(conn, base)
+        _rebuild_view(conn, base)
+
+
+def drop_before(conn: sqlite3.Connection, base: str, cutoff: float) -> List[str]:
+    """Drop every partition of base whose rows are all older than cutoff; returns the dropped tables.
+
+    The partition holding the newest day is always kept so the view stays valid.
+    """
+    parts = partitions(conn, base)
+    dropped = []
+    for name, start in parts[:-1]:
+        if start is None:
+            row = conn.execute(f"SELECT ts FROM {name} ORDER BY ts DESC LIMIT 1").fetchone()
+            expired = row is None or row[0] < cutoff
+        else:
+            expired = start + DAY_SEC <= cutoff
+        if expired:
+            dropped.append(name)
+    if dropped:
+        with _schema_tx(conn):
+            for name in dropped:
+                conn.execute(f"DROP TABLE IF EXISTS {name}")
+            _rebuild_view(conn, base)
+    return dropped
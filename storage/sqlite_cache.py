@@ -1,34 +1,116 @@
+import os
 import sqlite3
+import threading
 import time
+from collections import deque
+from loguru import logger
 from data_fetcher.symbols import load_symbols
+from data_fetcher.clock import system_clock
+from . import feature_codec, partitions
+from .migrations import FeatureBlobMigration
 
 class SQLiteCache:
-    def __init__(self, path: str):
+    # inserts into the day partitions of the partitioned tables; {} is the partition name
+    _INSERT_SQL = {
+        "ticks": "INSERT INTO {} VALUES (?,?,?,?)",
+        "features": "INSERT INTO {} (ts, sym, score, data) VALUES (?,?,?,?)",
+        "unified_ticks": "INSERT OR REPLACE INTO {} (ts, sym, price, mark, funding, oi, spread, volume, bid_total, ask_total, imbalance, gap_above, sweep_rejection) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+    }
+
+    def __init__(self, path: str, write_behind: bool = False, flush_ms: int = 200,
+                 flush_rows: int = 500, buffer_rows: int = 100000, clock=None,
+                 retention_days: float = 7, maintenance_sec: float = 0, checkpoint_sec: float = 0,
+                 vacuum_pages: int = 2000, wal_max_mb: int = 64, migrate_rows: int = 50000,
+                 flush_retries: int = 5):
+        self.path = path
+        # default timestamps, freshness checks and retention cutoffs follow this clock
+        self.clock = clock or system_clock
         self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        # a new file returns the pages of dropped partitions through incremental
+        # vacuum; an existing file keeps its mode until a full VACUUM
+        if not self.conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
         self.conn.execute("PRAGMA journal_mode=WAL")
         self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Background maintenance: retention drops expired day partitions, pre-creates
+        # tomorrow's, and incrementally vacuums freed pages every maintenance_sec;
+        # WAL checkpoints run every checkpoint_sec instead of inside commits.
+        # Each maintenance pass also converts up to migrate_rows JSON feature
+        # rows to packed blobs (storage/migrations.py) until none are left.
+        self.retention_days = retention_days
+        self.maintenance_sec = maintenance_sec
+        self.checkpoint_sec = checkpoint_sec
+        self.vacuum_pages = vacuum_pages
+        self.wal_max_bytes = wal_max_mb * 1024 * 1024
+        self.migrate_rows = migrate_rows
+        self._migration: FeatureBlobMigration | None = FeatureBlobMigration()
+        if checkpoint_sec > 0:
+            self.conn.execute("PRAGMA wal_autocheckpoint=0")
+        # partition name -> insert statement, statement -> (base, ts), and the
+        # statements whose partition is known to exist
+        self._part_sql: dict[str, str] = {}
+        self._sql_part: dict[str, tuple] = {}
+        self._ready: set[str] = set()
         self._init_schema()
         self._allowed = set(load_symbols())
+        # Write-behind mode: high-volume inserts (ticks, unified, features, ranks) go to
+        # a ring buffer and a dedicated writer thread flushes them in one transaction.
+        # A failed flush (e.g. "database is locked") goes back to the head of the
+        # buffer and is retried with backoff; only after flush_retries failures in
+        # a row is the batch discarded.
+        self.write_behind = write_behind
+        self.flush_ms = flush_ms
+        self.flush_rows = flush_rows
+        self.flush_retries = flush_retries
+        self._flush_failures = 0
+        self._buf: deque = deque(maxlen=buffer_rows)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: threading.Thread | None = None
+        self._wstats = {
+            "flushes": 0,
+            "flushed_rows": 0,
+            "last_batch": 0,
+            "max_batch": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "dropped": 0,
+            "retries": 0,
+            "errors": 0,
+        }
+        if write_behind:
+            self._writer = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+            self._writer.start()
+        self._mstats = {
+            "checkpoints": 0,
+            "last_checkpoint_ms": 0.0,
+            "max_checkpoint_ms": 0.0,
+            "wal_mb": 0.0,
+            "dropped_partitions": 0,
+            "vacuumed_pages": 0,
+            "migrated_rows": 0,
+            "errors": 0,
+        }
+        self._maint: threading.Thread | None = None
+        if maintenance_sec > 0 and self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            logger.info(f"{path}: auto_vacuum is not INCREMENTAL; dropped partitions are reused but not returned "
+                        f"to the OS until a one-off 'PRAGMA auto_vacuum=INCREMENTAL; VACUUM'")
+        if maintenance_sec > 0 or checkpoint_sec > 0:
+            self._maint = threading.Thread(target=self._maintenance_loop, name="sqlite-maint", daemon=True)
+            self._maint.start()
     
     def _init_schema(self):
-        # Ticks table
-        self.conn.execute("""CREATE TABLE IF NOT EXISTS ticks(
-            ts REAL NOT NULL,
-            ex TEXT NOT NULL,
-            sym TEXT NOT NULL,
-            price REAL NOT NULL
-        )""")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ticks_ts ON ticks(ts)")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ticks_sym ON ticks(sym)")
-        
-        # Features table
-        self.conn.execute("""CREATE TABLE IF NOT EXISTS features(
-            ts REAL NOT NULL,
-            sym TEXT NOT NULL,
-            data TEXT NOT NULL
-        )""")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_features_sym ON features(sym)")
-        
+        # ticks, features and unified_ticks are day-partitioned tables behind
+        # views of the same name (see storage/partitions.py). A simulated clock
+        # starts at 0 before the first replayed frame; don't create a 1970
+        # partition then, the first insert creates the right one.
+        now = self.clock.time()
+        for base in partitions.SCHEMAS:
+            if now >= partitions.DAY_SEC:
+                partitions.ensure(self.conn, base, now)
+            else:
+                partitions.ensure_view(self.conn, base)
+
         # Signals table (extended with dedup_hash and type)
         self.conn.execute("""CREATE TABLE IF NOT EXISTS signals(
             ts REAL NOT NULL,
@@ -76,63 +158,234 @@ class SQLiteCache:
         self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ranks_ts ON ranks(ts)")
         self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ranks_sym ON ranks(sym)")
         
-        # Unified averaged ticks table (one row per symbol per tick)
-        self.conn.execute("""CREATE TABLE IF NOT EXISTS unified_ticks(
-            ts REAL NOT NULL,
-            sym TEXT NOT NULL,
-            price REAL,
-            mark REAL,
-            funding REAL,
-            oi REAL,
-            spread REAL,
-            volume REAL,
-            bid_total REAL,
-            ask_total REAL,
-            imbalance REAL,
-            UNIQUE(sym, ts)
-        )""")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_unified_ts ON unified_ticks(ts)")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_unified_sym ON unified_ticks(sym)")
         self.conn.commit()
     
+    def _write(self, sql: str, params: tuple):
+        if not self.write_behind:
+            self._ensure_partition(self.conn, sql)
+            self.conn.execute(sql, params)
+            self.conn.commit()
+            return
+        if len(self._buf) == self._buf.maxlen:
+            self._wstats["dropped"] += 1
+        self._buf.append((sql, params))
+        if len(self._buf) >= self.flush_rows:
+            self._wake.set()
+
+    def _insert_sql(self, base: str, ts: float) -> str:
+        # only a name lookup: in write-behind mode this runs on the event loop,
+        # so the partition is created later by whoever executes the insert
+        name = partitions.partition_name(base, ts)
+        sql = self._part_sql.get(name)
+        if sql is None:
+            sql = self._part_sql[name] = self._INSERT_SQL[base].format(name)
+            self._sql_part[sql] = (base, ts)
+        return sql
+
+    def _ensure_partition(self, conn: sqlite3.Connection, sql: str):
+        """Create the partition an insert from _insert_sql targets, on the connection that will run it."""
+        part = self._sql_part.get(sql)
+        if part is not None and sql not in self._ready:
+            partitions.ensure(conn, *part)
+            self._ready.add(sql)
+
+    def _writer_loop(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if self.checkpoint_sec > 0:
+            conn.execute("PRAGMA wal_autocheckpoint=0")
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self.flush_ms / 1000.0)
+                self._wake.clear()
+                self._flush(conn)
+            # final drain; a failed batch is requeued, so retry it a bounded number of times
+            for _ in range(self.flush_retries + 1):
+                self._flush(conn)
+                if not self._buf:
+                    break
+        finally:
+            conn.close()
+
+    def _flush(self, conn: sqlite3.Connection):
+        batch = []
+        buf = self._buf
+        while buf:
+            batch.append(buf.popleft())
+        if not batch:
+            return
+        # Group by statement so each table gets a single executemany
+        grouped: dict[str, list] = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        t0 = time.perf_counter()
+        try:
+            for sql in grouped:
+                self._ensure_partition(conn, sql)
+            with conn:
+                for sql, rows in grouped.items():
+                    conn.executemany(sql, rows)
+        except Exception as e:
+            self._wstats["errors"] += 1
+            # a partition may have been dropped under us; check them again next time
+            self._ready.clear()
+            self._flush_failures += 1
+            if self._flush_failures > self.flush_retries:
+                self._flush_failures = 0
+                self._wstats["dropped"] += len(batch)
+                logger.warning(f"SQLite write-behind flush of {len(batch)} rows failed "
+                               f"{self.flush_retries + 1} times, discarding: {e}")
+                return
+            # back to the head of the buffer, ahead of rows queued meanwhile; if the
+            # buffer fills up, the newest rows fall off its end
+            overflow = len(buf) + len(batch) - buf.maxlen
+            if overflow > 0:
+                self._wstats["dropped"] += overflow
+            buf.extendleft(reversed(batch))
+            self._wstats["retries"] += 1
+            backoff = min(5.0, self.flush_ms / 1000.0 * 2 ** self._flush_failures)
+            logger.warning(f"SQLite write-behind flush of {len(batch)} rows failed, retrying in {backoff:.1f}s: {e}")
+            self._stop.wait(backoff)
+            return
+        self._flush_failures = 0
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+        st = self._wstats
+        st["flushes"] += 1
+        st["flushed_rows"] += len(batch)
+        st["last_batch"] = len(batch)
+        st["max_batch"] = max(st["max_batch"], len(batch))
+        st["last_flush_ms"] = dt_ms
+        st["max_flush_ms"] = max(st["max_flush_ms"], dt_ms)
+
+    def _maintenance_loop(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+        interval = min(x for x in (self.checkpoint_sec, self.maintenance_sec) if x > 0)
+        next_maint = time.monotonic() + self.maintenance_sec
+        try:
+            while not self._stop.wait(interval):
+                try:
+                    if self.checkpoint_sec > 0:
+                        self._checkpoint(conn)
+                    if self.maintenance_sec > 0 and time.monotonic() >= next_maint:
+                        next_maint = time.monotonic() + self.maintenance_sec
+                        self._maintain(conn)
+                except Exception as e:
+                    self._mstats["errors"] += 1
+                    logger.warning(f"SQLite maintenance failed: {e}")
+        finally:
+            conn.close()
+
+    def _checkpoint(self, conn: sqlite3.Connection):
+        """PASSIVE checkpoint (never waits on readers or writers); truncate the WAL once it is fully copied back and too large."""
+        t0 = time.perf_counter()
+        busy, log, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        try:
+            wal = os.path.getsize(self.path + "-wal")
+        except OSError:
+            wal = 0
+        if not busy and log == done and wal > self.wal_max_bytes:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            wal = 0
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+        st = self._mstats
+        st["checkpoints"] += 1
+        st["last_checkpoint_ms"] = dt_ms
+        st["max_checkpoint_ms"] = max(st["max_checkpoint_ms"], dt_ms)
+        st["wal_mb"] = wal / 1048576.0
+
+    def _maintain(self, conn: sqlite3.Connection):
+        now = self.clock.time()
+        # create tomorrow's partitions ahead of time so midnight needs no DDL on the write path
+        for base in partitions.SCHEMAS:
+            partitions.ensure(conn, base, now + partitions.DAY_SEC)
+        dropped = self.prune_old(self.retention_days, conn=conn)
+        migrated = self._migrate(conn)
+        freed = self._incremental_vacuum(conn)
+        if dropped or freed or migrated:
+            logger.info(f"SQLite maintenance: dropped {dropped or 'no partitions'}, migrated {migrated} feature rows, "
+                        f"vacuumed {freed} pages")
+
+    def _migrate(self, conn: sqlite3.Connection) -> int:
+        """Run a bounded step of the JSON -> blob feature migration; returns the rows converted."""
+        mig = self._migration
+        if mig is None or self.migrate_rows <= 0:
+            return 0
+        before = mig.converted
+        if mig.step(conn, self.migrate_rows, stop=self._stop, pause_sec=0.05):
+            self._migration = None
+        n = mig.converted - before
+        self._mstats["migrated_rows"] += n
+        return n
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection) -> int:
+        """Return free pages to the OS in vacuum_pages chunks, yielding to writers between chunks."""
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        freed = 0
+        while not self._stop.is_set():
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            # executescript steps the pragma to completion; execute() frees a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)});")
+            freed += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            self._stop.wait(0.05)
+        self._mstats["vacuumed_pages"] += freed
+        return freed
+
+    def maintenance_stats(self) -> dict:
+        """Checkpoint latency, WAL size, dropped partitions and vacuumed pages."""
+        return dict(self._mstats)
+
+    def writer_stats(self) -> dict:
+        """Flush latency, batch size and backlog counters of the write-behind buffer."""
+        return dict(self._wstats, backlog=len(self._buf), write_behind=self.write_behind)
+
     def _validate_symbol(self, sym: str) -> bool:
         return sym in self._allowed
     
     def _validate_timestamp(self, ts: float) -> bool:
-        return abs(ts - time.time()) < 300
+        return abs(ts - self.clock.time()) < 300
     
     def store_tick(self, ex: str, sym: str, price: float, ts: float = None):
         if ts is None:
-            ts = time.time()
+            ts = self.clock.time()
         if not self._validate_symbol(sym):
             return
         if not self._validate_timestamp(ts):
             return
         if not (isinstance(price, (int, float)) and price > 0):
             return
-        self.conn.execute("INSERT INTO ticks VALUES (?,?,?,?)", (ts, ex, sym, price))
-        self.conn.commit()
+        self._write(self._insert_sql("ticks", ts), (ts, ex, sym, price))
     
-    def store_features(self, sym: str, data_json: str, ts: float = None):
+    def store_features(self, sym: str, features: dict, ts: float = None):
+        """Store a feature dict as a packed blob (storage/feature_codec.py) with score in its own column.
+
+        Returns True if the row was written (or queued), False if it was rejected.
+        """
         if ts is None:
-            ts = time.time()
+            ts = self.clock.time()
         if not self._validate_symbol(sym):
-            return
+            return False
         if not self._validate_timestamp(ts):
-            return
-        self.conn.execute("INSERT INTO features VALUES (?,?,?)", (ts, sym, data_json))
-        self.conn.commit()
+            return False
+        self._write(self._insert_sql("features", ts),
+                    (ts, sym, feature_codec.score_of(features), feature_codec.encode(features)))
+        return True
 
     def store_unified(self, unified: dict):
-        """Store a single averaged row per symbol per tick, replacing if same (sym, ts)."""
+        """Store a single averaged row per symbol per tick, replacing if same (sym, ts).
+
+        Returns True if the row was written (or queued), False if it was rejected.
+        """
         if not isinstance(unified, dict):
-            return
+            return False
         sym = unified.get("symbol") or unified.get("sym")
-        ts = unified.get("timestamp") or unified.get("ts") or time.time()
+        ts = unified.get("timestamp") or unified.get("ts") or self.clock.time()
         if not self._validate_symbol(sym):
-            return
+            return False
         if not self._validate_timestamp(float(ts)):
-            return
+            return False
         price = unified.get("price")
         mark = unified.get("mark")
         funding = unified.get("funding")
@@ -143,28 +396,37 @@ class SQLiteCache:
         bid_total = depth.get("bid_total") if isinstance(depth, dict) else None
         ask_total = depth.get("ask_total") if isinstance(depth, dict) else None
         imbalance = depth.get("imbalance") if isinstance(depth, dict) else None
-        self.conn.execute(
-            "INSERT OR REPLACE INTO unified_ticks (ts, sym, price, mark, funding, oi, spread, volume, bid_total, ask_total, imbalance) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
-            (float(ts), sym, _float_or_none(price), _float_or_none(mark), _float_or_none(funding), _float_or_none(oi), _float_or_none(spread), _float_or_none(volume), _float_or_none(bid_total), _float_or_none(ask_total), _float_or_none(imbalance)),
+        gap_above = depth.get("gap_above") if isinstance(depth, dict) else None
+        sweep = unified.get("sweep_rejection")
+        self._write(
+            self._insert_sql("unified_ticks", float(ts)),
+            (float(ts), sym, _float_or_none(price), _float_or_none(mark), _float_or_none(funding), _float_or_none(oi), _float_or_none(spread), _float_or_none(volume), _float_or_none(bid_total), _float_or_none(ask_total), _float_or_none(imbalance), _float_or_none(gap_above), _float_or_none(sweep)),
         )
-        self.conn.commit()
+        return True
     
     def store_signal(self, sym: str, score: float, entry_price: float, reason: str = "", ts: float = None, dedup_hash: str | None = None, signal_type: str = "entry"):
         if ts is None:
-            ts = time.time()
+            ts = self.clock.time()
         if not self._validate_symbol(sym):
             return
         self.conn.execute("INSERT INTO signals (ts, sym, score, entry_price, reason, dedup_hash, signal_type) VALUES (?,?,?,?,?,?,?)", (ts, sym, score, entry_price, reason, dedup_hash, signal_type))
         self.conn.commit()
 
     def seen_recent_signal(self, sym: str, dedup_hash: str, window_sec: int = 900) -> bool:
-        cutoff = time.time() - window_sec
+        cutoff = self.clock.time() - window_sec
         row = self.conn.execute("SELECT 1 FROM signals WHERE sym=? AND dedup_hash=? AND ts>? LIMIT 1", (sym, dedup_hash, cutoff)).fetchone()
         return bool(row)
 
+    def recent_signals(self, since_ts: float) -> list[tuple]:
+        """(ts, sym, dedup_hash, signal_type) for signals newer than since_ts, oldest first."""
+        return self.conn.execute(
+            "SELECT ts, sym, dedup_hash, signal_type FROM signals WHERE ts>? ORDER BY ts ASC",
+            (since_ts,),
+        ).fetchall()
+
     def seen_recent_symbol_signal(self, sym: str, window_sec: int = 300, signal_type: str = 'entry') -> bool:
         """Return True if there is any signal for symbol within the cooldown window, optionally filtered by type."""
-        cutoff = time.time() - window_sec
+        cutoff = self.clock.time() - window_sec
         if signal_type:
             row = self.conn.execute(
                 "SELECT 1 FROM signals WHERE sym=? AND signal_type=? AND ts>? LIMIT 1",
@@ -179,7 +441,7 @@ class SQLiteCache:
 
     def open_position(self, sym: str, entry_price: float, entry_ts: float | None = None, best_low: float | None = None):
         if entry_ts is None:
-            entry_ts = time.time()
+            entry_ts = self.clock.time()
         if not self._validate_symbol(sym):
             return
         self.conn.execute("INSERT INTO positions (sym, entry_ts, entry_price, status, best_low) VALUES (?,?,?,?,?)",
@@ -188,7 +450,7 @@ class SQLiteCache:
 
     def close_position(self, sym: str, exit_price: float, reason: str, exit_ts: float | None = None):
         if exit_ts is None:
-            exit_ts = time.time()
+            exit_ts = self.clock.time()
         row = self.conn.execute("SELECT entry_price FROM positions WHERE sym=? AND status='OPEN' ORDER BY entry_ts DESC LIMIT 1", (sym,)).fetchone()
         if not row:
             return
@@ -208,13 +470,16 @@ class SQLiteCache:
             return None
         return {"entry_ts": row[0], "entry_price": float(row[1]), "best_low": float(row[2]) if row[2] is not None else None}
 
+    def load_open_positions(self) -> list[dict]:
+        rows = self.conn.execute("SELECT sym, entry_ts, entry_price, best_low FROM positions WHERE status='OPEN' ORDER BY entry_ts ASC").fetchall()
+        return [{"sym": r[0], "entry_ts": r[1], "entry_price": float(r[2]), "best_low": float(r[3]) if r[3] is not None else None} for r in rows]
+
     def store_rank(self, sym: str, score: float, ts: float | None = None):
         if ts is None:
-            ts = time.time()
+            ts = self.clock.time()
         if not self._validate_symbol(sym):
             return
-        self.conn.execute("INSERT INTO ranks (ts, sym, score) VALUES (?,?,?)", (ts, sym, score))
-        self.conn.commit()
+        self._write("INSERT INTO ranks (ts, sym, score) VALUES (?,?,?)", (ts, sym, score))
     
     def latest_tick(self, sym: str) -> dict:
         if not self._validate_symbol(sym):
@@ -228,12 +493,12 @@ class SQLiteCache:
         if not self._validate_symbol(sym):
             return None
         row = self.conn.execute("""
-            SELECT ts, price, mark, funding, oi, spread, volume, bid_total, ask_total, imbalance
+            SELECT ts, price, mark, funding, oi, spread, volume, bid_total, ask_total, imbalance, gap_above, sweep_rejection
             FROM unified_ticks WHERE sym=? ORDER BY ts DESC LIMIT 1
         """, (sym,)).fetchone()
         if not row:
             return None
-        ts, price, mark, funding, oi, spread, volume, bt, at, imb = row
+        ts, price, mark, funding, oi, spread, volume, bt, at, imb, gap, sweep = row
         return {
             "timestamp": ts,
             "symbol": sym,
@@ -243,36 +508,46 @@ class SQLiteCache:
             "oi": oi,
             "spread": spread,
             "volume": volume,
-            "depth": {"bid_total": bt, "ask_total": at, "imbalance": imb},
+            "sweep_rejection": sweep,
+            "depth": {"bid_total": bt, "ask_total": at, "imbalance": imb, "gap_above": gap},
         }
 
-def _float_or_none(x):
-    try:
-        if x is None:
-            return None
-        return float(x)
-    except Exception:
-        return None
-    
     def latest_price(self, sym: str) -> float:
         tick = self.latest_tick(sym)
         return tick["price"] if tick else None
     
-    def latest_features(self, sym: str) -> str:
+    def latest_features(self, sym: str) -> dict | None:
         if not self._validate_symbol(sym):
             return None
         row = self.conn.execute("SELECT data FROM features WHERE sym=? ORDER BY ts DESC LIMIT 1", (sym,)).fetchone()
-        return row[0] if row else None
+        return feature_codec.decode(row[0]) if row else None
     
-    def prune_old(self, days: int = 7):
-        cutoff = time.time() - (days * 86400)
-        self.conn.execute("DELETE FROM ticks WHERE ts < ?", (cutoff,))
-        try:
-            self.conn.execute("DELETE FROM unified_ticks WHERE ts < ?", (cutoff,))
-        except Exception:
-            pass
-        self.conn.execute("DELETE FROM features WHERE ts < ?", (cutoff,))
-        self.conn.commit()
+    def prune_old(self, days: float = 7, conn: sqlite3.Connection | None = None) -> list[str]:
+        """Drop the day partitions of ticks, unified_ticks and features that are entirely older than `days`."""
+        cutoff = self.clock.time() - (days * 86400)
+        dropped = []
+        for base in partitions.SCHEMAS:
+            dropped += partitions.drop_before(conn or self.conn, base, cutoff)
+        self._mstats["dropped_partitions"] += len(dropped)
+        return dropped
     
     def close(self):
+        if self._writer is not None:
+            # Stop the writer and let it drain the remaining buffer
+            self._stop.set()
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+        if self._maint is not None:
+            self._stop.set()
+            self._maint.join()
+            self._maint = None
         self.conn.close()
+
+def _float_or_none(x):
+    try:
+        if x is None:
+            return None
+        return float(x)
+    except Exception:
+        return None
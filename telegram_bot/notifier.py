@@ -1,23 +1,23 @@
 import aiohttp
 import asyncio
 import time
-from typing import Dict, Tuple
+from orchestrator.cooldowns import CooldownIndex
+from data_fetcher.clock import system_clock
 
 class TelegramNotifier:
     COOLDOWN_SEC = 300  # 5 minutes per symbol
     EXIT_COOLDOWN_SEC = 120  # 2 minutes per symbol for exits
     
-    def __init__(self, token: str, chat_id: int):
+    def __init__(self, token: str, chat_id: int, cooldowns: CooldownIndex | None = None, clock=None):
         self.token = token
         self.chat_id = chat_id
-        self._last_signal_ts: Dict[str, float] = {}  # sym -> timestamp
-        self._last_exit_ts: Dict[str, float] = {}  # sym -> timestamp
+        self.clock = clock or system_clock
+        # last send per (sym, 'tg_signal'|'tg_exit'); shared with the orchestrator when provided
+        self.cooldowns = cooldowns if cooldowns is not None else CooldownIndex(ttl_sec=self.COOLDOWN_SEC, clock=self.clock)
     
     def _should_send(self, sym: str) -> bool:
         """Check if cooldown allows new signal for symbol."""
-        now = time.time()
-        last = self._last_signal_ts.get(sym, 0.0)
-        return (now - last) >= self.COOLDOWN_SEC
+        return not self.cooldowns.seen((sym, "tg_signal"), self.COOLDOWN_SEC)
     
     def _format_signal(self, sym: str, score: float, entry_price: float, features: dict) -> str:
         """Format signal message with real metrics."""
@@ -39,7 +39,7 @@ TP: +1.7% | SL: -1.1%
 • Funding: {funding:.3f}
 • BTC Alignment: {btc:.2f}
 
-⏱ {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}"""
+⏱ {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(self.clock.time()))}"""
         return msg
     
     async def send_signal(self, sym: str, score: float, entry_price: float, features: dict) -> bool:
@@ -50,13 +50,11 @@ TP: +1.7% | SL: -1.1%
         text = self._format_signal(sym, score, entry_price, features)
         success = await self._send(text)
         if success:
-            self._last_signal_ts[sym] = time.time()
+            self.cooldowns.touch((sym, "tg_signal"))
         return success
 
     def _should_send_exit(self, sym: str) -> bool:
-        now = time.time()
-        last = self._last_exit_ts.get(sym, 0.0)
-        return (now - last) >= self.EXIT_COOLDOWN_SEC
+        return not self.cooldowns.seen((sym, "tg_exit"), self.EXIT_COOLDOWN_SEC)
 
     def _format_exit(self, sym: str, reason: str, price: float, pnl_pct: float) -> str:
         icon = "✅" if pnl_pct >= 0 else "⛔"
@@ -73,7 +71,7 @@ Reason: {label}
 Exit: ${price:.6f}
 PnL: {pnl_pct:.2f}%
 
-⏱ {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}"""
+⏱ {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(self.clock.time()))}"""
         return msg
 
     async def send_exit(self, sym: str, reason: str, price: float, pnl_pct: float) -> bool:
@@ -83,7 +81,7 @@ PnL: {pnl_pct:.2f}%
         text = self._format_exit(sym, reason, price, pnl_pct)
         success = await self._send(text)
         if success:
-            self._last_exit_ts[sym] = time.time()
+            self.cooldowns.touch((sym, "tg_exit"))
         return success
     
     async def _send(self, text: str) -> bool:
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_fetcher import symbols as _symbols  # noqa: E402
+
+
+@pytest.fixture
+def symbols(monkeypatch):
+    """Seed load_symbols() with a test universe instead of state/symbols.txt."""
+    syms = ["BTCUSDT"] + [f"S{i}USDT" for i in range(6)]
+    monkeypatch.setattr(_symbols, "_SYMBOLS_CACHE", list(syms))
+    return syms
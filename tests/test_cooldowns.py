@@ -0,0 +1,53 @@
+from data_fetcher.clock import SimClock
+from orchestrator.cooldowns import CooldownIndex
+
+T0 = 1_700_000_040.0  # start of a 60s bucket
+
+
+def test_seen_within_window():
+    idx = CooldownIndex(ttl_sec=900, clock=SimClock(T0))
+    assert not idx.seen(("AAA", "entry"), 300)
+    idx.touch(("AAA", "entry"))
+    assert idx.last(("AAA", "entry")) == T0
+    assert idx.seen(("AAA", "entry"), 300, T0 + 299.9)
+    assert not idx.seen(("AAA", "entry"), 300, T0 + 300)
+
+
+def test_expired_buckets_are_evicted_whole():
+    idx = CooldownIndex(ttl_sec=120, bucket_sec=60)
+    idx.touch("a", T0)
+    idx.touch("b", T0 + 30)
+    idx.touch("c", T0 + 60)
+    assert len(idx) == 3 and len(idx._buckets) == 2
+    # the horizon has not passed the first bucket yet
+    idx.touch("d", T0 + 179)
+    assert len(idx) == 4
+    # T0's bucket ends once now - ttl reaches the next one
+    idx.touch("d", T0 + 180)
+    assert len(idx) == 2
+    assert idx.last("a") is None and idx.last("b") is None
+    assert idx.last("c") == T0 + 60
+    assert list(idx._buckets) == [int((T0 + 60) // 60), int((T0 + 120) // 60), int((T0 + 180) // 60)]
+
+
+def test_retouched_key_survives_its_old_bucket():
+    idx = CooldownIndex(ttl_sec=120, bucket_sec=60)
+    idx.touch("a", T0)
+    idx.touch("a", T0 + 90)
+    idx.touch("z", T0 + 180)
+    # "a" was filed again under a newer bucket, so the old one drops without it
+    assert idx.last("a") == T0 + 90
+    idx.touch("z", T0 + 240)
+    assert idx.last("a") is None
+    assert len(idx) == 1
+
+
+def test_memory_bounded_by_ttl():
+    idx = CooldownIndex(ttl_sec=300, bucket_sec=60)
+    for i in range(10000):
+        idx.touch(("S", i), T0 + i)
+    # keys from at most ttl + one bucket of touches are kept
+    assert len(idx) <= 300 + 60
+    assert len(idx._buckets) <= 300 // 60 + 2
+    idx.load([(T0 + 20000, ("S", "new"))])
+    assert len(idx) == 1
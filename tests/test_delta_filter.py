@@ -0,0 +1,104 @@
+import pytest
+
+from storage.delta_filter import FEATURE_TOLERANCES, UNIFIED_TOLERANCES, DeltaFilter, parse_tolerances
+
+
+def _flt(spec="price=bps:2,depth.bid_total=pct:5,score=abs:1", heartbeat=15.0):
+    return DeltaFilter(parse_tolerances(spec), heartbeat)
+
+
+def _offer(flt, sym, row, ts):
+    """should_write + written, as the orchestrator does after a successful store."""
+    if flt.should_write(sym, row, ts):
+        flt.written(sym)
+        return True
+    return False
+
+
+def test_parse_tolerances():
+    assert parse_tolerances("price=bps:2, depth.bid_total=PCT:5,,score=abs:1") == {
+        "price": ("bps", 2.0), "depth.bid_total": ("pct", 5.0), "score": ("abs", 1.0)}
+    assert parse_tolerances(UNIFIED_TOLERANCES)["price"] == ("bps", 2.0)
+    assert parse_tolerances(FEATURE_TOLERANCES)["score"] == ("abs", 1.0)
+    with pytest.raises(ValueError):
+        parse_tolerances("price=ticks:2")
+
+
+def test_first_row_is_written():
+    assert _offer(_flt(), "AAA", {"price": 1.0}, 0.0)
+
+
+def test_bps_tolerance():
+    flt = _flt()
+    _offer(flt, "AAA", {"price": 1.0}, 0.0)
+    assert not _offer(flt, "AAA", {"price": 1.00019}, 1.0)
+    assert _offer(flt, "AAA", {"price": 1.000201}, 2.0)
+
+
+def test_drift_is_measured_from_last_write():
+    flt = _flt()
+    _offer(flt, "AAA", {"price": 1.0}, 0.0)
+    assert not _offer(flt, "AAA", {"price": 1.00015}, 1.0)
+    assert not _offer(flt, "AAA", {"price": 1.00019}, 2.0)
+    assert _offer(flt, "AAA", {"price": 1.00021}, 3.0)
+
+
+def test_nested_pct_and_abs_fields():
+    flt = _flt()
+    _offer(flt, "AAA", {"price": 1.0, "depth": {"bid_total": 100.0}, "score": 50}, 0.0)
+    assert not _offer(flt, "AAA", {"price": 1.0, "depth": {"bid_total": 104.0}, "score": 50.5}, 1.0)
+    assert _offer(flt, "AAA", {"price": 1.0, "depth": {"bid_total": 105.0}, "score": 50.5}, 2.0)
+    assert _offer(flt, "AAA", {"price": 1.0, "depth": {"bid_total": 105.0}, "score": 51.5}, 3.0)
+
+
+def test_appearing_or_vanishing_field_is_a_change():
+    flt = _flt()
+    _offer(flt, "AAA", {"price": 1.0}, 0.0)
+    assert _offer(flt, "AAA", {"price": 1.0, "score": 10}, 1.0)
+    assert _offer(flt, "AAA", {"price": 1.0, "score": None}, 2.0)
+    assert not _offer(flt, "AAA", {"price": 1.0, "score": float("nan")}, 3.0)
+
+
+def test_zero_reference_and_bools():
+    flt = _flt("gap=pct:10,flag=abs:0.5")
+    _offer(flt, "AAA", {"gap": 0.0, "flag": False}, 0.0)
+    assert not _offer(flt, "AAA", {"gap": 0.0, "flag": False}, 1.0)
+    assert _offer(flt, "AAA", {"gap": 0.001, "flag": False}, 2.0)
+    assert _offer(flt, "AAA", {"gap": 0.001, "flag": True}, 3.0)
+
+
+def test_heartbeat():
+    flt = _flt(heartbeat=15.0)
+    _offer(flt, "AAA", {"price": 1.0}, 100.0)
+    assert not _offer(flt, "AAA", {"price": 1.0}, 114.9)
+    assert _offer(flt, "AAA", {"price": 1.0}, 115.0)
+    assert not _offer(flt, "AAA", {"price": 1.0}, 120.0)
+
+
+def test_symbols_are_independent():
+    flt = _flt()
+    _offer(flt, "AAA", {"price": 1.0}, 0.0)
+    assert _offer(flt, "BBB", {"price": 1.0}, 0.0)
+    assert not _offer(flt, "AAA", {"price": 1.0}, 1.0)
+
+
+def test_rejected_store_is_not_remembered():
+    flt = _flt()
+    _offer(flt, "AAA", {"price": 1.0}, 0.0)
+    # passed the filter, but the store rejected it: no written() call
+    assert flt.should_write("AAA", {"price": 2.0}, 1.0)
+    # still compared with the last real write, and the heartbeat still runs from it
+    assert not _offer(flt, "AAA", {"price": 1.0}, 2.0)
+    assert _offer(flt, "AAA", {"price": 1.0}, 15.0)
+    flt.written("AAA")  # nothing pending: no-op
+    assert flt.stats()["written"] == 2
+
+
+def test_stats():
+    flt = _flt(heartbeat=10.0)
+    for i in range(20):
+        _offer(flt, "AAA", {"price": 1.0}, float(i))
+    st = flt.stats()
+    assert (st["seen"], st["written"], st["changed"], st["heartbeats"]) == (20, 2, 1, 1)
+    assert st["ratio"] == pytest.approx(10.0)
+    assert _flt().stats()["ratio"] == 0.0
@@ -0,0 +1,39 @@
+import numpy as np
+
+from backtest.engine import entry_conditions
+from scalp_engine.entry_trigger import EntryTrigger
+
+# thresholds of the 7 conditions; rows are drawn on, just below and just above them
+THRESHOLDS = {
+    "sweep_rejection": 0.7,
+    "ask_dom": 0.6,
+    "gap_above": 0.005,
+    "spread_pct": 0.002,
+    "oi_divergence": 0.0,
+    "funding_impulse": 0.0,
+    "btc_alignment": 0.5,
+}
+
+
+def _columns(rng, n):
+    cols = {}
+    for k, th in THRESHOLDS.items():
+        step = max(abs(th), 1e-3) * 0.1
+        cols[k] = th + rng.choice([-2, -1, 0, 1, 2], n) * step
+    return cols
+
+
+def test_entry_conditions_match_should_short_row_by_row():
+    rng = np.random.default_rng(3)
+    n = 20000
+    cols = _columns(rng, n)
+    got = entry_conditions(cols)
+    trig = EntryTrigger()
+    for i in range(n):
+        feats = {k: float(v[i]) for k, v in cols.items()}
+        # the orchestrator passes gap_above as liquidity_gap_above and the book fields separately
+        feats["liquidity_gap_above"] = feats["gap_above"]
+        micro = {"ask_dom": feats["ask_dom"], "spread_pct": feats["spread_pct"]}
+        assert bool(got[i]) == trig.should_short(feats, micro, "AAAUSDT"), feats
+    # both outcomes are exercised
+    assert 0 < got.sum() < n
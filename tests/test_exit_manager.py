@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from backtest.engine import first_exit
+from scalp_engine.exit_manager import ExitManager
+
+ACT, GIVEBACK, HARD_STOP = 0.6, 0.4, 1.2
+
+
+def _manager():
+    em = ExitManager()
+    em.TRAIL_ACTIVATE_PCT, em.TRAIL_GIVEBACK_PCT, em.HARD_STOP_LOSS_PCT = ACT, GIVEBACK, HARD_STOP
+    return em
+
+
+def _scalar_exit(em, px, start, entry):
+    """The live loop: trailing_for_short on every tick after entry, carrying best_low."""
+    best = None
+    for j in range(start, len(px)):
+        hit, reason, pnl, best, _ = em.trailing_for_short(entry, float(px[j]), best)
+        if hit:
+            return j, reason, pnl
+    return None
+
+
+def _path(rng, n, drift, vol):
+    return 1.0 * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 1024])
+def test_first_exit_matches_trailing_for_short(chunk):
+    rng = np.random.default_rng(11)
+    em = _manager()
+    exits = set()
+    for _ in range(300):
+        n = int(rng.integers(2, 3000))
+        px = _path(rng, n, rng.normal(0, 2e-4), rng.uniform(2e-4, 3e-3))
+        start = int(rng.integers(1, n))
+        entry = float(px[start - 1])
+        want = _scalar_exit(em, px, start, entry)
+        got = first_exit(px, start, entry, ACT, GIVEBACK, HARD_STOP, chunk=chunk)
+        if want is None:
+            assert got is None
+        else:
+            assert got is not None
+            assert got[:2] == want[:2]
+            assert got[2] == pytest.approx(want[2])
+            exits.add(want[1])
+    assert exits == {"hard_stop", "trailing_giveback"}
+
+
+def test_best_low_carries_across_chunk_boundary():
+    # the low is set in the first chunk and the giveback happens in a later one
+    entry = 1.0
+    px = np.array([0.999, 0.990, 0.991, 0.992, 0.993, 0.994, 0.995, 0.996, 0.997])
+    want = _scalar_exit(_manager(), px, 0, entry)
+    assert want is not None and want[0] >= 4
+    for chunk in (1, 2, 3):
+        got = first_exit(px, 0, entry, ACT, GIVEBACK, HARD_STOP, chunk=chunk)
+        assert got[:2] == want[:2]
+
+
+def test_no_exit_and_empty_tail():
+    px = np.full(50, 1.0)
+    assert first_exit(px, 0, 1.0, ACT, GIVEBACK, HARD_STOP, chunk=8) is None
+    assert first_exit(px, 50, 1.0, ACT, GIVEBACK, HARD_STOP) is None
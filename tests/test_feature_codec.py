@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from storage import feature_codec, migrations, partitions
+
+
+def test_roundtrip_schema_keys():
+    feats = {k: (True if k in feature_codec.BOOL_KEYS else 0.25) for k in feature_codec.SCHEMAS[feature_codec.VERSION]}
+    feats["score"] = 72.5
+    out = feature_codec.decode(feature_codec.encode(feats))
+    assert set(out) == set(feats)
+    for k, v in feats.items():
+        assert out[k] == pytest.approx(v, rel=1e-6)
+
+
+def test_bools_decode_as_bools():
+    out = feature_codec.decode(feature_codec.encode({"oi_rising": True, "price_falling": False, "score": 1}))
+    assert out["oi_rising"] is True
+    assert out["price_falling"] is False
+    assert out["score"] == 1.0
+
+
+def test_extra_keys_roundtrip():
+    feats = {"score": 10.0, "near_resistance_300s": 0.125, "near_support_300s": 0.5}
+    out = feature_codec.decode(feature_codec.encode(feats))
+    assert out == pytest.approx(feats)
+
+
+def test_missing_none_and_nan_are_absent():
+    out = feature_codec.decode(feature_codec.encode({"score": None, "ask_dom": float("nan"), "gap_above": "x"}))
+    assert out == {}
+
+
+def test_float32_precision():
+    out = feature_codec.decode(feature_codec.encode({"spread_pct": 0.000123456789}))
+    assert out["spread_pct"] == pytest.approx(0.000123456789, rel=1e-6)
+
+
+def test_decode_legacy_json_and_garbage():
+    legacy = json.dumps({"score": 55.0, "oi_rising": True, "near_support_120s": 0.3})
+    assert feature_codec.decode(legacy) == {"score": 55.0, "oi_rising": True, "near_support_120s": 0.3}
+    assert feature_codec.decode("not json") == {}
+    assert feature_codec.decode(None) == {}
+
+
+def test_score_of():
+    assert feature_codec.score_of({"score": 42}) == 42.0
+    assert feature_codec.score_of({"score": None}) is None
+    assert feature_codec.score_of({}) is None
+    assert feature_codec.score_of({"score": float("nan")}) is None
+
+
+def _legacy_db(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE features(ts REAL, sym TEXT, data TEXT)")
+    conn.executemany("INSERT INTO features VALUES (?,?,?)", rows)
+    conn.commit()
+    partitions.ensure(conn, "features", 1_700_000_000.0)
+    return conn
+
+
+def test_migration_converts_legacy_text_rows():
+    rows = [(1_700_000_000.0 + i, "AAAUSDT", json.dumps({"score": float(i), "oi_rising": i % 2 == 0}))
+            for i in range(25)]
+    rows.append((1_700_000_100.0, "AAAUSDT", "{broken"))
+    conn = _legacy_db(rows)
+    mig = migrations.FeatureBlobMigration(batch_rows=10)
+    assert mig.pending_tables(conn) == ["features_legacy"]
+
+    # bounded steps resume where the previous one stopped
+    assert mig.step(conn, max_rows=10) is False
+    assert mig.converted == 10
+    assert mig.step(conn) is True
+    assert mig.converted == 26
+    assert mig.pending_tables(conn) == []
+
+    got = conn.execute("SELECT ts, score, data FROM features ORDER BY ts").fetchall()
+    assert all(isinstance(data, bytes) for _, _, data in got)
+    for (ts, sc, data), (_, _, raw) in zip(got[:25], rows[:25]):
+        want = json.loads(raw)
+        assert sc == want["score"]
+        assert feature_codec.decode(data) == {"score": want["score"], "oi_rising": want["oi_rising"]}
+    assert got[25][1] is None and feature_codec.decode(got[25][2]) == {}
+
+    # recorded as done; a new instance finds nothing to do
+    assert migrations.FeatureBlobMigration().pending_tables(conn) == []
+
+
+def test_migration_skips_blob_partitions():
+    conn = sqlite3.connect(":memory:")
+    name = partitions.ensure(conn, "features", 1_700_000_000.0)
+    conn.execute(f"INSERT INTO {name} (ts, sym, score, data) VALUES (?,?,?,?)",
+                 (1_700_000_000.0, "AAAUSDT", 5.0, feature_codec.encode({"score": 5.0})))
+    mig = migrations.FeatureBlobMigration()
+    assert mig.pending_tables(conn) == []
+    assert mig.step(conn) is True
+    assert mig.converted == 0
+
+
+def test_stop_event_interrupts_migration():
+    conn = _legacy_db([(1_700_000_000.0 + i, "AAAUSDT", json.dumps({"score": 1.0})) for i in range(30)])
+    stop = threading.Event()
+    stop.set()
+    mig = migrations.FeatureBlobMigration(batch_rows=10)
+    assert mig.step(conn, stop=stop) is False
+    assert mig.converted == 10
+    assert conn.execute("SELECT COUNT(*) FROM features WHERE score IS NOT NULL").fetchone()[0] == 10
@@ -0,0 +1,54 @@
+import math
+import random
+
+import pytest
+
+from data_fetcher.clock import SimClock
+from features.volatility import DEFAULT_WINDOWS, Volatility
+
+
+def _scan_std(vol, window):
+    now = vol.prices[-1][0]
+    wins = [p for t, p in vol.prices if t >= now - window]
+    rets = [(b - a) / a for a, b in zip(wins, wins[1:])]
+    mu = sum(rets) / len(rets)
+    return math.sqrt(sum((r - mu) ** 2 for r in rets) / len(rets))
+
+
+def test_running_burst_matches_scan_after_many_ingests():
+    rng = random.Random(7)
+    clock = SimClock(1_700_000_000.0)
+    vol = Volatility(clock=clock)
+    p = 100.0
+    # alternate wild and quiet regimes; removing large returns from the running
+    # moments is where Welford downdates lose precision
+    for i in range(47000):
+        clock.advance(0.5)
+        scale = 0.05 if (i // 2000) % 2 == 0 else 1e-5
+        p *= 1.0 + rng.gauss(0.0, scale)
+        vol.ingest_mark(clock.time(), p)
+        if i % 5000 == 4999:
+            for w in DEFAULT_WINDOWS:
+                assert vol.burst(w) == pytest.approx(vol._scan_burst(w), rel=1e-9, abs=1e-12)
+    # quiet regime at the end, so burst() is not clamped at 1.0
+    for w in DEFAULT_WINDOWS:
+        assert 0.0 < vol.burst(w) < 1.0
+        assert vol.burst(w) == pytest.approx(vol._scan_burst(w), rel=1e-9)
+        assert vol._stats[w].std() == pytest.approx(_scan_std(vol, w), rel=1e-9)
+
+
+def test_burst_needs_five_prices_in_window():
+    clock = SimClock(1_700_000_000.0)
+    vol = Volatility(clock=clock)
+    for i in range(4):
+        clock.advance(1.0)
+        vol.ingest_mark(clock.time(), 100.0 + i)
+    assert vol.burst(30) == 0.0
+    clock.advance(1.0)
+    vol.ingest_mark(clock.time(), 99.0)
+    assert vol.burst(30) == pytest.approx(vol._scan_burst(30))
+    assert vol.burst(30) > 0.0
+    # prices older than the window no longer count
+    clock.advance(60.0)
+    vol.ingest_mark(clock.time(), 99.5)
+    assert vol.burst(30) == 0.0
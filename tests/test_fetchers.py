@@ -0,0 +1,161 @@
+import pickle
+
+from data_fetcher.clock import SimClock
+from data_fetcher.orderbook import BookManager, OrderBook, book_top
+from data_fetcher.shards import ShardedIngest, _ShardWorker
+
+
+def _bybit(kind, u, bids=(), asks=()):
+    return {"type": kind, "data": {"u": u, "b": [[str(p), str(s)] for p, s in bids],
+                                   "a": [[str(p), str(s)] for p, s in asks]}}
+
+
+def test_snapshot_sorts_levels_and_drops_empty():
+    book = OrderBook(max_levels=3)
+    book.apply_snapshot([(99.0, 1.0), (100.0, 2.0), (98.0, 0.0), (97.0, 4.0), (96.0, 5.0)],
+                        [(102.0, 1.0), (101.0, 3.0), (0.0, 9.0)], seq=10, ts=1.0)
+    assert book.bids() == [(100.0, 2.0), (99.0, 1.0), (97.0, 4.0)]
+    assert book.asks() == [(101.0, 3.0), (102.0, 1.0)]
+    assert (book.best_bid, book.best_ask) == (100.0, 101.0)
+    assert book_top(book) == (100.0, 101.0, 7.0, 4.0)
+    assert book.synced and book.seq == 10
+
+
+def test_delta_insert_update_delete_both_sides():
+    book = OrderBook(max_levels=10)
+    book.apply_snapshot([(100.0, 1.0), (99.0, 2.0)], [(101.0, 1.0), (102.0, 2.0)], seq=1, ts=0.0)
+    # insert a better level on each side, update one, delete one
+    assert book.apply_delta([(100.5, 3.0), (99.0, 5.0), (100.0, 0.0)],
+                            [(100.8, 4.0), (102.0, 0.5), (101.0, 0.0)], seq=2, prev_seq=1, ts=1.0)
+    assert book.bids() == [(100.5, 3.0), (99.0, 5.0)]
+    assert book.asks() == [(100.8, 4.0), (102.0, 0.5)]
+    assert (book.best_bid, book.best_ask) == (100.5, 100.8)
+    assert book.bid_total == 8.0 and book.ask_total == 4.5
+    # deleting a level that is not there is a no-op
+    assert book.apply_delta([(50.0, 0.0)], [(150.0, 0.0)], seq=3, prev_seq=2)
+    assert book.bid_total == 8.0 and book.ask_total == 4.5 and book.seq == 3
+
+
+def test_delta_respects_max_levels():
+    book = OrderBook(max_levels=2)
+    book.apply_snapshot([(100.0, 1.0), (99.0, 2.0)], [(101.0, 1.0), (102.0, 2.0)])
+    # worse than the retained depth: ignored; better: pushes the worst level out
+    book.apply_delta([(98.0, 7.0)], [(103.0, 7.0)])
+    assert book.bids() == [(100.0, 1.0), (99.0, 2.0)]
+    book.apply_delta([(100.5, 4.0)], [(100.7, 4.0)])
+    assert book.bids() == [(100.5, 4.0), (100.0, 1.0)]
+    assert book.asks() == [(100.7, 4.0), (101.0, 1.0)]
+    assert book.bid_total == 5.0 and book.ask_total == 5.0
+
+
+def test_delta_gap_and_stale_replay():
+    book = OrderBook()
+    assert not book.apply_delta([(1.0, 1.0)], [], seq=1, prev_seq=0)  # never synced
+    book.apply_snapshot([(100.0, 1.0)], [(101.0, 1.0)], seq=10)
+    # already covered by the snapshot: accepted without touching the book
+    assert book.apply_delta([(100.0, 9.0)], [], seq=9, prev_seq=8)
+    assert book.bids() == [(100.0, 1.0)] and book.seq == 10
+    assert not book.apply_delta([(100.0, 2.0)], [], seq=13, prev_seq=12)
+    assert not book.synced and book.gaps == 1
+
+
+def test_manager_resync_on_gap_with_cooldown():
+    clock = SimClock(1000.0)
+    mgr = BookManager(clock)
+    calls = []
+    mgr.set_resync("bybit", calls.append)
+    assert mgr.on_depth("bybit", "BTCUSDT", _bybit("snapshot", 1, [(100, 1)], [(101, 1)])) is not None
+    assert mgr.on_depth("bybit", "BTCUSDT", _bybit("delta", 2, [(100, 2)])) is not None
+    assert mgr.get("bybit", "BTCUSDT").bids() == [(100.0, 2.0)]
+
+    assert mgr.on_depth("bybit", "BTCUSDT", _bybit("delta", 5, [(100, 3)])) is None
+    book = mgr.get("bybit", "BTCUSDT")
+    assert calls == ["BTCUSDT"] and mgr.resyncs == 1
+    assert not book.synced and len(book) == 0
+
+    # further deltas inside the cooldown do not request again
+    clock.advance(BookManager.RESYNC_COOLDOWN_SEC - 0.1)
+    assert mgr.on_depth("bybit", "BTCUSDT", _bybit("delta", 6, [(100, 3)])) is None
+    assert calls == ["BTCUSDT"]
+    clock.advance(0.1)
+    assert mgr.on_depth("bybit", "BTCUSDT", _bybit("delta", 7, [(100, 3)])) is None
+    assert calls == ["BTCUSDT", "BTCUSDT"] and mgr.resyncs == 2
+
+    # a fresh snapshot brings the book back
+    book = mgr.on_depth("bybit", "BTCUSDT", _bybit("snapshot", 1, [(99, 1)], [(100, 1)]))
+    assert book is not None and book.synced and book.best_bid == 99.0
+    assert mgr.stats() == {"books": 1, "synced": 1, "gaps": 1, "resyncs": 2}
+
+
+def test_manager_resync_callback_errors_are_contained():
+    mgr = BookManager(SimClock(10.0))
+
+    def boom(sym):
+        raise RuntimeError("rest down")
+
+    mgr.set_resync("bybit", boom)
+    mgr.on_depth("bybit", "ETHUSDT", _bybit("snapshot", 1, [(10, 1)], [(11, 1)]))
+    assert mgr.on_depth("bybit", "ETHUSDT", _bybit("delta", 4, [(10, 2)])) is None
+    assert mgr.resyncs == 1
+
+
+class _Pipe:
+    """Both ends of a shard pipe: collects sent batches and replays them to a reader."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_bytes(self, data):
+        self.sent.append(data)
+
+    def recv_bytes(self):
+        if not self.sent:
+            raise EOFError
+        return self.sent.pop(0)
+
+    def close(self):
+        pass
+
+
+class _StaleClient:
+    def staleness_check(self):
+        return {"ob:BTCUSDT": 75.0}
+
+
+class _Loop:
+    def call_soon_threadsafe(self, fn, *args):
+        fn(*args)
+
+
+class _Hub:
+    def __init__(self):
+        self.batches = []
+
+    def apply_records(self, batch):
+        self.batches.append(batch)
+
+
+def test_shard_status_reaches_ingest_not_hub():
+    pipe = _Pipe()
+    worker = _ShardWorker({"bybit": ["BTCUSDT"]}, pipe, flush_ms=20, urls=None)
+    worker.clients = [_StaleClient()]
+    worker.books.on_depth("bybit", "BTCUSDT", _bybit("snapshot", 1, [(100, 1)], [(101, 1)]))
+    worker.books.on_depth("bybit", "BTCUSDT", _bybit("delta", 5, [(100, 2)]))
+    worker._out.append(("mk", "bybit", "BTCUSDT", 100.5))
+    worker._out.append(worker._status())
+    worker._flush()
+    # a stats-only batch is kept by the ingest as well
+    worker._out.append(worker._status())
+    worker._flush()
+    assert pickle.loads(pipe.sent[1]) == [("st", worker.books.stats(), {"_StaleClient": {"ob:BTCUSDT": 75.0}})]
+
+    hub = _Hub()
+    ingest = ShardedIngest(hub, 2)
+    ingest._loop = _Loop()
+    ingest._stats = [{"batches": 0, "records": 0, "bytes": 0, "restarts": 0} for _ in range(2)]
+    ingest._status = [None, None]
+    assert ingest.book_stats() == {"books": 0, "synced": 0, "gaps": 0, "resyncs": 0}
+    ingest._reader(1, pipe)
+    assert hub.batches == [[("mk", "bybit", "BTCUSDT", 100.5)]]
+    assert ingest.book_stats() == {"books": 1, "synced": 0, "gaps": 1, "resyncs": 0}
+    assert ingest.stale() == {"shard1:_StaleClient": {"ob:BTCUSDT": 75.0}}
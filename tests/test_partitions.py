@@ -0,0 +1,96 @@
+import sqlite3
+
+from storage import partitions
+
+DAY = partitions.DAY_SEC
+T0 = 1_700_000_000.0 // DAY * DAY  # 2023-11-14 00:00 UTC
+
+
+def _tables(conn, base):
+    return [name for name, _ in partitions.partitions(conn, base)]
+
+
+def _insert_tick(conn, ts, sym="AAAUSDT", price=1.0):
+    name = partitions.ensure(conn, "ticks", ts)
+    conn.execute(f"INSERT INTO {name} VALUES (?,?,?,?)", (ts, "binance", sym, price))
+    conn.commit()
+
+
+def test_partition_name_is_utc_day():
+    assert partitions.partition_name("ticks", T0) == "ticks_p20231114"
+    assert partitions.partition_name("ticks", T0 + DAY - 1) == "ticks_p20231114"
+    assert partitions.partition_name("unified_ticks", T0 + DAY) == "unified_ticks_p20231115"
+
+
+def test_ensure_creates_partitions_and_view():
+    conn = sqlite3.connect(":memory:")
+    _insert_tick(conn, T0 + 10)
+    _insert_tick(conn, T0 + DAY + 10)
+    _insert_tick(conn, T0 + DAY + 20)
+    assert _tables(conn, "ticks") == ["ticks_p20231114", "ticks_p20231115"]
+    assert conn.execute("SELECT COUNT(*) FROM ticks").fetchone()[0] == 3
+    assert conn.execute("SELECT ts FROM ticks ORDER BY ts DESC LIMIT 1").fetchone()[0] == T0 + DAY + 20
+    # idempotent
+    assert partitions.ensure(conn, "ticks", T0 + 5) == "ticks_p20231114"
+    assert len(_tables(conn, "ticks")) == 2
+
+
+def test_partitions_lookup_escapes_underscores():
+    conn = sqlite3.connect(":memory:")
+    partitions.ensure(conn, "ticks", T0)
+    partitions.ensure(conn, "unified_ticks", T0)
+    conn.execute("CREATE TABLE ticksXp20231114(x)")
+    assert _tables(conn, "ticks") == ["ticks_p20231114"]
+    assert _tables(conn, "unified_ticks") == ["unified_ticks_p20231114"]
+
+
+def test_ensure_view_without_partition_is_empty():
+    conn = sqlite3.connect(":memory:")
+    partitions.ensure_view(conn, "features")
+    assert _tables(conn, "features") == []
+    assert conn.execute("SELECT * FROM features WHERE sym='AAAUSDT'").fetchall() == []
+    assert [r[1] for r in conn.execute("PRAGMA table_info(features)")] == partitions.columns("features")
+    name = partitions.ensure(conn, "features", T0)
+    conn.execute(f"INSERT INTO {name} VALUES (?,?,?,?)", (T0, "AAAUSDT", 1.0, b""))
+    assert conn.execute("SELECT COUNT(*) FROM features").fetchone()[0] == 1
+
+
+def test_legacy_table_is_migrated_into_view():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE features(ts REAL, sym TEXT, data TEXT)")
+    conn.execute("INSERT INTO features VALUES (?, 'AAAUSDT', '{}')", (T0 - DAY,))
+    conn.commit()
+    partitions.ensure(conn, "features", T0)
+    assert partitions.partitions(conn, "features")[0] == ("features_legacy", None)
+    # the legacy table gains the new columns and stays readable through the view
+    assert conn.execute("SELECT ts, score FROM features").fetchall() == [(T0 - DAY, None)]
+    idx = [r[1] for r in conn.execute("PRAGMA index_list(features_legacy)")]
+    assert "idx_features_legacy_ts" in idx
+
+
+def test_drop_before_drops_whole_expired_days():
+    conn = sqlite3.connect(":memory:")
+    for d in range(4):
+        _insert_tick(conn, T0 + d * DAY + 60)
+    dropped = partitions.drop_before(conn, "ticks", T0 + 2 * DAY + 3600)
+    assert dropped == ["ticks_p20231114", "ticks_p20231115"]
+    assert _tables(conn, "ticks") == ["ticks_p20231116", "ticks_p20231117"]
+    assert conn.execute("SELECT COUNT(*) FROM ticks").fetchone()[0] == 2
+
+
+def test_drop_before_keeps_newest_partition():
+    conn = sqlite3.connect(":memory:")
+    _insert_tick(conn, T0 + 60)
+    assert partitions.drop_before(conn, "ticks", T0 + 10 * DAY) == []
+    assert _tables(conn, "ticks") == ["ticks_p20231114"]
+
+
+def test_drop_before_legacy_by_newest_row():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE ticks(ts REAL, ex TEXT, sym TEXT, price REAL)")
+    conn.execute("INSERT INTO ticks VALUES (?, 'binance', 'AAAUSDT', 1.0)", (T0 + 100,))
+    conn.commit()
+    _insert_tick(conn, T0 + DAY + 60)
+    assert partitions.drop_before(conn, "ticks", T0 + 50) == []
+    assert partitions.drop_before(conn, "ticks", T0 + 200) == ["ticks_legacy"]
+    assert _tables(conn, "ticks") == ["ticks_p20231115"]
@@ -0,0 +1,97 @@
+import asyncio
+import types
+
+import pytest
+
+from orchestrator import rate_limiter
+from orchestrator.rate_limiter import TokenBucket
+
+
+class _FakeTime:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, sec):
+        self.slept.append(sec)
+        self.now += sec
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive the bucket's monotonic clock and sleeps by hand."""
+    fake = _FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    monkeypatch.setattr(rate_limiter, "asyncio", types.SimpleNamespace(sleep=fake.sleep, Lock=asyncio.Lock))
+    return fake
+
+
+def test_refill_is_capped_at_capacity(clock):
+    b = TokenBucket(rate=2.0, capacity=4.0)
+    b.tokens = 0.0
+    clock.now += 1.0
+    b._refill(clock.now)
+    assert b.tokens == 2.0
+    clock.now += 10.0
+    b._refill(clock.now)
+    assert b.tokens == 4.0
+
+
+def test_acquire_waits_for_refill(clock):
+    b = TokenBucket(rate=2.0, capacity=2.0)
+
+    async def take(n):
+        for _ in range(n):
+            await b.acquire()
+
+    t0 = clock.now
+    asyncio.run(take(6))
+    # two from the full bucket, then one every 1/rate seconds
+    assert clock.now - t0 == pytest.approx(2.0)
+    assert b.waits == 4
+    asyncio.run(b.acquire(0.0))
+    assert b.tokens == pytest.approx(0.0)
+
+
+def test_backoff_halves_rate_and_pauses(clock):
+    b = TokenBucket(rate=16.0, min_pause_sec=5.0, max_pause_sec=12.0)
+    b.backoff()
+    assert b.rate == 8.0 and b.tokens == 0.0 and b.backoffs == 1
+    assert b.stats()["paused"]
+    # a second failure from the same burst counts once
+    b.backoff()
+    assert b.rate == 8.0 and b.backoffs == 1
+
+    t0 = clock.now
+    asyncio.run(b.acquire())
+    # the bucket refills at the reduced rate during the pause
+    assert clock.now - t0 == pytest.approx(5.0)
+    assert b.tokens == pytest.approx(min(b.capacity, 5.0 * 8.0) - 1.0)
+    assert not b.stats()["paused"]
+
+    # repeats double the pause up to max_pause_sec and floor the rate at base/16
+    for expected in (10.0, 12.0, 12.0):
+        b.backoff()
+        assert b._paused_until - clock.now == expected
+        clock.now = b._paused_until
+    assert b.rate == 1.0
+    b.backoff()
+    assert b.rate == 1.0
+
+
+def test_success_recovers_rate_then_pause(clock):
+    b = TokenBucket(rate=10.0, min_pause_sec=5.0)
+    b.backoff()
+    clock.now = b._paused_until
+    b.backoff()
+    assert b.rate == 2.5 and b._pause == 20.0
+    # each success adds base/50 until the configured rate is back
+    b.success()
+    assert b.rate == pytest.approx(2.7)
+    for _ in range(100):
+        b.success()
+    assert b.rate == 10.0
+    assert b._pause == 5.0
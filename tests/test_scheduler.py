@@ -0,0 +1,177 @@
+import asyncio
+import types
+
+import pytest
+
+from data_fetcher.hub import DataHub
+from data_fetcher.rest_client import RESTStatusError
+from orchestrator import scheduler
+from data_fetcher import bybit_rest, mexc_rest
+from orchestrator.scheduler import FundingOIPoller, OIPriorityQueue
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def hub(symbols):
+    hub = DataHub()
+    hub.universe = {"binance": list(symbols), "bybit": list(symbols), "mexc": list(symbols)}
+    return hub
+
+
+@pytest.fixture
+def fixed_time(monkeypatch):
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(time=lambda: NOW, monotonic=lambda: NOW))
+
+
+def test_prioritize_by_age_weighted_by_score(hub, fixed_time):
+    scores = {"S0USDT": 0.0, "S1USDT": 100.0, "S2USDT": 0.0, "S3USDT": 50.0}
+    poller = FundingOIPoller(hub, score_fn=scores.get)
+    # OI ages 30s, 20s, 50s and 24s; S4 never polled
+    for sym, age in (("S0USDT", 30), ("S1USDT", 20), ("S2USDT", 50), ("S3USDT", 24)):
+        hub._set_oi("binance", sym, NOW - age, 1.0)
+    order = poller._prioritize("binance", ["S0USDT", "S1USDT", "S2USDT", "S3USDT", "S4USDT"])
+    # weights: S0 30, S1 20*3=60, S2 50, S3 24*2=48
+    assert order == ["S4USDT", "S1USDT", "S2USDT", "S3USDT", "S0USDT"]
+
+
+def test_prioritize_ignores_failing_or_negative_scores(hub, fixed_time):
+    def score(sym):
+        if sym == "S0USDT":
+            raise KeyError(sym)
+        return -500.0
+
+    poller = FundingOIPoller(hub, score_fn=score)
+    hub._set_oi("binance", "S0USDT", NOW - 10, 1.0)
+    hub._set_oi("binance", "S1USDT", NOW - 20, 1.0)
+    assert poller._prioritize("binance", ["S0USDT", "S1USDT"]) == ["S1USDT", "S0USDT"]
+
+
+def _poll(poller, ex, sym, exc=None):
+    async def fetch(s, ts):
+        if exc is not None:
+            raise exc
+
+    poller._fetch[ex] = fetch
+    asyncio.run(poller._poll_one(ex, sym, acquire=False))
+
+
+def test_rate_limited_backs_off_and_success_recovers(hub):
+    poller = FundingOIPoller(hub)
+    bucket = poller.buckets["binance"]
+    _poll(poller, "binance", "S0USDT", RESTStatusError(429, "/futures/data/openInterestHist"))
+    st = poller._stats["binance"]
+    assert st["rate_limited"] == 1 and st["errors"] == 1
+    assert bucket.backoffs == 1 and bucket.rate == bucket.base_rate / 2
+    # a rate limit is not the symbol's fault
+    assert "S0USDT" not in hub._binance_skip
+
+    _poll(poller, "binance", "S0USDT")
+    assert st["polled"] == 1
+    assert bucket.rate == pytest.approx(bucket.base_rate / 2 + bucket.base_rate / 50)
+
+
+def test_other_4xx_skips_binance_symbol(hub):
+    poller = FundingOIPoller(hub)
+    _poll(poller, "binance", "S1USDT", RESTStatusError(400, "/futures/data/openInterestHist"))
+    assert "S1USDT" in hub._binance_skip
+    assert poller.buckets["binance"].backoffs == 0
+    assert poller._stats["binance"]["rate_limited"] == 0
+
+
+def test_bulk_mexc_normalizes_contract_symbols(hub, monkeypatch):
+    async def tickers_all():
+        return {"success": True, "data": [
+            {"symbol": "BTC_USDT", "fundingRate": 0.0001},
+            {"symbol": "s0_usdt", "fundingRate": "-0.0002"},
+            {"symbol": "ETH_USDT", "fundingRate": 0.0003},
+            {"symbol": None, "fundingRate": 0.1},
+        ]}
+
+    monkeypatch.setattr(mexc_rest, "tickers_all", tickers_all)
+    poller = FundingOIPoller(hub)
+    asyncio.run(poller._poll_bulk("mexc"))
+    assert hub.metrics["BTCUSDT"]["mexc"]["funding"] == 0.0001
+    assert hub.metrics["S0USDT"]["mexc"]["funding"] == -0.0002
+    assert "ETHUSDT" not in hub.metrics
+    assert poller._stats["mexc"]["polled"] == 2
+    assert {"BTCUSDT", "S0USDT"} <= hub._dirty
+
+
+def test_bulk_bybit_fans_out_funding_and_oi(hub, monkeypatch):
+    async def tickers_all():
+        return {"result": {"list": [
+            {"symbol": "BTCUSDT", "fundingRate": "0.0001", "openInterest": "1234.5"},
+            {"symbol": "XYZUSDT", "fundingRate": "0.01", "openInterest": "1"},
+        ]}}
+
+    monkeypatch.setattr(bybit_rest, "tickers_all", tickers_all)
+    poller = FundingOIPoller(hub)
+    asyncio.run(poller._poll_bulk("bybit"))
+    m = hub.metrics["BTCUSDT"]["bybit"]
+    assert m["funding"] == 0.0001 and m["oi"] == 1234.5
+    assert "XYZUSDT" not in hub.metrics
+    assert poller._stats["bybit"]["polled"] == 1
+
+
+def test_queue_base_interval_extremes():
+    q = OIPriorityQueue(budget_per_min=100.0, min_interval=12.0, max_interval=300.0)
+    assert q.base_interval(1.0) == 12.0
+    assert q.base_interval(0.0) == 300.0
+    # hotness is clamped to 0..1
+    assert q.base_interval(5.0) == 12.0
+    assert q.base_interval(-1.0) == 300.0
+    assert 12.0 < q.base_interval(0.5) < 300.0
+
+
+def test_queue_scales_intervals_to_budget():
+    syms = [f"S{i}USDT" for i in range(10)]
+    # ten cold symbols want 10 * 60/300 = 2 req/min
+    q = OIPriorityQueue(budget_per_min=100.0)
+    q.sync(syms, {}, NOW)
+    assert q.scale == 1.0 and q.interval("S0USDT") == 300.0
+
+    q = OIPriorityQueue(budget_per_min=1.0)
+    q.sync(syms, {}, NOW)
+    assert q.scale == pytest.approx(2.0)
+    assert q.interval("S0USDT") == pytest.approx(600.0)
+    assert q.stats()["demand_per_min"] == pytest.approx(1.0)
+
+    # heating two symbols raises demand; relative priorities are kept
+    q.sync(syms, {"S0USDT": 1.0, "S1USDT": 1.0}, NOW)
+    demand = 2 * 60 / 12.0 + 8 * 60 / 300.0
+    assert q.scale == pytest.approx(demand)
+    assert q.interval("S2USDT") / q.interval("S0USDT") == pytest.approx(300.0 / 12.0)
+    assert q.stats()["demand_per_min"] == pytest.approx(1.0)
+
+
+def test_queue_pop_due_order_after_hotness_change():
+    q = OIPriorityQueue(budget_per_min=100.0)
+    syms = ["AUSDT", "BUSDT", "CUSDT"]
+    q.sync(syms, {}, NOW)
+    # new symbols are due now
+    assert [q.pop_due(NOW) for _ in range(4)] == ["AUSDT", "BUSDT", "CUSDT", None]
+    assert q.next_due() == NOW + 300.0
+
+    # C heats up: its next poll is pulled forward to last poll + 12s
+    q.sync(syms, {"CUSDT": 1.0}, NOW + 5.0)
+    assert q.next_due() == NOW + 12.0
+    assert q.pop_due(NOW + 11.0) is None
+    assert q.pop_due(NOW + 12.0) == "CUSDT"
+    assert q.pop_due(NOW + 12.0) is None
+    assert q.next_due() == NOW + 24.0
+
+    # cooling down does not postpone an already scheduled poll
+    q.sync(syms, {"CUSDT": 0.0}, NOW + 13.0)
+    assert q.next_due() == NOW + 24.0
+
+    # A heats up long after its last poll: due now, ahead of C
+    q.sync(syms, {"AUSDT": 1.0}, NOW + 20.0)
+    assert q.pop_due(NOW + 30.0) == "AUSDT"
+    assert q.pop_due(NOW + 30.0) == "CUSDT"
+
+    # dropped symbols are never popped again
+    q.sync(["BUSDT"], {}, NOW + 31.0)
+    assert len(q) == 1
+    assert q.pop_due(NOW + 1000.0) == "BUSDT"
+    assert q.pop_due(NOW + 1000.0) is None
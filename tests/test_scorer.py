@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from backtest.engine import score
+from scalp_engine.scorer import Scorer
+
+
+def test_vectorized_score_matches_scorer_row_by_row():
+    rng = np.random.default_rng(5)
+    n = 5000
+    # include values outside [0, 1] so clipping is covered
+    feats = {k: rng.uniform(-0.5, 1.5, n) for k in Scorer.WEIGHTS}
+    got = score(feats, Scorer.WEIGHTS)
+    sc = Scorer()
+    for i in range(n):
+        assert got[i] == pytest.approx(sc.score({k: float(v[i]) for k, v in feats.items()}), abs=1e-9)
+
+
+def test_missing_feature_counts_as_zero():
+    feats = {"oi_divergence": np.array([1.0, 0.5])}
+    got = score(feats, Scorer.WEIGHTS)
+    want = [Scorer().score({"oi_divergence": v}) for v in (1.0, 0.5)]
+    assert got == pytest.approx(want)
+
+
+def test_custom_weights():
+    w = {"oi_divergence": 1.0, "sweep_rejection": 3.0}
+    got = score({"oi_divergence": np.array([1.0]), "sweep_rejection": np.array([0.0])}, w)
+    assert got[0] == pytest.approx(25.0)
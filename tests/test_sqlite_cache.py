@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+from data_fetcher.clock import SimClock
+from storage.sqlite_cache import SQLiteCache
+
+T0 = 1_700_000_000.0
+
+
+@pytest.fixture
+def cache(tmp_path, symbols):
+    db = SQLiteCache(str(tmp_path / "data.db"), clock=SimClock(T0), flush_ms=0, flush_retries=2)
+    # queue writes as write-behind does, but flush by hand instead of on the writer thread
+    db.write_behind = True
+    yield db
+    db.close()
+
+
+def _queue(db, prices):
+    for i, p in enumerate(prices):
+        db.store_tick("binance", "BTCUSDT", p, T0 + i)
+
+
+def _stored(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT price FROM ticks ORDER BY rowid")]
+    finally:
+        conn.close()
+
+
+def _locked(path):
+    """Hold a write lock on path; returns the connection that holds it."""
+    lock = sqlite3.connect(path, isolation_level=None)
+    lock.execute("BEGIN EXCLUSIVE")
+    return lock
+
+
+def test_failed_flush_is_retried_ahead_of_newer_rows(cache):
+    writer = sqlite3.connect(cache.path, timeout=0.05)
+    _queue(cache, [1.0, 2.0, 3.0])
+    lock = _locked(cache.path)
+    cache._flush(writer)
+    st = cache.writer_stats()
+    assert st["retries"] == 1 and st["errors"] == 1 and st["dropped"] == 0
+    assert st["backlog"] == 3
+
+    _queue(cache, [4.0, 5.0])
+    lock.rollback()
+    cache._flush(writer)
+    writer.close()
+    st = cache.writer_stats()
+    assert st["backlog"] == 0 and st["flushed_rows"] == 5
+    assert _stored(cache.path) == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_batch_is_discarded_after_flush_retries(cache):
+    writer = sqlite3.connect(cache.path, timeout=0.05)
+    _queue(cache, [1.0, 2.0, 3.0])
+    lock = _locked(cache.path)
+    for _ in range(cache.flush_retries):
+        cache._flush(writer)
+        assert cache.writer_stats()["backlog"] == 3
+    cache._flush(writer)
+    st = cache.writer_stats()
+    assert st["backlog"] == 0 and st["dropped"] == 3 and st["retries"] == cache.flush_retries
+
+    # the failure count starts over for the next batch
+    lock.rollback()
+    _queue(cache, [4.0])
+    cache._flush(writer)
+    writer.close()
+    assert _stored(cache.path) == [4.0]
+
+
+class _RacingConn(sqlite3.Connection):
+    """Writer connection whose inserts fail after newer rows were queued meanwhile."""
+
+    on_write = None
+
+    def executemany(self, sql, rows):
+        if self.on_write is not None:
+            self.on_write()
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_requeue_overflow_drops_newest_rows(tmp_path, symbols):
+    db = SQLiteCache(str(tmp_path / "data.db"), clock=SimClock(T0), flush_ms=0, buffer_rows=4)
+    db.write_behind = True
+    writer = sqlite3.connect(db.path, factory=_RacingConn)
+    _queue(db, [1.0, 2.0, 3.0])
+    # three newer rows arrive while the batch is out; the requeue pushes the newest two off
+    writer.on_write = lambda: [db.store_tick("binance", "BTCUSDT", p, T0) for p in (4.0, 5.0, 6.0)]
+    db._flush(writer)
+    writer.close()
+    assert [params[3] for _, params in db._buf] == [1.0, 2.0, 3.0, 4.0]
+    assert db.writer_stats()["dropped"] == 2
+    db.close()
+
+
+def test_close_drains_buffer(tmp_path, symbols):
+    path = str(tmp_path / "data.db")
+    db = SQLiteCache(path, write_behind=True, clock=SimClock(T0), flush_ms=60000, flush_rows=1000)
+    _queue(db, [float(p) for p in range(1, 51)])
+    assert db.writer_stats()["backlog"] == 50
+    db.close()
+    assert _stored(path) == [float(p) for p in range(1, 51)]
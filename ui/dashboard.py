@@ -1,16 +1,19 @@
 import streamlit as st
 import sqlite3
 import time
-import json
 import sys
 from zoneinfo import ZoneInfo
 sys.path.insert(0, "/app")
 from data_fetcher.symbols import load_symbols
+from storage import feature_codec
+from storage.history_writer import TickArchive
 
 st.set_page_config(page_title="SGNLV2 Real-Time", layout="wide")
 st.title("🚀 SGNLV2 Real-Time Dashboard")
 
 DB_PATH = "/app/state/data.db"
+# closed partitions of unified_ticks live here; SQLite only holds the hot window
+ARCHIVE = TickArchive("/app/state/history")
 
 def get_conn():
     return sqlite3.connect(DB_PATH, check_same_thread=False)
@@ -34,12 +37,15 @@ def fetch_freshness_and_counts():
     conn = get_conn()
     cur = conn.cursor()
     now = time.time()
-    cur.execute("SELECT MAX(ts) FROM unified_ticks")
-    latest_tick = cur.fetchone()[0] or 0
-    cur.execute("SELECT MAX(ts) FROM features")
-    latest_feat = cur.fetchone()[0] or 0
-    cur.execute("SELECT COUNT(*) FROM unified_ticks")
-    tick_count = cur.fetchone()[0] or 0
+    # ORDER BY/LIMIT merges the per-partition ts indexes; MAX() would scan every day partition
+    cur.execute("SELECT ts FROM unified_ticks ORDER BY ts DESC LIMIT 1")
+    latest_tick = (cur.fetchone() or (0,))[0]
+    cur.execute("SELECT ts FROM features ORDER BY ts DESC LIMIT 1")
+    latest_feat = (cur.fetchone() or (0,))[0]
+    # archived rows come from the manifest; only the unarchived tail is counted in SQLite
+    archived_through = ARCHIVE.archived_through()
+    cur.execute("SELECT COUNT(*) FROM unified_ticks WHERE ts >= ?", (archived_through,))
+    tick_count = (cur.fetchone()[0] or 0) + ARCHIVE.total_rows()
     cur.execute("SELECT COUNT(*) FROM features")
     feat_count = cur.fetchone()[0] or 0
     conn.close()
@@ -68,17 +74,18 @@ def fetch_symbol_ticks(sym: str, lookback_sec: int = 3600):
 
 def fetch_symbol_scores(sym: str, lookback_sec: int = 3600):
     conn = get_conn()
+    # score has its own column; only rows not yet migrated from JSON need decoding
     rows = conn.execute(
-        "SELECT ts, data FROM features WHERE sym=? AND ts>? ORDER BY ts ASC",
+        "SELECT ts, score, CASE WHEN score IS NULL THEN data END FROM features WHERE sym=? AND ts>? ORDER BY ts ASC",
         (sym, time.time() - lookback_sec),
     ).fetchall()
     conn.close()
     out = []
-    for ts, data in rows:
+    for ts, sc, data in rows:
         try:
-            d = json.loads(data)
-            sc = float(d.get("score", 0))
-            out.append((ts, sc))
+            if sc is None:
+                sc = feature_codec.decode(data).get("score", 0)
+            out.append((ts, float(sc)))
         except Exception:
             continue
     return out